@@ -30,13 +30,13 @@ let inputSuggestion = document.getElementById("input-suggesion");
 
 async function loadData() {
     try {
-        const response = await fetch('../datas/historical_result.json');
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        schoolData = await response.json();
+        const dataLoader = await import("../js_utils/data_loader.js");
+        schoolData = await dataLoader.loadPublishedJson('../datas', 'historical_result.json');
         searchEngine = await import("../js_utils/search_engine.js");
-        searchEngine.flattenData(schoolData)
+        // 有預建索引就不必在這裡扁平化整份資料
+        if (!(await searchEngine.loadSearchIndex('../datas/search_index.json'))) {
+            searchEngine.flattenData(schoolData);
+        }
         
         const randomElement = GUESSING[Math.floor(Math.random() * GUESSING.length)];
         
@@ -0,0 +1,94 @@
+
+// 讀取 python/publish_data.py 發布的精簡資料檔：
+// 依 manifest 載入鍵字典編碼的 .min.json (瀏覽器支援時直接下載 .gz 再自行解壓)，
+// 沒有 manifest 或載入失敗時退回原本的 JSON 檔案。
+// 另外提供 data_integrator.py 輸出的分片 (datas/shards) 的讀取函數。
+
+const COMPACT_FORMAT = 1;
+const SHARD_FORMAT = 1;
+
+// 把代碼換回原本的鍵 (與 python/tools/compact_json.py 的 decode 相同)
+function decodeKeys(value, keys) {
+    if (Array.isArray(value)) {
+        return value.map(item => decodeKeys(item, keys));
+    }
+    if (value !== null && typeof value === "object") {
+        const decoded = {};
+        for (const [key, item] of Object.entries(value)) {
+            decoded[keys[key] !== undefined ? keys[key] : key] = decodeKeys(item, keys);
+        }
+        return decoded;
+    }
+    return value;
+}
+
+async function fetchJson(url) {
+    const response = await fetch(url);
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+}
+
+async function fetchCompact(publishDir, entry) {
+    // 用內容雜湊當版本參數，檔案更新後不會讀到瀏覽器快取中的舊版
+    const version = entry.sha256.slice(0, 12);
+
+    if (entry.gzip && typeof DecompressionStream !== "undefined") {
+        const response = await fetch(`${publishDir}/${entry.gzip.file}?v=${version}`);
+        if (response.ok) {
+            // 伺服器若已經用 Content-Encoding 傳送，瀏覽器會自動解壓
+            if (response.headers.get("Content-Encoding")) {
+                return response.json();
+            }
+            const stream = response.body.pipeThrough(new DecompressionStream("gzip"));
+            return new Response(stream).json();
+        }
+    }
+
+    return fetchJson(`${publishDir}/${entry.file}?v=${version}`);
+}
+
+async function loadPublishedJson(dataDir, fileName) {
+    const publishDir = `${dataDir}/publish`;
+    try {
+        const manifestResponse = await fetch(`${publishDir}/manifest.json`, { cache: "no-cache" });
+        if (manifestResponse.ok) {
+            const manifest = await manifestResponse.json();
+            const entry = manifest.files && manifest.files[fileName];
+            if (manifest.format === COMPACT_FORMAT && entry) {
+                const compact = await fetchCompact(publishDir, entry);
+                if (compact.format === COMPACT_FORMAT) {
+                    return decodeKeys(compact.data, compact.keys);
+                }
+            }
+        }
+    } catch (error) {
+        console.warn(`精簡資料載入失敗，改用 ${fileName}：`, error);
+    }
+
+    return fetchJson(`${dataDir}/${fileName}`);
+}
+
+// 分片索引 (python/tools/shard_writer.py 輸出)，沒有分片時返回 null
+async function loadShardIndex(shardDir) {
+    try {
+        const response = await fetch(`${shardDir}/index.json`, { cache: "no-cache" });
+        if (response.ok) {
+            const index = await response.json();
+            if (index.format === SHARD_FORMAT) {
+                return index;
+            }
+        }
+    } catch (error) {
+        console.warn("分片索引載入失敗，改用完整資料：", error);
+    }
+    return null;
+}
+
+// 下載單一學校或區域的分片，用內容雜湊當版本參數
+async function loadShard(shardDir, entry) {
+    return fetchJson(`${shardDir}/${entry.shard}?v=${entry.hash}`);
+}
+
+export { loadPublishedJson, decodeKeys, loadShardIndex, loadShard };
@@ -1,8 +1,9 @@
 
 
 let flattenedSchoolData = []; // 扁平化後的 [{uni: '...', dept: '...'}] 結構
+let searchIndex = null; // python/tools/search_index.py 預建的索引，有的話就不必扁平化
 
-// --- 1. 定義別名對照表 ---
+// --- 1. 定義別名對照表 (python/tools/search_index.py 有同一份，修改時兩邊要一起改) ---
 const SCHOOL_ALIASES = {
     "台大": ["國立臺灣大學"], "臺大": ["國立臺灣大學"], "ntu": ["國立臺灣大學"],
     "成大": ["國立成功大學"], "ncku": ["國立成功大學"],
@@ -69,6 +70,78 @@ function flattenData(data) {
     console.log(`已扁平化 ${flattenedSchoolData.length} 個校系記錄，準備搜尋。`);
 }
 
+// 載入預建索引，成功時返回 true；失敗時呼叫端改用 flattenData
+async function loadSearchIndex(url) {
+    try {
+        const response = await fetch(url);
+        if (response.ok) {
+            const index = await response.json();
+            if (index.format === 1) {
+                index.normalized = {};
+                searchIndex = index;
+                console.log(`已載入 ${index.records.length} 個校系的搜尋索引。`);
+                return true;
+            }
+        }
+    } catch (error) {
+        console.warn("搜尋索引載入失敗，改用扁平化搜尋：", error);
+    }
+    return false;
+}
+
+function normalizedNames(kind) {
+    if (!searchIndex.normalized[kind]) {
+        searchIndex.normalized[kind] = searchIndex[kind].map(name => name.replaceAll("台", "臺").toLowerCase());
+    }
+    return searchIndex.normalized[kind];
+}
+
+// 名稱包含關鍵字或符合別名的編號 (kind 為 "universities" 或 "departments")
+function matchNames(kind, k) {
+    const names = normalizedNames(kind);
+    const matched = new Set(searchIndex.aliases[kind][k] || []);
+
+    if (k.length < 2) {
+        // 單一個字沒有兩字索引，直接比對名稱清單
+        names.forEach((name, id) => { if (name.includes(k)) matched.add(id); });
+        return matched;
+    }
+
+    // 關鍵字每個相鄰兩字的 posting list 取交集，再確認確實包含整個關鍵字
+    const lists = [];
+    for (let i = 0; i < k.length - 1; i++) {
+        const list = searchIndex.grams[kind][k.slice(i, i + 2)];
+        if (list === undefined) return matched;
+        lists.push(list);
+    }
+    lists.sort((a, b) => a.length - b.length);
+    const others = lists.slice(1).map(list => new Set(list));
+    for (const id of lists[0]) {
+        if (others.every(set => set.has(id)) && names[id].includes(k)) matched.add(id);
+    }
+    return matched;
+}
+
+function searchWithIndex(kws) {
+    const scores = new Map();
+    const addScore = (recordIds, score) => {
+        for (const recordId of recordIds) scores.set(recordId, (scores.get(recordId) || 0) + score);
+    };
+
+    for (const k of kws) {
+        for (const uniId of matchNames("universities", k)) addScore(searchIndex.postings.universities[uniId], 67);
+        for (const deptId of matchNames("departments", k)) addScore(searchIndex.postings.departments[deptId], 2);
+    }
+
+    // 同分時保持原本攤平的順序
+    return [...scores.entries()]
+        .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+        .map(([recordId, score]) => {
+            const [uniId, deptId] = searchIndex.records[recordId];
+            return { item: { uni: searchIndex.universities[uniId], dept: searchIndex.departments[deptId] }, score };
+        });
+}
+
 function get_result(query) {
 
     const trimmedQuery = query.trim();
@@ -78,6 +151,10 @@ function get_result(query) {
     }
 
     const kws = trimmedQuery.toLowerCase().replaceAll("台", "臺").split(/\s+/).filter(k => k.length > 0);
+    if (searchIndex) {
+        return searchWithIndex(kws);
+    }
+
     const results = [];
     
     flattenedSchoolData.forEach(item => {
@@ -108,4 +185,4 @@ function get_result(query) {
     return results
 }
 
-export { flattenData, get_result };
\ No newline at end of file
+export { flattenData, loadSearchIndex, get_result };
\ No newline at end of file
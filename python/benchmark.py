@@ -0,0 +1,213 @@
+"""
+解析、匹配、整合等主要流程的效能基準測試，完全離線執行。
+
+每一項測試量測：
+    - 執行時間 (重複 REPEAT 次，記錄最短與中位數)
+    - 峰值記憶體 (另外用 tracemalloc 跑一次，避免拖慢計時)
+    - 輸出內容的雜湊 (輸出改變時也會標示出來，方便確認優化沒有改變結果)
+
+報告寫成 JSON (datas/.benchmarks/latest.json)，並與 baseline.json 比較：
+時間或記憶體超過基準的 (1 + TOLERANCE) 倍 (且差距大於 MIN_*_DELTA) 就標示為退步。
+設 SAVE_BASELINE = True 執行一次即可把這次的結果存成新的基準。
+
+需要的輸入：
+    - 校系分則頁面：benchmark_fixtures/detail_page.html
+    - 搜尋頁：datas/{CURRENT_YEAR}/AST_school.html
+    - 錄取分數：datas/{YEAR}/dept_criteria.csv
+    - 分數分布：datas/{YEAR}/subjects_combinations.csv；repo 裡沒有時，
+      由錄取分數中出現的科目組合產生固定的合成資料 (報告中會註明)
+"""
+import contextlib
+import hashlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from data_integrator import integrate_data, TARGET_START_YEAR, CURRENT_YEAR
+from tools import department_record
+from tools.college_data_transform import convert_division_exam_data
+from tools.extract_department_details import extract_table_data, PARSER_BACKENDS
+from tools.get_data_eid import extract_department_eids
+from tools.match_groups import match_them
+from tools.score_distribution_csv_2_json import convert_score_distribution
+from tools.synthetic_data import write_synthetic_score_distribution
+
+# --- 設定常數 ---
+YEAR = 114
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_fixtures')
+DETAIL_PAGE_FIXTURE = os.path.join(FIXTURE_DIR, 'detail_page.html')
+BENCHMARK_DIR = 'datas/.benchmarks'
+REPORT_FILE = 'datas/.benchmarks/latest.json'
+BASELINE_FILE = 'datas/.benchmarks/baseline.json'
+# 每項測試重複的次數
+REPEAT = 5
+# extract_table_data 每次量測解析幾頁 (單頁太快，計時誤差大)
+PAGES_PER_RUN = 50
+# 比基準慢或多用超過這個比例就算退步
+TOLERANCE = 0.3
+# 差距小於這些絕對值時視為誤差 (很短的測試在忙碌的機器上容易抖動)
+MIN_SECONDS_DELTA = 0.01
+MIN_MEMORY_DELTA = 256 * 1024
+# True 時把這次的結果存成新的基準
+SAVE_BASELINE = False
+
+REPORT_FORMAT = 1
+
+def _hash_default(value: Any) -> Any:
+    # YearRecord 還原成原本的 dict，雜湊與改用 YearRecord 之前相同
+    if isinstance(value, department_record.YearRecord):
+        return value.to_dict()
+    return str(value)
+
+
+def output_hash(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, ensure_ascii=False, default=_hash_default).encode('utf-8')).hexdigest()[:16]
+
+
+class Benchmark:
+
+    def __init__(self, name: str, func: Callable[[], Any], units: int = 1, note: str = ""):
+        """
+        :param func: 執行一次要量測的工作，返回輸出 (用來計算雜湊)
+        :param units: 一次執行包含幾個單位 (例如頁數)，報告中另外換算成每單位時間
+        """
+        self.name = name
+        self.func = func
+        self.units = units
+        self.note = note
+
+    def run(self, repeat: int = REPEAT) -> Dict[str, Any]:
+        # 許多函數每筆都會印出訊息，量測時不需要
+        with contextlib.redirect_stdout(io.StringIO()):
+            timings = []
+            output = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                output = self.func()
+                timings.append(time.perf_counter() - start)
+
+            tracemalloc.start()
+            self.func()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        result = {
+            "min_seconds": min(timings),
+            "median_seconds": statistics.median(timings),
+            "seconds_per_unit": min(timings) / self.units,
+            "units": self.units,
+            "peak_memory_bytes": peak,
+            "output_hash": output_hash(output),
+        }
+        if self.note:
+            result["note"] = self.note
+        return result
+
+
+def build_benchmarks(year: int = YEAR) -> List[Benchmark]:
+    benchmarks: List[Benchmark] = []
+
+    with open(DETAIL_PAGE_FIXTURE, 'r', encoding='utf-8') as f:
+        detail_page = f.read()
+    for backend in PARSER_BACKENDS:
+        benchmarks.append(Benchmark(
+            f"extract_table_data[{backend}]",
+            lambda backend=backend: [extract_table_data(detail_page, "", "", backend=backend) for _ in range(PAGES_PER_RUN)][-1],
+            units=PAGES_PER_RUN,
+        ))
+
+    search_page = f"datas/{CURRENT_YEAR}/AST_school.html"
+    benchmarks.append(Benchmark("extract_department_eids", lambda: extract_department_eids(search_page)))
+
+    criteria_csv = f"datas/{year}/dept_criteria.csv"
+    benchmarks.append(Benchmark("convert_division_exam_data", lambda: convert_division_exam_data(criteria_csv)))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        dept_criteria = convert_division_exam_data(criteria_csv)
+
+    distribution_csv = f"datas/{year}/subjects_combinations.csv"
+    note = ""
+    if not os.path.exists(distribution_csv):
+        distribution_csv = os.path.join(BENCHMARK_DIR, f"subjects_combinations_{year}.csv")
+        write_synthetic_score_distribution(dept_criteria, distribution_csv)
+        note = "合成的分數分布"
+    benchmarks.append(Benchmark("convert_score_distribution", lambda: convert_score_distribution(distribution_csv), note=note))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        score_distribution = convert_score_distribution(distribution_csv)
+    # match_them 不會修改輸入，重複執行的結果相同
+    benchmarks.append(Benchmark("match_them", lambda: match_them(dept_criteria, score_distribution), note=note))
+
+    benchmarks.append(Benchmark(
+        f"integrate_data({TARGET_START_YEAR}, {CURRENT_YEAR})",
+        lambda: integrate_data(TARGET_START_YEAR, CURRENT_YEAR),
+    ))
+
+    return benchmarks
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = TOLERANCE) -> List[str]:
+    """返回與基準相比的退步 (以及輸出改變) 說明。"""
+    problems = []
+    for name, result in report["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if base is None:
+            continue
+        for key, label, min_delta in (("min_seconds", "時間", MIN_SECONDS_DELTA), ("peak_memory_bytes", "峰值記憶體", MIN_MEMORY_DELTA)):
+            if base[key] and result[key] > base[key] * (1 + tolerance) and result[key] - base[key] > min_delta:
+                problems.append(f"{name} {label}退步：{base[key]:.4g} → {result[key]:.4g} ({result[key] / base[key] - 1:+.0%})")
+        if result["output_hash"] != base["output_hash"]:
+            problems.append(f"{name} 輸出與基準不同")
+    return problems
+
+
+def run_benchmarks(benchmarks: List[Benchmark], repeat: int = REPEAT) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "format": REPORT_FORMAT,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "benchmarks": {},
+    }
+    for benchmark in benchmarks:
+        result = benchmark.run(repeat)
+        report["benchmarks"][benchmark.name] = result
+        per_unit = f"，每單位 {result['seconds_per_unit'] * 1000:.3f} ms" if benchmark.units > 1 else ""
+        print(f"⏱️  {benchmark.name}：{result['min_seconds'] * 1000:.1f} ms{per_unit}，"
+              f"峰值記憶體 {result['peak_memory_bytes'] / 1024 / 1024:.1f} MiB")
+    return report
+
+
+# =======================================================
+# 執行腳本
+# =======================================================
+if __name__ == "__main__":
+    report = run_benchmarks(build_benchmarks())
+
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+    print(f"\n📄 報告已儲存至 {REPORT_FILE}")
+
+    if SAVE_BASELINE:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"📌 已存為新的基準 {BASELINE_FILE}")
+    elif os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            problems = compare(report, json.load(f))
+        if problems:
+            print(f"\n❌ 與基準相比有 {len(problems)} 個問題：")
+            for problem in problems:
+                print(f"   {problem}")
+            sys.exit(1)
+        print("✅ 沒有超過基準的退步")
+    else:
+        print(f"還沒有基準，設 SAVE_BASELINE = True 執行一次即可建立 {BASELINE_FILE}")
@@ -0,0 +1,66 @@
+import filecmp
+import os
+
+from data_integrator import iter_integrated_data_from_db, load_json_file, CURRENT_YEAR, TARGET_START_YEAR, OUTPUT_FILE
+from tools import admission_db, department_record
+from tools.json_stream import dump_object_stream
+
+# --- 設定常數 ---
+DATA_DIR = 'datas'
+DB_FILE = admission_db.DB_FILE
+# True 時匯入完成後由資料庫整合一份 EXPORT_FILE，並與 data_integrator.py 的 OUTPUT_FILE 比對
+# (寫到另一個檔案：historical_result.json 的分片、搜尋索引、指紋與發布檔只由 data_integrator.py 一起更新)
+EXPORT_HISTORICAL = True
+EXPORT_FILE = 'datas/historical_result.from_db.json'
+
+
+def import_all(conn, data_dir: str = DATA_DIR) -> None:
+    """把 data_dir 下每個年度資料夾中存在的 result.json、dept_renamed.json、all_department_criteria.json 匯入資料庫。"""
+    years = sorted(int(name) for name in os.listdir(data_dir) if name.isdigit())
+    importers = [
+        ('result.json', admission_db.import_results),
+        ('dept_renamed.json', admission_db.import_renames),
+        ('all_department_criteria.json', admission_db.import_criteria),
+    ]
+
+    with conn:
+        for year in years:
+            for file_name, importer in importers:
+                path = os.path.join(data_dir, str(year), file_name)
+                if os.path.exists(path):
+                    count = importer(conn, year, load_json_file(path))
+                    print(f"📥 {year}/{file_name}：{count} 筆")
+
+
+def export_historical(
+    conn,
+    output_file: str = EXPORT_FILE,
+    start_year: int = TARGET_START_YEAR,
+    end_year: int = CURRENT_YEAR
+) -> int:
+    """由資料庫整合出與 historical_result.json 相同格式的檔案，返回學校數。"""
+    tmp_output_file = output_file + '.tmp'
+    with open(tmp_output_file, 'w', encoding='utf-8') as f:
+        university_count = dump_object_stream(iter_integrated_data_from_db(conn, start_year, end_year), f, indent=4, default=department_record.to_json)
+    os.replace(tmp_output_file, output_file)
+    return university_count
+
+
+# =======================================================
+# 執行腳本
+# =======================================================
+if __name__ == "__main__":
+    conn = admission_db.connect(DB_FILE)
+    import_all(conn)
+    print(f"\n✅ 匯入完成！資料庫已儲存至 {DB_FILE}")
+
+    if EXPORT_HISTORICAL:
+        university_count = export_historical(conn)
+        print(f"✅ 已由資料庫產生 {university_count} 所學校的 {EXPORT_FILE}")
+        if not os.path.exists(OUTPUT_FILE):
+            print(f"⚠️ 找不到 {OUTPUT_FILE}，無法比對")
+        elif filecmp.cmp(EXPORT_FILE, OUTPUT_FILE, shallow=False):
+            print(f"✅ 與 {OUTPUT_FILE} 完全相同")
+        else:
+            print(f"⚠️ 與 {OUTPUT_FILE} 不同：資料庫與 JSON 檔案不一致，請重新匯入或重跑 data_integrator.py")
+    conn.close()
@@ -0,0 +1,64 @@
+import contextlib
+import io
+import json
+import time
+from typing import Iterable, List, Tuple
+
+from tools.extract_department_details import extract_table_data, PARSER_BACKENDS
+from tools.response_cache import ResponseCache, DEFAULT_CACHE_PATH
+from tools import profiling
+
+YEAR = 115
+CACHE_PATH = DEFAULT_CACHE_PATH
+
+
+def _run_backend(html_content: str, backend: str) -> str:
+    """以指定後端解析，返回可直接比較的 JSON 字串 (例外也轉成字串比較)。"""
+    # extract_table_data 每頁都會印一行，比對時不需要
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            result = extract_table_data(html_content, "", "", backend=backend)
+        except Exception as e:
+            return f"例外：{type(e).__name__}"
+    return json.dumps(result, ensure_ascii=False)
+
+
+def compare_parser_backends(pages: Iterable[Tuple[str, str]]) -> List[str]:
+    """
+    對每個 (EID, HTML) 用所有解析後端各跑一次，返回輸出不一致的 EID 列表，
+    並印出各後端的總耗時。
+    """
+    mismatched = []
+    elapsed = {backend: 0.0 for backend in PARSER_BACKENDS}
+    page_count = 0
+
+    for eid, html_content in pages:
+        page_count += 1
+        outputs = {}
+        for backend in PARSER_BACKENDS:
+            start = time.perf_counter()
+            outputs[backend] = _run_backend(html_content, backend)
+            elapsed[backend] += time.perf_counter() - start
+
+        if len(set(outputs.values())) > 1:
+            mismatched.append(eid)
+            print(f"❌ EID {eid} 輸出不一致：")
+            for backend, output in outputs.items():
+                print(f"   {backend}: {output}")
+
+    print(f"\n--- 比對結果 ({page_count} 頁) ---")
+    for backend, seconds in elapsed.items():
+        per_page = seconds / page_count * 1000 if page_count else 0
+        print(f"{backend}: 共 {seconds:.2f} 秒，平均每頁 {per_page:.2f} ms")
+
+    if mismatched:
+        print(f"❌ 有 {len(mismatched)} 頁輸出不一致")
+    else:
+        print("✅ 所有後端輸出完全相同")
+
+    return mismatched
+
+
+if __name__ == "__main__":
+    with ResponseCache(YEAR, CACHE_PATH, offline=True) as cache:
+        profiling.run_main("check_parser_backends", compare_parser_backends, cache.iter_pages())
@@ -1,13 +1,32 @@
+import hashlib
 import json
 import os
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, Tuple
 import re
 
+from tools import admission_db, department_record, instrumentation, profiling
+from tools.department_lineage import DepartmentLineage
+from tools.json_stream import dump_object_stream
+from tools.search_index import build_search_index
+from tools.shard_writer import ShardWriter, content_hash, read_university_shard, university_shard_content
+
 # --- 設定常數 (保持不變) ---
 DATA_DIR = 'datas'
 CURRENT_YEAR = 115
 TARGET_START_YEAR = 112 
 OUTPUT_FILE = 'datas/historical_result.json'
+# 增量整合時記錄每所學校輸入指紋的檔案
+FINGERPRINT_FILE = 'datas/historical_result.fingerprints.json'
+# 整合邏輯改變 (輸出會不同) 時遞增，讓舊指紋全部失效
+INTEGRATOR_VERSION = 1
+# True 時只重新整合輸入有變動的學校 (沿用的學校從上次的學校分片讀回，所以需要 WRITE_SHARDS)
+INCREMENTAL = True
+# True 時另外輸出每校、每區域一個分片加上 index.json，前端只下載使用者打開的學校
+WRITE_SHARDS = True
+SHARD_DIR = 'datas/shards'
+REGION_FILE = 'datas/schools_by_region.json'
+# 前端搜尋用的預建索引 (校名、系名的 n-gram 與展開後的別名)
+SEARCH_INDEX_FILE = 'datas/search_index.json'
 
 # --- 輔助函數 (保持不變) ---
 def load_json_file(filepath: str) -> Dict:
@@ -54,142 +73,314 @@ def get_department_sort_key(dept_name: str) -> float:
     # 如果沒有找到任何組別標識符，則保持原始字串排序（作為最後的保險）
     return 1000
 
-def integrate_data(start_year: int, end_year: int) -> Dict:
+@instrumentation.timed("載入來源")
+def load_sources(start_year: int, end_year: int, data_dir: str = DATA_DIR):
     """
-    整合多年度的校系數據，修復合併案例追溯不完整的錯誤，並使用緩存避免重複 IO。
-    
-    :param start_year: 最早的年份 (e.g., 112)
-    :param end_year: 最新的年份 (e.g., 115)
-    :return: 整合後的 JSON 結構
+    載入整合需要的所有輸入檔案。
+    :param data_dir: 放各年度資料夾的目錄 (合成資料可以放在別的地方)
+    :return: (各年 result.json 的緩存 (紀錄為 YearRecord), 各年 dept_renamed.json, 最新一年的 all_department_criteria.json)
     """
-    
-    # ----------------------------------------------------
-    # I. 數據緩存與初始化 (解決 IO 性能問題)
-    # ----------------------------------------------------
-    
     data_cache: Dict[str, Dict] = {}
     
     # 載入所有年份的歷史數據 (result.json)
     for year in range(start_year, end_year): # e.g., 112, 113, 114
-        path = os.path.join(DATA_DIR, str(year), 'result.json')
-        data_cache[f'result_{year}'] = load_json_file(path)
+        path = os.path.join(data_dir, str(year), 'result.json')
+        data_cache[f'result_{year}'] = department_record.from_year_data(load_json_file(path))
 
     # 載入所有年份的改名映射 (dept_renamed.json)
     # 這裡的映射是 target_year 的映射，定義了 target_year-1 的舊名 -> target_year 的新名
-    # 我們需要逆向映射： 新名 -> 舊名列表
-    reverse_maps: Dict[int, Dict[str, Dict[str, List[str]]]] = {} 
-    
+    rename_maps: Dict[int, Dict[str, Dict[str, List[str]]]] = {}
     for year in range(start_year + 1, end_year + 1): # e.g., 113, 114, 115
-        path = os.path.join(DATA_DIR, str(year), 'dept_renamed.json')
-        forward_map_for_year = load_json_file(path) # 結構: { 學校: { 舊名: [新名列表] } }
-        
-        # 建立逆向映射: { 學校: { 新名: [舊名列表] } }
-        reverse_maps[year] = {}
-        
-        for uni, forward_map_for_uni in forward_map_for_year.items():
-            reverse_maps[year][uni] = {}
-            for old_dept_name, new_dept_names in forward_map_for_uni.items():
-                for new_dept_name in new_dept_names:
-                    # 如果新系名是 key, 舊系名是 value
-                    reverse_maps[year][uni].setdefault(new_dept_name, []).append(old_dept_name)
+        path = os.path.join(data_dir, str(year), 'dept_renamed.json')
+        rename_maps[year] = load_json_file(path) # 結構: { 學校: { 舊名: [新名列表] } }
 
     # 載入最新一年的數據 (115) 作為基準
-    current_data_path = os.path.join(DATA_DIR, str(end_year), 'all_department_criteria.json')
+    current_data_path = os.path.join(data_dir, str(end_year), 'all_department_criteria.json')
     integrated_data = load_json_file(current_data_path)
+
+    return data_cache, rename_maps, integrated_data
+
+
+@instrumentation.timed("整合學校", unit="所學校")
+def integrate_university(
+    uni: str,
+    depts_115: Dict[str, Any],
+    data_cache: Dict[str, Dict],
+    lineage: DepartmentLineage,
+    end_year: int
+) -> Dict[str, Any]:
+    """整合單一學校所有校系的歷年數據。改名只會發生在同一所學校內，所以各校可以分開處理。"""
+    integrated_uni: Dict[str, Any] = {}
+
+    for dept_115 in depts_115.keys():
+        
+        # 初始化 115 年數據
+        integrated_uni[dept_115] = {str(end_year): depts_115[dept_115]}
+        
+        # 一次查出這個系在每個歷史年份對應的所有系名 (包含改名、合併、拆分)
+        # 年份由近到遠，e.g., 114, 113, 112
+        for history_data_year, old_names in lineage.ancestors(end_year, uni, dept_115).items():
+            
+            # 獲取歷史數據緩存
+            history_data = data_cache.get(f'result_{history_data_year}', {})
+            history_data_for_uni = history_data.get(uni, {})
+            
+            history_records_for_current_dept: List[department_record.YearRecord] = []
+            for old_name in old_names:
+                if old_name in history_data_for_uni:
+                    # 找到歷史數據，加入列表 (複本共用原本的科目與倍數)
+                    history_item = history_data_for_uni[old_name].with_name(old_name) # 記錄當時的系名
+                    history_records_for_current_dept.append(history_item)
+            
+            # 儲存歷史紀錄
+            if history_records_for_current_dept:
+                # 使用自定義函數作為 Key 進行排序
+                history_records_for_current_dept.sort(
+                    key=lambda x: get_department_sort_key(x["校系名稱"])
+                )
+                # 歷史紀錄可能有多筆 (例如：甲組和乙組的數據)
+                integrated_uni[dept_115][str(history_data_year)] = history_records_for_current_dept
+
+    return integrated_uni
+
+
+def iter_integrated_data(start_year: int, end_year: int, data_dir: str = DATA_DIR) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    整合多年度的校系數據，修復合併案例追溯不完整的錯誤，並使用緩存避免重複 IO。
+    逐校產生 (學校, 該校的整合結果)，可以直接交給 dump_object_stream 寫檔，
+    不必把整份結果留在記憶體中。
     
-    final_integrated_data: Dict = {}
+    :param start_year: 最早的年份 (e.g., 112)
+    :param end_year: 最新的年份 (e.g., 115)
+    :param data_dir: 放各年度資料夾的目錄
+    """
+    
+    # ----------------------------------------------------
+    # I. 數據緩存與初始化 (解決 IO 性能問題)
+    # ----------------------------------------------------
+    
+    data_cache, rename_maps, integrated_data = load_sources(start_year, end_year, data_dir)
+
+    # 由 DepartmentLineage 建成系譜圖，每個校系的祖先只追溯一次
+    lineage = DepartmentLineage(rename_maps, start_year)
     
     # ----------------------------------------------------
     # II. 核心數據追溯 (修正合併追溯問題)
     # ----------------------------------------------------
 
     for uni, depts_115 in integrated_data.items():
-        if uni not in final_integrated_data:
-            final_integrated_data[uni] = {}
-            
-        for dept_115 in depts_115.keys():
-            
-            # 初始化 115 年數據
-            final_integrated_data[uni][dept_115] = {str(end_year): depts_115[dept_115]}
-            
-            # current_dept_names 存儲的是目標年份 (target_year) 的系名列表
-            # 我們從 end_year (115) 的單個系名開始
-            current_dept_names: List[str] = [dept_115]
-            
-            # 迭代年份: 從 end_year (115) 開始追溯到 start_year (112)
-            # target_year 表示當前迭代目標是哪個年份的映射
-            for target_year in range(end_year, start_year, -1): # e.g., 115, 114, 113
-                
-                history_data_year = target_year - 1 # e.g., 114, 113, 112
-                
-                # 獲取逆向映射表: { 新名: [舊名列表] }
-                reverse_map_for_uni = reverse_maps.get(target_year, {}).get(uni, {})
-                
-                # 獲取歷史數據緩存
-                history_data = data_cache.get(f'result_{history_data_year}', {})
-                history_data_for_uni = history_data.get(uni, {})
-                
-                next_old_dept_names: List[str] = []
-                history_records_for_current_dept: List[Dict] = []
-                
-                # 追溯所有可能的 "當前系名" (current_dept_names) 在歷史數據年 (history_data_year) 的"舊系名"
-                for dept_name_at_target_year in current_dept_names:
-                    
-                    # 1. 檢查是否有明確的逆向映射 (例如：114甲組+乙組 -> 115學士班)
-                    if dept_name_at_target_year in reverse_map_for_uni:
-                        # 找到了多個舊系名 (例如：甲組和乙組)
-                        old_names = reverse_map_for_uni[dept_name_at_target_year]
-                    else:
-                        # 假設沒有改名或合併
-                        old_names = [dept_name_at_target_year] 
-                    
-                    
-                    # 2. 獲取這些舊系名在歷史年份的數據，並準備下一輪追溯
-                    for old_name in old_names:
-                        
-                        if old_name in history_data_for_uni:
-                            # 找到歷史數據，加入列表
-                            history_item = history_data_for_uni[old_name].copy()
-                            history_item["校系名稱"] = old_name # 記錄當時的系名
-                            history_records_for_current_dept.append(history_item)
-                            
-                        # 無論是否有數據，這個舊名都會成為下一輪追溯的目標
-                        next_old_dept_names.append(old_name)
-
-                
-                # 3. 儲存歷史紀錄到 final_integrated_data
-                if history_records_for_current_dept:
-                    # 使用自定義函數作為 Key 進行排序
-                    history_records_for_current_dept.sort(
-                        key=lambda x: get_department_sort_key(x["校系名稱"])
-                    )
-                    # 歷史紀錄可能有多筆 (例如：甲組和乙組的數據)
-                    final_integrated_data[uni][dept_115][str(history_data_year)] = history_records_for_current_dept
-                
-                # 4. 準備下一輪迭代 (將所有找到的舊系名作為下一輪要追溯的目標)
-                # 確保列表是唯一的
-                current_dept_names = list(set(next_old_dept_names)) 
-                
-                # 如果找不到任何舊系名，則停止追溯
-                if not current_dept_names:
-                    break
-
-    return final_integrated_data
+        yield uni, integrate_university(uni, depts_115, data_cache, lineage, end_year)
+
+
+def integrate_data(start_year: int, end_year: int, data_dir: str = DATA_DIR) -> Dict:
+    """
+    iter_integrated_data 的一次取完版本。
+    
+    :param start_year: 最早的年份 (e.g., 112)
+    :param end_year: 最新的年份 (e.g., 115)
+    :param data_dir: 放各年度資料夾的目錄
+    :return: 整合後的 JSON 結構 (歷年紀錄為 YearRecord，寫檔時用 department_record.to_json)
+    """
+    return dict(iter_integrated_data(start_year, end_year, data_dir))
+
+
+def iter_integrated_data_from_db(conn, start_year: int, end_year: int) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    iter_integrated_data 的資料庫版本 (資料庫由 build_database.py 匯入)：
+    每次只用索引查出一所學校各年的資料，不必把每年的 JSON 整份載入。
+    """
+    rename_maps = {year: admission_db.load_rename_map(conn, year) for year in range(start_year + 1, end_year + 1)}
+    lineage = DepartmentLineage(rename_maps, start_year)
+
+    for uni in admission_db.criteria_universities(conn, end_year):
+        depts_115 = admission_db.load_criteria(conn, end_year, uni).get(uni, {})
+        data_cache = {
+            f'result_{year}': department_record.from_year_data(admission_db.load_results(conn, year, uni))
+            for year in range(start_year, end_year)
+        }
+        yield uni, integrate_university(uni, depts_115, data_cache, lineage, end_year)
+
+
+# ----------------------------------------------------
+# 增量整合
+# ----------------------------------------------------
+
+def university_fingerprint(
+    uni: str,
+    start_year: int,
+    end_year: int,
+    data_cache: Dict[str, Dict],
+    rename_maps: Dict[int, Dict],
+    integrated_data: Dict[str, Any]
+) -> str:
+    """
+    一所學校在所有輸入檔案中的片段 (各年 result.json、dept_renamed.json 與最新一年的分則) 的 SHA-256。
+    片段內容或順序有任何改變，指紋就會不同。
+    """
+    digest = hashlib.sha256()
+    slices = [("current", integrated_data.get(uni))]
+    slices += [(f"result_{year}", data_cache.get(f'result_{year}', {}).get(uni)) for year in range(start_year, end_year)]
+    slices += [(f"renamed_{year}", rename_maps.get(year, {}).get(uni)) for year in range(start_year + 1, end_year + 1)]
+
+    for name, data in slices:
+        digest.update(name.encode('utf-8'))
+        digest.update(json.dumps(data, ensure_ascii=False, default=department_record.to_json).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def load_previous_university(shard_dir: str, uni: str, expected_hash: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    從上次的學校分片讀回一所學校的整合結果。
+    分片不存在、或內容雜湊與指紋檔記錄的不同 (例如之後關掉 WRITE_SHARDS 跑過) 時返回 None，要重新整合。
+    """
+    content = read_university_shard(shard_dir, uni) if expected_hash else None
+    if content is None or content_hash(content) != expected_hash:
+        return None
+    return json.loads(content)
+
+
+def iter_integrated_data_incremental(
+    start_year: int,
+    end_year: int,
+    shard_dir: str = SHARD_DIR,
+    fingerprint_file: str = FINGERPRINT_FILE
+) -> Iterator[Tuple[str, Dict[str, Any], str, bool]]:
+    """
+    增量版的 iter_integrated_data：只重新整合輸入有變動的學校，其餘學校沿用上次的輸出。
+    指紋存在 fingerprint_file；年份範圍或 INTEGRATOR_VERSION 不同時整個重建。
+    沿用的學校一次只從 shard_dir 讀回一所 (指紋檔記錄了每所學校分片的內容雜湊)，
+    不必把整份舊的輸出檔載入記憶體；ShardWriter 寫完才取代舊的分片資料夾，所以可以邊讀邊寫。
+
+    逐校產生 (學校, 該校的整合結果, 指紋, 是否重新整合)。
+    """
+    data_cache, rename_maps, integrated_data = load_sources(start_year, end_year)
+
+    previous = load_json_file(fingerprint_file)
+    if previous.get("header") != fingerprint_header(start_year, end_year):
+        previous = {}
+    previous_fingerprints: Dict[str, str] = previous.get("universities", {})
+    previous_outputs: Dict[str, str] = previous.get("outputs", {})
+
+    lineage = DepartmentLineage(rename_maps, start_year)
+
+    for uni, depts_115 in integrated_data.items():
+        fingerprint = university_fingerprint(uni, start_year, end_year, data_cache, rename_maps, integrated_data)
+
+        previous_uni = None
+        if previous_fingerprints.get(uni) == fingerprint:
+            previous_uni = load_previous_university(shard_dir, uni, previous_outputs.get(uni))
+
+        if previous_uni is not None:
+            yield uni, previous_uni, fingerprint, False
+        else:
+            yield uni, integrate_university(uni, depts_115, data_cache, lineage, end_year), fingerprint, True
+
+
+def fingerprint_header(start_year: int, end_year: int) -> Dict[str, int]:
+    """指紋檔的標頭，任何一項不同就代表舊指紋不能沿用。"""
+    return {"version": INTEGRATOR_VERSION, "start_year": start_year, "end_year": end_year}
+
+
+def integrate_data_incremental(
+    start_year: int,
+    end_year: int,
+    shard_dir: str = SHARD_DIR,
+    fingerprint_file: str = FINGERPRINT_FILE
+):
+    """
+    iter_integrated_data_incremental 的一次取完版本。
+
+    :return: (整合後的 JSON 結構, 新的指紋檔內容, 重新整合的學校列表)
+    """
+    final_integrated_data: Dict = {}
+    fingerprints: Dict[str, str] = {}
+    outputs: Dict[str, str] = {}
+    rebuilt: List[str] = []
+
+    for uni, integrated_uni, fingerprint, was_rebuilt in iter_integrated_data_incremental(start_year, end_year, shard_dir, fingerprint_file):
+        final_integrated_data[uni] = integrated_uni
+        fingerprints[uni] = fingerprint
+        outputs[uni] = content_hash(university_shard_content(integrated_uni))
+        if was_rebuilt:
+            rebuilt.append(uni)
+
+    return final_integrated_data, fingerprint_content(start_year, end_year, fingerprints, outputs), rebuilt
+
+
+def fingerprint_content(start_year: int, end_year: int, fingerprints: Dict[str, str], outputs: Dict[str, str]) -> Dict[str, Any]:
+    """指紋檔的內容：各校的輸入指紋，與該校分片的內容雜湊 (下次沿用時核對分片)。"""
+    return {"header": fingerprint_header(start_year, end_year), "universities": fingerprints, "outputs": outputs}
+
+
+def main(start_year: int = TARGET_START_YEAR, end_year: int = CURRENT_YEAR) -> None:
+    """整合 start_year ~ end_year 的數據，寫出 historical_result.json、分片與搜尋索引。"""
+    with instrumentation.run("data_integrator") as report:
+        fingerprints: Dict[str, str] = {}
+        # 各校分片的內容雜湊，下次增量整合時核對後沿用
+        outputs: Dict[str, str] = {}
+        rebuilt: List[str] = []
+        departments_by_uni: Dict[str, List[str]] = {}
+        shard_writer = ShardWriter(SHARD_DIR, load_json_file(REGION_FILE)) if WRITE_SHARDS else None
+
+        def integrated_universities():
+            """逐校產生整合結果，增量模式下順便記錄指紋與重新整合的學校。"""
+            if not INCREMENTAL:
+                yield from iter_integrated_data(start_year, end_year)
+                return
+            for uni, integrated_uni, fingerprint, was_rebuilt in iter_integrated_data_incremental(start_year, end_year):
+                fingerprints[uni] = fingerprint
+                if was_rebuilt:
+                    rebuilt.append(uni)
+                yield uni, integrated_uni
+
+        def stream_universities():
+            """寫入完整輸出的同時，把同一所學校寫進分片，並記下校系名稱給搜尋索引。"""
+            for uni, integrated_uni in integrated_universities():
+                departments_by_uni[uni] = list(integrated_uni.keys())
+                if shard_writer:
+                    with instrumentation.stage("寫入分片", track_memory=False):
+                        shard_writer.add(uni, integrated_uni)
+                    outputs[uni] = shard_writer.index["universities"][uni]["hash"]
+                yield uni, integrated_uni
+
+        # 寫入最終結果：每整合完一所學校就寫出，先寫暫存檔，完成後才取代舊檔
+        # 確保 datas 資料夾存在，否則會報錯
+        os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True) 
+        tmp_output_file = OUTPUT_FILE + '.tmp'
+        # 整合與寫檔交錯進行：這個階段扣掉其中的「整合學校」、「寫入分片」等就是序列化與寫檔的時間
+        with instrumentation.stage("整合並寫入", unit="所學校") as stage, open(tmp_output_file, 'w', encoding='utf-8') as f:
+            university_count = dump_object_stream(stream_universities(), f, indent=4, default=department_record.to_json)
+            stage.add(university_count)
+        os.replace(tmp_output_file, OUTPUT_FILE)
+
+        shards = None
+        if shard_writer:
+            with instrumentation.stage("寫入分片索引"):
+                shard_index = shard_writer.close()
+            shards = {uni: entry["shard"] for uni, entry in shard_index["universities"].items()}
+            print(f"🧩 已輸出 {len(shard_index['universities'])} 個學校分片、{len(shard_index['regions'])} 個區域分片至 {SHARD_DIR}")
+
+        with instrumentation.stage("建立搜尋索引"):
+            search_index = build_search_index(departments_by_uni, shards)
+        with instrumentation.stage("寫入搜尋索引"), open(SEARCH_INDEX_FILE + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(search_index, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(SEARCH_INDEX_FILE + '.tmp', SEARCH_INDEX_FILE)
+        print(f"🔍 已輸出搜尋索引 ({len(search_index['records'])} 個校系) 至 {SEARCH_INDEX_FILE}")
+
+        # 輸出寫完才更新指紋，中途失敗時下次會重新整合
+        if INCREMENTAL:
+            print(f"增量整合：{university_count} 所學校中重新整合了 {len(rebuilt)} 所。")
+            report.info["rebuilt"] = len(rebuilt)
+            with open(FINGERPRINT_FILE, 'w', encoding='utf-8') as f:
+                json.dump(fingerprint_content(start_year, end_year, fingerprints, outputs), f, ensure_ascii=False, indent=4)
+    
+        report.info.update(start_year=start_year, end_year=end_year, incremental=INCREMENTAL, universities=university_count)
+        print(f"\n✅ 數據整合完成！結果已儲存至 {OUTPUT_FILE}")
 
 
 # =======================================================
 # 執行程式碼 (保持不變)
 # =======================================================
 if __name__ == "__main__":
-    
-    # 💡 確保您在此處取消註釋並運行了模擬數據，特別是 114年/113年 的映射，以測試追溯邏輯。
-    
-    final_result = integrate_data(TARGET_START_YEAR, CURRENT_YEAR)
-
-    # 寫入最終結果
-    # 確保 datas 資料夾存在，否則會報錯
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True) 
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(final_result, f, ensure_ascii=False, indent=4)
-    
-    print(f"\n✅ 數據整合完成！結果已儲存至 {OUTPUT_FILE}")
\ No newline at end of file
+    profiling.run_main("data_integrator", main)
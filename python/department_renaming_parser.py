@@ -1,6 +1,7 @@
 import csv
 import json
 from typing import Dict, List, Any
+from tools import instrumentation, profiling
 
 # 檔案名稱
 YEAR = 115
@@ -18,7 +19,8 @@ def process_department_renaming(csv_filepath: str, json_filepath: str) -> None:
     mapping: Dict[str, Dict[str, List[str]]] = {}
     
     try:
-        with open(csv_filepath, mode='r', encoding='utf-8', newline='') as file:
+        with open(csv_filepath, mode='r', encoding='utf-8', newline='') as file, \
+                instrumentation.stage("解析 CSV", unit="列") as stage:
             reader = csv.reader(file)
             
             current_uni: str = ""
@@ -26,6 +28,7 @@ def process_department_renaming(csv_filepath: str, json_filepath: str) -> None:
             current_old_dept: str = "" # 新增變數用於追蹤舊系名
             
             for row in reader:
+                stage.add()
                 if len(row) < 4:
                     continue
                 
@@ -154,7 +157,7 @@ def process_department_renaming(csv_filepath: str, json_filepath: str) -> None:
 
     # 將結果寫入 JSON 檔案
     try:
-        with open(json_filepath, 'w', encoding='utf-8') as f:
+        with instrumentation.stage("寫入 JSON"), open(json_filepath, 'w', encoding='utf-8') as f:
             json.dump(mapping, f, ensure_ascii=False, indent=4)
         print(f"✅ 成功將改名數據轉換並儲存到 {json_filepath}")
     except Exception as e:
@@ -166,4 +169,5 @@ def process_department_renaming(csv_filepath: str, json_filepath: str) -> None:
 # =======================================================
 if __name__ == "__main__":
     # 執行處理
-    process_department_renaming(INPUT_CSV_FILE, OUTPUT_JSON_FILE)
\ No newline at end of file
+    with instrumentation.run(f"department_renaming_parser_{YEAR}"):
+        profiling.run_main("department_renaming_parser", process_department_renaming, INPUT_CSV_FILE, OUTPUT_JSON_FILE)
\ No newline at end of file
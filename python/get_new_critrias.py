@@ -1,11 +1,47 @@
-from tools.get_data_eid import extract_department_eids
-from tools.get_all_details import get_department_html_responses
+from tools.get_data_eid import iter_department_eids
+from tools.get_all_details import get_department_html_responses, get_department_html_responses_async
+from tools.response_cache import ResponseCache, DEFAULT_CACHE_PATH
+from tools import instrumentation, profiling
 import json
 
 YEAR = 115
+# True 使用 asyncio 並行爬取 (共用每秒請求預算)，False 使用逐一請求的同步版本
+USE_ASYNC_CRAWLER = True
 
-result = get_department_html_responses(extract_department_eids(f"datas/{YEAR}/AST_school.html"))
+# --- 回應快取設定 ---
+CACHE_PATH = DEFAULT_CACHE_PATH
+# 快取有效秒數，None 代表永不過期 (校系分則公告後幾乎不會再變)
+CACHE_TTL_SECONDS = None
+# True 時只用快取重新解析，完全不連線 (例如修正 extract_table_data 之後)
+OFFLINE = False
 
-with open(f"datas/{YEAR}/all_department_criteria.json", 'w', encoding='utf-8') as f:
-    json.dump(result, f, ensure_ascii=False, indent=4)
-    print(f"✅ 成功提取數據並儲存")
\ No newline at end of file
+# 每個校系處理完就寫入的 JSONL 檢查點，中斷後重跑只會處理缺少或失敗的 EID。
+# 想整個重爬就刪掉這個檔案 (或設為 None 不使用檢查點)；{year} 會換成年度
+# OFFLINE 時不略過已完成的 EID：快取中的頁面全部重新解析，並更新檢查點中的結果
+CHECKPOINT_PATH = "datas/{year}/crawl_checkpoint.jsonl"
+
+
+def main(year: int = YEAR) -> None:
+    checkpoint_path = CHECKPOINT_PATH.format(year=year) if CHECKPOINT_PATH else None
+
+    with instrumentation.run(f"get_new_critrias_{year}") as report:
+        # 邊讀搜尋頁邊產生 (學校, 科系, EID)，爬蟲拿到第一筆就開始請求
+        eids_data = iter_department_eids(f"datas/{year}/AST_school.html")
+
+        with ResponseCache(year, CACHE_PATH, ttl_seconds=CACHE_TTL_SECONDS, offline=OFFLINE) as cache:
+            # 「爬取」包含讀搜尋頁、網路請求、解析與寫檢查點，其中網路請求與解析頁面另外列出
+            with instrumentation.stage("爬取", unit="個校系") as stage:
+                if USE_ASYNC_CRAWLER:
+                    result = get_department_html_responses_async(eids_data, cache=cache, checkpoint_path=checkpoint_path)
+                else:
+                    result = get_department_html_responses(eids_data, cache=cache, checkpoint_path=checkpoint_path)
+                stage.add(sum(len(depts) for depts in result.values()))
+        report.info.update(year=year, async_crawler=USE_ASYNC_CRAWLER, offline=OFFLINE)
+
+        with instrumentation.stage("寫入 JSON"):
+            with open(f"datas/{year}/all_department_criteria.json", 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=4)
+                print(f"✅ 成功提取數據並儲存")
+
+if __name__ == "__main__":
+    profiling.run_main("get_new_critrias", main)
@@ -1,19 +1,106 @@
 from tools.college_data_transform import convert_division_exam_data
 from tools.score_distribution_csv_2_json import convert_score_distribution
 from tools.match_groups import match_them
+from tools.score_table import ScoreTable, score_table_path
+from tools import department_record, instrumentation, profiling
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
 import json
+import os
+import time
 
 YEAR = 114
 
-def main():
-    dept_cri = convert_division_exam_data(f"datas/{YEAR}/dept_criteria.csv")
+# --- 多年度模式 ---
+# True 時用多個行程同時重建 YEARS 中每一年的 result.json (例如修正解析程式之後回頭重跑所有年度)
+MULTI_YEAR = False
+YEARS = [112, 113, 114]
+MAX_WORKERS = os.cpu_count() or 1
+# 多年度模式下每年的輸出各自寫進 datas/{年度}/ 下的這個檔案，不會混在一起
+LOG_FILE_NAME = "get_single_year_results.log"
 
-    sub_comb = convert_score_distribution(f"datas/{YEAR}/subjects_combinations.csv")
+def summarize(year, result):
+    """匹配結果的統計：校系數、匹配到組別的數量、沒匹配到的數量、算出達標比例的數量。"""
+    departments = [dept_data for depts in result.values() for dept_data in depts.values()]
+    matched = sum(1 for dept_data in departments if dept_data.get("組別代號"))
+    return {
+        "year": year,
+        "departments": len(departments),
+        "matched": matched,
+        "unmatched": len(departments) - matched,
+        "percentiles": sum(1 for dept_data in departments if dept_data.get("達標比例") is not None),
+    }
 
-    result = match_them(dept_cri, sub_comb)
+def main(year: int = YEAR):
+    # 多年度模式下每個子行程各自寫一份報告
+    with instrumentation.run(f"get_single_year_results_{year}") as report:
+        with instrumentation.stage("讀取錄取分數", unit="個校系") as stage:
+            dept_cri = convert_division_exam_data(f"datas/{year}/dept_criteria.csv")
+            stage.add(sum(len(depts) for depts in dept_cri.values()) if dept_cri else 0)
 
-    with open(f"datas/{YEAR}/result.json", 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=4)
+        with instrumentation.stage("讀取分數分布", unit="個組別") as stage:
+            sub_comb = convert_score_distribution(f"datas/{year}/subjects_combinations.csv")
+            stage.add(len(sub_comb) if sub_comb else 0)
+
+        # 轉換失敗時上面只會印出錯誤，這裡停下來，不要把空的結果寫進 result.json
+        if not dept_cri or not sub_comb:
+            raise ValueError(f"{year} 年的 dept_criteria.csv 或 subjects_combinations.csv 轉換失敗")
+
+        # 存成可以直接記憶體映射的分數分布表，其他工具不必再解析 CSV
+        with instrumentation.stage("建立分數分布表"):
+            score_table = ScoreTable.from_distribution(sub_comb)
+            score_table.save(score_table_path(year))
+
+        with instrumentation.stage("匹配組別", unit="個校系") as stage:
+            result = match_them(dept_cri, score_table)
+            stage.add(sum(len(depts) for depts in result.values()))
+
+        with instrumentation.stage("寫入 result.json"):
+            with open(f"datas/{year}/result.json", 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=4, default=department_record.to_json)
+
+        summary = summarize(year, result)
+        report.info.update(summary)
+        return summary
+
+def build_year_logged(year):
+    """在子行程中建立一年的 result.json，所有輸出寫進該年度的記錄檔，返回統計 (失敗時附上錯誤訊息)。"""
+    log_path = os.path.join("datas", str(year), LOG_FILE_NAME)
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        try:
+            summary = main(year)
+        except Exception as e:
+            print(f"❌ 失敗：{type(e).__name__}: {e}")
+            summary = {"year": year, "error": f"{type(e).__name__}: {e}"}
+    summary["seconds"] = round(time.perf_counter() - start, 2)
+    summary["log"] = log_path
+    return summary
+
+def main_multi_year(years=YEARS, max_workers=MAX_WORKERS):
+    """同時建立多個年度的 result.json，最後印出合併的統計。"""
+    if not years:
+        print("⚠️ 沒有指定任何年度 (YEARS 是空的)")
+        return []
+    if profiling.enabled():
+        # cProfile 量不到子行程，剖析時在主行程中逐年執行
+        summaries = [build_year_logged(year) for year in years]
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(years))) as executor:
+            summaries = list(executor.map(build_year_logged, years))
+
+    print(f"\n--- {len(years)} 個年度的匹配結果摘要 ---")
+    for summary in summaries:
+        if "error" in summary:
+            print(f"❌ {summary['year']} 年：{summary['error']} (詳見 {summary['log']})")
+            continue
+        print(f"✅ {summary['year']} 年：{summary['departments']} 個校系，已匹配 {summary['matched']}，"
+              f"未匹配 {summary['unmatched']}，算出達標比例 {summary['percentiles']} ({summary['seconds']} 秒)")
+
+    succeeded = [summary for summary in summaries if "error" not in summary]
+    print(f"合計：{sum(s['departments'] for s in succeeded)} 個校系，"
+          f"已匹配 {sum(s['matched'] for s in succeeded)}，未匹配 {sum(s['unmatched'] for s in succeeded)}")
+    return summaries
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    profiling.run_main("get_single_year_results", main_multi_year if MULTI_YEAR else main)
@@ -0,0 +1,126 @@
+"""
+query_server.py 的本機壓力測試。
+
+先在另一個終端機啟動 query_server.py，再執行這支程式：
+CONCURRENCY 個連線同時送出共 TOTAL_REQUESTS 個請求，
+混合 /university、/search、/eligible 三種查詢 (查詢內容取自 historical_result.json，會重複以模擬熱門查詢)，
+最後印出吞吐量、延遲百分位數、錯誤數與伺服器的快取命中率。
+"""
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import quote, urlencode
+
+import aiohttp
+
+from query_server import HISTORICAL_FILE, HOST, PORT
+
+# --- 設定常數 ---
+BASE_URL = f'http://{HOST}:{PORT}'
+CONCURRENCY = 50
+TOTAL_REQUESTS = 5000
+# 各端點的請求比例
+ENDPOINT_WEIGHTS = {"university": 0.4, "search": 0.4, "eligible": 0.2}
+# 不同查詢的數量，越少快取命中率越高
+DISTINCT_QUERIES = 200
+SEED = 0
+
+SAMPLE_SUBJECT_SETS = [
+    ["國文", "英文", "數甲", "物理", "化學"],
+    ["國文", "英文", "數乙", "歷史", "地理", "公民"],
+    ["國文", "英文", "數甲", "化學", "生物"],
+    ["英文", "數A", "數甲", "物理"],
+]
+
+
+def build_urls(historical_data: Dict, total: int, rng: random.Random) -> List[Tuple[str, str]]:
+    """返回 [(端點, 網址)]。"""
+    universities = list(historical_data)
+    departments = [dept for depts in historical_data.values() for dept in depts]
+
+    pools: Dict[str, List[str]] = {"university": [], "search": [], "eligible": []}
+    for _ in range(DISTINCT_QUERIES):
+        pools["university"].append(f"/university/{quote(rng.choice(universities))}")
+
+        # 校名或系名的片段，偶爾加上別名
+        keyword = rng.choice(departments)[:rng.randint(2, 4)]
+        if rng.random() < 0.3:
+            keyword = rng.choice(["台大", "成大", "清大", "交大", "頂大", "中字"]) + " " + keyword
+        pools["search"].append("/search?" + urlencode({"q": keyword}))
+
+        subjects = rng.choice(SAMPLE_SUBJECT_SETS)
+        scores = ",".join(f"{subject}:{rng.randint(30, 60)}" for subject in subjects)
+        pools["eligible"].append("/eligible?" + urlencode({"scores": scores}))
+
+    endpoints = list(ENDPOINT_WEIGHTS)
+    weights = [ENDPOINT_WEIGHTS[endpoint] for endpoint in endpoints]
+    urls = []
+    for endpoint in rng.choices(endpoints, weights=weights, k=total):
+        urls.append((endpoint, rng.choice(pools[endpoint])))
+    return urls
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def run_load_test(urls: List[Tuple[str, str]], concurrency: int = CONCURRENCY) -> Dict[str, List[float]]:
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in urls:
+        queue.put_nowait(item)
+
+    latencies: Dict[str, List[float]] = {endpoint: [] for endpoint in ENDPOINT_WEIGHTS}
+    errors: List[str] = []
+
+    async def worker(session: aiohttp.ClientSession) -> None:
+        while not queue.empty():
+            endpoint, url = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                async with session.get(BASE_URL + url) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors.append(f"{response.status} {url}")
+                        continue
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # 逾時也算錯誤，不要讓一個很慢的回應中斷整個壓力測試
+                errors.append(f"{type(e).__name__} {url}")
+                continue
+            latencies[endpoint].append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        async with session.get(BASE_URL + "/stats") as response:
+            server_stats = await response.json()
+
+    completed = sum(len(values) for values in latencies.values())
+    print(f"\n--- 壓力測試結果 ({concurrency} 個同時連線) ---")
+    print(f"完成 {completed} 個請求，錯誤 {len(errors)} 個，耗時 {elapsed:.2f} 秒，{completed / elapsed:.0f} 請求/秒")
+    for endpoint, values in latencies.items():
+        if values:
+            print(f"{endpoint:<10} {len(values):>6} 個：p50 {percentile(values, 0.5) * 1000:.1f} ms，"
+                  f"p95 {percentile(values, 0.95) * 1000:.1f} ms，p99 {percentile(values, 0.99) * 1000:.1f} ms，"
+                  f"平均 {statistics.mean(values) * 1000:.1f} ms")
+    for error in errors[:10]:
+        print(f"❌ {error}")
+    cache = server_stats["cache"]
+    print(f"伺服器快取：命中率 {cache['hit_rate']:.1%}，{cache['entries']} 筆，{cache['bytes'] / 1024:.0f} KiB，淘汰 {cache['evictions']} 次")
+
+    return latencies
+
+
+# =======================================================
+# 執行腳本
+# =======================================================
+if __name__ == "__main__":
+    with open(HISTORICAL_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    asyncio.run(run_load_test(build_urls(data, TOTAL_REQUESTS, random.Random(SEED))))
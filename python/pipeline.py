@@ -0,0 +1,334 @@
+"""
+整個年度更新流程的 DAG 執行器 (取代 annual_work.txt 裡一支一支改 YEAR 再手動執行的步驟)。
+
+每個階段宣告輸入與輸出檔案，某個階段的輸入是另一個階段的輸出時就形成依賴：
+
+    各年 result.json (get_single_year_results) ─┐
+    各年 dept_renamed.json (department_renaming) ─┼─> 整合 (data_integrator) ─> 發布 (publish_data)
+    最新一年的 all_department_criteria.json ──────┘
+
+與 make 類似，但用內容雜湊判斷：輸入與輸出的 SHA-256 都和上次成功執行時相同就略過。
+還沒有紀錄的階段 (例如剛 clone 下來，clone 的修改時間不可靠) 視為最新，以目前檔案的雜湊當作紀錄，
+之後輸入改變才會執行。
+需要連線的階段 (向考分會爬校系分則) 只有 ALLOW_NETWORK = True 時才會執行，否則沿用現有的輸出。
+互相獨立的階段 (例如各年的 result.json) 以多個行程平行執行。
+
+只會比較宣告的資料檔，程式碼改了要重跑請設 FORCE = True。
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from data_integrator import CURRENT_YEAR, TARGET_START_YEAR, OUTPUT_FILE, SHARD_DIR, SEARCH_INDEX_FILE, REGION_FILE, WRITE_SHARDS
+
+# --- 設定常數 ---
+DATA_DIR = 'datas'
+# 每個階段上次成功時的輸入、輸出雜湊
+STATE_FILE = 'datas/.pipeline_state.json'
+# 同時執行的階段數
+MAX_WORKERS = os.cpu_count() or 1
+# True 時不管雜湊，全部重跑
+FORCE = False
+# True 時只印出會執行哪些階段
+DRY_RUN = False
+# True 時才會執行需要連線的階段 (criteria_*：重爬最新一年的校系分則，約 16 分鐘)
+ALLOW_NETWORK = False
+# 只跑這些階段 (以及它們依賴的階段)，None 代表全部
+TARGETS: Optional[List[str]] = None
+
+
+def hash_path(path: str) -> Optional[str]:
+    """檔案內容的 SHA-256；資料夾則是所有檔案 (相對路徑 + 內容) 的雜湊；不存在時返回 None。"""
+    if os.path.isfile(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    if os.path.isdir(path):
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+                digest.update(hash_path(file_path).encode('ascii'))
+        return digest.hexdigest()
+
+    return None
+
+
+# ----------------------------------------------------
+# 各階段實際執行的函數 (在子行程中執行，所以都放在模組最上層)
+# ----------------------------------------------------
+
+def run_year_results(year: int) -> None:
+    from get_single_year_results import main
+    main(year)
+
+
+def run_department_renaming(year: int) -> None:
+    from department_renaming_parser import process_department_renaming
+    process_department_renaming(f'{DATA_DIR}/{year}/dept_renamed.csv', f'{DATA_DIR}/{year}/dept_renamed.json')
+
+
+def run_criteria(year: int) -> None:
+    from get_new_critrias import main
+    main(year)
+
+
+def run_integration(start_year: int, end_year: int) -> None:
+    from data_integrator import main
+    main(start_year, end_year)
+
+
+def run_publish() -> None:
+    from publish_data import publish
+    publish()
+
+
+class Stage:
+
+    def __init__(self, name: str, func: Callable[..., None], args: Sequence[Any], inputs: Sequence[str], outputs: Sequence[str],
+                 network: bool = False):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        # 是否需要連線 (ALLOW_NETWORK = False 時不執行)
+        self.network = network
+
+
+def build_stages(start_year: int = TARGET_START_YEAR, end_year: int = CURRENT_YEAR, data_dir: str = DATA_DIR) -> List[Stage]:
+    """年度流程的所有階段。"""
+    stages: List[Stage] = []
+
+    for year in range(start_year, end_year):
+        year_dir = os.path.join(data_dir, str(year))
+        stages.append(Stage(
+            f"result_{year}", run_year_results, [year],
+            inputs=[f"{year_dir}/dept_criteria.csv", f"{year_dir}/subjects_combinations.csv"],
+            outputs=[f"{year_dir}/result.json", f"{year_dir}/score_table.npy", f"{year_dir}/score_table.json"],
+        ))
+
+    for year in range(start_year + 1, end_year + 1):
+        year_dir = os.path.join(data_dir, str(year))
+        stages.append(Stage(
+            f"renaming_{year}", run_department_renaming, [year],
+            inputs=[f"{year_dir}/dept_renamed.csv"],
+            outputs=[f"{year_dir}/dept_renamed.json"],
+        ))
+
+    current_dir = os.path.join(data_dir, str(end_year))
+    stages.append(Stage(
+        f"criteria_{end_year}", run_criteria, [end_year],
+        inputs=[f"{current_dir}/AST_school.html"],
+        outputs=[f"{current_dir}/all_department_criteria.json"],
+        network=True,
+    ))
+
+    # 整合時缺少的檔案視為沒有資料，所以只把存在或會被產生的檔案當作輸入
+    produced = {output for stage in stages for output in stage.outputs}
+    integration_inputs = [f"{data_dir}/{year}/result.json" for year in range(start_year, end_year)]
+    integration_inputs += [f"{data_dir}/{year}/dept_renamed.json" for year in range(start_year + 1, end_year + 1)]
+    integration_inputs += [f"{current_dir}/all_department_criteria.json", REGION_FILE]
+    integration_outputs = [OUTPUT_FILE, SEARCH_INDEX_FILE] + ([SHARD_DIR] if WRITE_SHARDS else [])
+    stages.append(Stage(
+        "integrate", run_integration, [start_year, end_year],
+        inputs=[path for path in integration_inputs if path in produced or os.path.exists(path)],
+        outputs=integration_outputs,
+    ))
+
+    from publish_data import PUBLISH_FILES, PUBLISH_DIR
+    stages.append(Stage(
+        "publish", run_publish, [],
+        inputs=[os.path.join(data_dir, file_name) for file_name in PUBLISH_FILES],
+        outputs=[PUBLISH_DIR],
+    ))
+
+    return stages
+
+
+class Pipeline:
+
+    def __init__(self, stages: Sequence[Stage], state_file: str = STATE_FILE):
+        self.stages: Dict[str, Stage] = {stage.name: stage for stage in stages}
+        self.state_file = state_file
+
+        producers: Dict[str, str] = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in producers:
+                    raise ValueError(f"{output} 同時是 {producers[output]} 與 {stage.name} 的輸出")
+                producers[output] = stage.name
+
+        # { 階段: 它依賴的階段 }
+        self.dependencies: Dict[str, List[str]] = {
+            stage.name: sorted({producers[path] for path in stage.inputs if path in producers})
+            for stage in stages
+        }
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1: 走訪中, 2: 完成
+
+        def visit(name: str) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"階段之間有循環依賴：{name}")
+            state[name] = 1
+            for dependency in self.dependencies[name]:
+                visit(dependency)
+            state[name] = 2
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def _with_dependencies(self, targets: Sequence[str]) -> List[str]:
+        selected = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.stages:
+                raise KeyError(f"沒有這個階段：{name}")
+            if name not in selected:
+                selected.add(name)
+                stack.extend(self.dependencies[name])
+        return [name for name in self.order if name in selected]
+
+    def _load_state(self) -> Dict[str, Any]:
+        if not os.path.exists(self.state_file):
+            return {}
+        with open(self.state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        with open(self.state_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=4)
+        os.replace(self.state_file + '.tmp', self.state_file)
+
+    def _snapshot(self, stage: Stage) -> Dict[str, Dict[str, Optional[str]]]:
+        return {
+            "inputs": {path: hash_path(path) for path in stage.inputs},
+            "outputs": {path: hash_path(path) for path in stage.outputs},
+        }
+
+    def check(self, stage: Stage, record: Optional[Dict[str, Any]]) -> Tuple[str, str]:
+        """
+        返回 (動作, 原因)，動作為 "run"、"skip" (已是最新) 或 "missing" (缺少輸入、也沒有階段會產生)。
+        依賴的階段要先執行完才能檢查，輸入的雜湊才是最新的。
+        是否允許連線由 run() 決定，這裡不管。
+        """
+        missing = [path for path in stage.inputs if not os.path.exists(path)]
+        if missing:
+            return "missing", "缺少輸入 " + ", ".join(missing)
+        if any(not os.path.exists(path) for path in stage.outputs):
+            return "run", "輸出不存在"
+        if FORCE:
+            return "run", "FORCE"
+
+        if record is None:
+            # 沒有紀錄時以目前的檔案為準 (run() 會把目前的雜湊記下來)，不比較修改時間：
+            # git clone 出來的檔案修改時間是 checkout 的順序，不代表誰比較新
+            return "skip", "沒有紀錄，以目前的輸出為準"
+
+        snapshot = self._snapshot(stage)
+        changed = [path for path, digest in snapshot["inputs"].items() if record["inputs"].get(path) != digest]
+        if changed:
+            return "run", "輸入改變 " + ", ".join(changed)
+        if snapshot["outputs"] != record["outputs"]:
+            return "run", "輸出被修改"
+        return "skip", "輸入未改變"
+
+    def run(self, targets: Optional[Sequence[str]] = None, max_workers: int = MAX_WORKERS, dry_run: bool = DRY_RUN,
+            allow_network: bool = ALLOW_NETWORK) -> bool:
+        """依照 DAG 執行需要的階段，返回是否全部成功。不允許連線時需要連線的階段沿用現有的輸出。"""
+        names = self._with_dependencies(targets) if targets else list(self.order)
+        state = self._load_state()
+        waiting = {name: set(self.dependencies[name]) & set(names) for name in names}
+        failed: List[str] = []
+        running: Dict[Any, str] = {}
+
+        def finish(name: str) -> None:
+            for other in waiting.values():
+                other.discard(name)
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            while waiting or running:
+                # 送出所有依賴都已完成的階段
+                for name in [name for name, deps in waiting.items() if not deps]:
+                    del waiting[name]
+                    stage = self.stages[name]
+                    action, reason = self.check(stage, state.get(name))
+                    if action == "run" and stage.network and not allow_network:
+                        action = "offline"
+
+                    if action == "run" and not dry_run:
+                        print(f"▶️  {name}：{reason}")
+                        running[executor.submit(stage.func, *stage.args)] = name
+                        continue
+
+                    if action == "run":
+                        print(f"📝 {name}：會執行 ({reason})")
+                    elif action == "offline":
+                        print(f"🌐 {name}：需要連線，沿用現有的輸出 ({reason}；要重爬請設 ALLOW_NETWORK = True)")
+                    elif action == "skip":
+                        print(f"⏭️  {name}：略過 ({reason})")
+                        if name not in state:
+                            state[name] = self._snapshot(stage)
+                    else:
+                        print(f"⚠️  {name}：略過 ({reason})")
+                    finish(name)
+
+                if not running:
+                    if waiting and all(waiting.values()):
+                        # 剩下的階段都在等失敗的階段
+                        for name in waiting:
+                            print(f"⛔ {name}：依賴的階段失敗，不執行")
+                        break
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    stage = self.stages[name]
+                    error = future.exception()
+                    missing = [path for path in stage.outputs if not os.path.exists(path)]
+                    if error is None and missing:
+                        error = FileNotFoundError("沒有產生 " + ", ".join(missing))
+
+                    if error is not None:
+                        print(f"❌ {name} 失敗：{error}")
+                        failed.append(name)
+                        state.pop(name, None)
+                        continue
+
+                    print(f"✅ {name} 完成")
+                    state[name] = self._snapshot(stage)
+                    finish(name)
+
+                if not dry_run:
+                    self._save_state(state)
+
+        if not dry_run:
+            self._save_state(state)
+        return not failed
+
+
+# =======================================================
+# 執行腳本
+# =======================================================
+if __name__ == "__main__":
+    pipeline = Pipeline(build_stages())
+    if pipeline.run(TARGETS):
+        print("\n✅ 流程完成！")
+    else:
+        print("\n❌ 有階段失敗，修正後重新執行只會從失敗的地方繼續。")
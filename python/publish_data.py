@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Dict
+
+from tools.compact_json import encode, decode, dumps_minified, COMPACT_FORMAT
+from tools import profiling
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# --- 設定常數 ---
+DATA_DIR = 'datas'
+PUBLISH_DIR = 'datas/publish'
+MANIFEST_FILE = 'datas/publish/manifest.json'
+# 前端會載入的資料檔 (相對於 DATA_DIR)
+PUBLISH_FILES = ['historical_result.json', 'schools_by_region.json']
+
+
+def _describe(path: str, content: bytes) -> Dict[str, Any]:
+    return {
+        "file": os.path.basename(path),
+        "bytes": len(content),
+        "sha256": hashlib.sha256(content).hexdigest(),
+    }
+
+
+def _write_bytes(path: str, content: bytes) -> None:
+    # 先寫暫存檔再取代，前端不會讀到寫到一半的檔案
+    with open(path + '.tmp', 'wb') as f:
+        f.write(content)
+    os.replace(path + '.tmp', path)
+
+
+def publish_file(source_path: str, publish_dir: str = PUBLISH_DIR) -> Dict[str, Any]:
+    """
+    把一個前端資料檔輸出成鍵字典編碼的最小化 JSON (xxx.min.json)，
+    並產生 .gz 與 .br (需要安裝 brotli) 預先壓縮的版本。返回這個檔案在 manifest 中的項目。
+    """
+    with open(source_path, 'rb') as f:
+        source = f.read()
+    data = json.loads(source)
+
+    compact = encode(data)
+    content = dumps_minified(compact).encode('utf-8')
+    # 發布前確認可以還原成原始資料
+    if decode(json.loads(content)) != data:
+        raise ValueError(f"{source_path} 編碼後無法還原，停止發布")
+
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    compact_path = os.path.join(publish_dir, f"{name}.min.json")
+    _write_bytes(compact_path, content)
+
+    entry = _describe(compact_path, content)
+    entry["source_bytes"] = len(source)
+    entry["source_sha256"] = hashlib.sha256(source).hexdigest()
+
+    # mtime=0 讓相同內容每次壓出相同的檔案，git 不會出現多餘的變更
+    gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+    _write_bytes(compact_path + '.gz', gzipped)
+    entry["gzip"] = _describe(compact_path + '.gz', gzipped)
+
+    if brotli is not None:
+        brotlied = brotli.compress(content, quality=11)
+        _write_bytes(compact_path + '.br', brotlied)
+        entry["brotli"] = _describe(compact_path + '.br', brotlied)
+    elif os.path.exists(compact_path + '.br'):
+        # 舊的 .br 已經和新內容不符
+        os.remove(compact_path + '.br')
+
+    return entry
+
+
+def publish(data_dir: str = DATA_DIR, publish_dir: str = PUBLISH_DIR, manifest_file: str = MANIFEST_FILE) -> Dict[str, Any]:
+    """發布 PUBLISH_FILES 中的所有檔案並寫出 manifest。"""
+    os.makedirs(publish_dir, exist_ok=True)
+    if brotli is None:
+        print("⚠️ 警告：沒有安裝 brotli，這次只發布 .gz，manifest 中不會有 brotli 項目 (要 .br 請 pip install brotli)。")
+
+    manifest: Dict[str, Any] = {"format": COMPACT_FORMAT, "files": {}}
+    for file_name in PUBLISH_FILES:
+        entry = publish_file(os.path.join(data_dir, file_name), publish_dir)
+        manifest["files"][file_name] = entry
+
+        sizes = f"{entry['source_bytes']:,} → {entry['bytes']:,} bytes，gzip {entry['gzip']['bytes']:,}"
+        if "brotli" in entry:
+            sizes += f"，brotli {entry['brotli']['bytes']:,}"
+        print(f"📦 {file_name}：{sizes}")
+
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+
+    return manifest
+
+
+# =======================================================
+# 執行腳本
+# =======================================================
+if __name__ == "__main__":
+    profiling.run_main("publish_data", publish)
+    print(f"\n✅ 發布完成！manifest 已儲存至 {MANIFEST_FILE}")
@@ -0,0 +1,175 @@
+"""
+historical_result.json 的本機 HTTP 查詢服務 (asyncio + aiohttp)。
+
+啟動時把整合結果載入一次，建好查詢用的結構：
+    - 每所學校的回應事先編碼成 JSON bytes，/university 直接回傳
+    - SearchIndex (與前端相同的 n-gram 索引與別名) 給 /search
+    - EligibilityEngine (科目倍數矩陣) 給 /eligible
+
+端點：
+    GET /university/<學校>                         該校所有校系的歷年資料
+    GET /search?q=台大 資工&limit=50                與 search_engine.js 相同的搜尋
+    GET /eligible?scores=國文:45,英文:50&years=114  safe / match / reach 名單
+    GET /stats                                     快取統計
+
+/search 與 /eligible 的回應放在以位元組數為上限的 LRU 快取中，同樣的查詢不會重算。
+壓力測試見 load_test.py。
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from aiohttp import web
+
+from tools import department_record
+from tools.eligibility_engine import EligibilityEngine
+from tools.lru_cache import LRUCache
+from tools.search_index import SearchIndex, normalize
+
+# --- 設定常數 ---
+HISTORICAL_FILE = 'datas/historical_result.json'
+HOST = '127.0.0.1'
+PORT = 8080
+# 回應快取的總大小上限
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_MAX_ENTRIES = 10000
+# /search 沒有指定 limit 時最多回傳幾筆
+DEFAULT_SEARCH_LIMIT = 50
+# limit 的上限，超過時只回傳這麼多筆 (避免快取塞滿完整的結果列表)
+MAX_SEARCH_LIMIT = 500
+
+
+def _json_bytes(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=department_record.to_json).encode('utf-8')
+
+
+def parse_scores(text: str) -> Dict[str, float]:
+    """把 "國文:45,英文:50" 解析成 {"國文": 45.0, "英文": 50.0}。"""
+    scores: Dict[str, float] = {}
+    for item in text.split(','):
+        if not item.strip():
+            continue
+        subject, sep, score = item.partition(':')
+        if not sep:
+            raise ValueError(f"成績格式應為 科目:分數，收到 {item!r}")
+        scores[subject.strip()] = float(score)
+    if not scores:
+        raise ValueError("沒有提供任何成績")
+    return scores
+
+
+class QueryService:
+
+    def __init__(self, historical_data: Dict[str, Any], cache_max_bytes: int = CACHE_MAX_BYTES,
+                 cache_max_entries: Optional[int] = CACHE_MAX_ENTRIES):
+        start = time.perf_counter()
+        self.universities: Dict[str, bytes] = {uni: _json_bytes(depts) for uni, depts in historical_data.items()}
+        self.search_index = SearchIndex.from_data(historical_data)
+        self.engine = EligibilityEngine(historical_data)
+        self.cache = LRUCache(cache_max_bytes, cache_max_entries)
+        self.requests = 0
+        print(f"📚 已載入 {len(self.universities)} 所學校 ({time.perf_counter() - start:.2f} 秒)")
+
+    @classmethod
+    def from_file(cls, path: str = HISTORICAL_FILE, **kwargs) -> "QueryService":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(department_record.from_historical(json.load(f)), **kwargs)
+
+    # ----------------------------------------------------
+    # 查詢 (不含 HTTP，方便直接呼叫)
+    # ----------------------------------------------------
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> bytes:
+        key = ("search", " ".join(normalize(query).split()), limit)
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = _json_bytes(self.search_index.search(query, limit))
+            self.cache.put(key, cached)
+        return cached
+
+    @staticmethod
+    def _eligible_key(scores: Dict[str, float], years: Optional[Sequence[str]]) -> tuple:
+        return ("eligible", tuple(sorted(scores.items())), tuple(years) if years else None)
+
+    def _eligible_body(self, scores: Dict[str, float], years: Optional[Sequence[str]]) -> bytes:
+        """只算結果、不碰快取，可以放到其他執行緒執行。"""
+        return _json_bytes(self.engine.query(scores, years))
+
+    def eligible(self, scores: Dict[str, float], years: Optional[Sequence[str]] = None) -> bytes:
+        key = self._eligible_key(scores, years)
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = self._eligible_body(scores, years)
+            self.cache.put(key, cached)
+        return cached
+
+    # ----------------------------------------------------
+    # HTTP
+    # ----------------------------------------------------
+
+    @staticmethod
+    def _response(body: bytes, status: int = 200) -> web.Response:
+        return web.Response(body=body, status=status, content_type='application/json', charset='utf-8')
+
+    def _error(self, status: int, message: str) -> web.Response:
+        return self._response(_json_bytes({"error": message}), status)
+
+    async def handle_university(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        body = self.universities.get(request.match_info['name'])
+        if body is None:
+            return self._error(404, f"找不到學校：{request.match_info['name']}")
+        return self._response(body)
+
+    async def handle_search(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        query = request.query.get('q', '')
+        try:
+            limit = int(request.query.get('limit', DEFAULT_SEARCH_LIMIT))
+        except ValueError:
+            return self._error(400, "limit 必須是整數")
+        if limit < 1:
+            return self._error(400, "limit 必須大於 0")
+        limit = min(limit, MAX_SEARCH_LIMIT)
+        if not query.strip():
+            return self._response(b'[]')
+        return self._response(self.search(query, limit))
+
+    async def handle_eligible(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        try:
+            scores = parse_scores(request.query.get('scores', ''))
+        except ValueError as e:
+            return self._error(400, str(e))
+        years = [year for year in request.query.get('years', '').split(',') if year] or None
+
+        # LRUCache 不是執行緒安全的，快取只在事件迴圈的執行緒中讀寫；
+        # 沒有命中時矩陣運算約數毫秒，放到執行緒中算，不要卡住其他連線
+        key = self._eligible_key(scores, years)
+        body = self.cache.get(key)
+        if body is None:
+            loop = asyncio.get_running_loop()
+            body = await loop.run_in_executor(None, self._eligible_body, scores, years)
+            self.cache.put(key, body)
+        return self._response(body)
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return self._response(_json_bytes({"requests": self.requests, "cache": self.cache.stats()}))
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/university/{name}', self.handle_university)
+        app.router.add_get('/search', self.handle_search)
+        app.router.add_get('/eligible', self.handle_eligible)
+        app.router.add_get('/stats', self.handle_stats)
+        return app
+
+
+# =======================================================
+# 執行腳本
+# =======================================================
+if __name__ == "__main__":
+    service = QueryService.from_file()
+    print(f"🚀 查詢服務啟動於 http://{HOST}:{PORT}")
+    web.run_app(service.make_app(), host=HOST, port=PORT, print=None)
@@ -0,0 +1,156 @@
+import contextlib
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+from tools.get_data_eid import extract_department_eids
+from tools.get_all_details import flatten_eids
+from tools.extract_department_details import extract_table_data, PARSER_BACKEND
+from tools.response_cache import ResponseCache, DEFAULT_CACHE_PATH
+from tools import profiling
+
+YEAR = 115
+CACHE_PATH = DEFAULT_CACHE_PATH
+# None 代表使用所有 CPU 核心
+MAX_WORKERS: Optional[int] = None
+# 每個工作單位包含的頁面數，太小會被行程間傳輸拖慢，太大則負載不平均
+CHUNK_SIZE = 64
+
+
+def _parse_chunk(
+    year: int,
+    cache_path: str,
+    backend: str,
+    chunk: List[Tuple[int, str, str, str]]
+) -> List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    在子行程中解析一批快取頁面。
+    返回 [(原始索引, 解析結果, 錯誤訊息), ...]，成功時錯誤訊息為 None。
+    """
+    parsed = []
+    # 每個子行程自己開一個唯讀的 SQLite 連線，連線不能跨行程共用
+    with ResponseCache(year, cache_path, read_only=True) as cache:
+        for index, uni, dept, eid in chunk:
+            html_content = cache.get(eid)
+            if html_content is None:
+                parsed.append((index, None, "不在快取中"))
+                continue
+
+            try:
+                # extract_table_data 每頁都會印一行，多個行程一起印會很亂，由主行程統一回報進度
+                with contextlib.redirect_stdout(io.StringIO()):
+                    dept_info = extract_table_data(html_content, uni, dept, backend=backend)
+                if dept_info is None:
+                    parsed.append((index, None, "找不到校系表格"))
+                    continue
+                dept_info["id"] = eid
+                parsed.append((index, dept_info, None))
+            except Exception as e:
+                parsed.append((index, None, repr(e)))
+
+    return parsed
+
+
+def reparse_cached_pages(
+    year: int,
+    eids_data,
+    cache_path: str = CACHE_PATH,
+    max_workers: Optional[int] = MAX_WORKERS,
+    chunk_size: int = CHUNK_SIZE,
+    backend: str = PARSER_BACKEND,
+    in_process: bool = False,
+    previous: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Tuple[Dict[str, Dict[str, Any]], List[Tuple[str, str, str, str]]]:
+    """
+    以 ProcessPoolExecutor 重新解析快取中這一年的所有校系分則頁面。
+    各批次完成順序不固定，但最後依 eids_data 的順序合併，輸出與爬蟲的
+    { 學校: { 科系: {...} } } 結構與順序相同。
+    返回 (結果, 失敗列表)，失敗列表為 [(學校, 科系, EID, 錯誤訊息), ...]。
+    :param in_process: 在主行程中逐批解析 (剖析效能時用，cProfile 量不到子行程)
+    :param previous: 上一次的結果 (例如現有的 all_department_criteria.json)，
+                     不在快取中或解析失敗的校系沿用其中的資料，而不是從結果中消失
+    """
+    eids_list = flatten_eids(eids_data)
+    indexed = [(index, uni, dept, eid) for index, (uni, dept, eid) in enumerate(eids_list)]
+    chunks = [indexed[i:i + chunk_size] for i in range(0, len(indexed), chunk_size)]
+
+    workers = 1 if in_process else max_workers or os.cpu_count()
+    print(f"總共 {len(eids_list)} 個 EID，分成 {len(chunks)} 批交給 {workers} 個行程解析 (後端：{backend})。")
+
+    parsed: Dict[int, Dict[str, Any]] = {}
+    failures: List[Tuple[int, str]] = []
+    done = 0
+
+    def collect(chunk_result) -> None:
+        nonlocal done
+        for index, dept_info, error in chunk_result:
+            if error is None:
+                parsed[index] = dept_info
+            else:
+                failures.append((index, error))
+        done += 1
+        print(f"進度：({done}/{len(chunks)}) 批完成")
+
+    if in_process:
+        for chunk in chunks:
+            collect(_parse_chunk(year, cache_path, backend, chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_parse_chunk, year, cache_path, backend, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                collect(future.result())
+
+    previous = previous or {}
+    kept = 0
+    result: Dict[str, Dict[str, Any]] = {}
+    for index, (uni, dept, eid) in enumerate(eids_list):
+        result.setdefault(uni, {})
+        if index in parsed:
+            result[uni][dept] = parsed[index]
+        elif dept in previous.get(uni, {}):
+            result[uni][dept] = previous[uni][dept]
+            kept += 1
+
+    print(f"\n✅ 成功解析 {len(parsed)} 個校系，失敗 {len(failures)} 個 (其中 {kept} 個沿用上一次的結果)。")
+    failed = []
+    for index, error in sorted(failures):
+        uni, dept, eid = eids_list[index]
+        print(f"錯誤：EID {eid} ({uni} - {dept})：{error}")
+        failed.append((uni, dept, eid, error))
+
+    return result, failed
+
+
+# =======================================================
+# 執行腳本
+# =======================================================
+if __name__ == "__main__":
+    output_file = f"datas/{YEAR}/all_department_criteria.json"
+    eids_data = extract_department_eids(f"datas/{YEAR}/AST_school.html")
+
+    # 解析失敗的校系沿用現有檔案中的資料，重新解析不會讓校系消失
+    previous = {}
+    if os.path.exists(output_file):
+        with open(output_file, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+
+    result, failures = profiling.run_main(
+        "reparse_cached_pages", reparse_cached_pages, YEAR, eids_data,
+        in_process=profiling.enabled(), previous=previous
+    )
+
+    missing = [(uni, dept, eid) for uni, dept, eid, _ in failures if dept not in result.get(uni, {})]
+    if missing:
+        # 寫出去的話這些校系會從 all_department_criteria.json 消失，保留原本的檔案
+        print(f"❌ 有 {len(missing)} 個校系解析失敗且現有檔案中也沒有資料，不覆寫 {output_file}：")
+        for uni, dept, eid in missing:
+            print(f"   EID {eid} ({uni} - {dept})")
+        print("   請先用 get_new_critrias.py 重新抓取這些頁面 (OFFLINE = False)")
+        sys.exit(1)
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=4)
+        print(f"✅ 成功提取數據並儲存")
@@ -0,0 +1,163 @@
+"""
+用合成資料 (tools/synthetic_data.py) 測試資料量放大 SCALES 倍時，整合、匹配與前端資料量的成長情形。
+
+每個倍數各產生一份資料 (放在 SYNTHETIC_DIR 下，同樣的設定已經產生過就沿用)，量測：
+    - integrate_data：整合所有年度 (含讀檔)
+    - match_them：最後一個歷史年度的分組匹配 (不含讀 CSV)
+    (執行很快的倍數會重複幾次取最短的時間)
+    - 前端資料量：整合結果經 publish_data.py 相同的精簡編碼後的大小與 gzip 大小
+
+並換算成「每個校系」的時間與位元組數。資料量與校系數成正比是正常的；
+每個校系的時間比最小倍數多出 SUPERLINEAR_TOLERANCE 倍以上，就代表有超線性的成長，會標示出來。
+各階段的時間 (與 TRACE_MEMORY 時的峰值記憶體) 另外寫在 datas/.runs/ 的執行報告中。
+"""
+import contextlib
+import gzip
+import io
+import os
+import shutil
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from data_integrator import integrate_data
+from tools import department_record, instrumentation
+from tools.college_data_transform import convert_division_exam_data
+from tools.compact_json import encode, dumps_minified
+from tools.match_groups import match_them
+from tools.score_distribution_csv_2_json import convert_score_distribution
+from tools.score_table import ScoreTable
+from tools.synthetic_data import SyntheticDataset, UNIVERSITIES, DEPARTMENTS_PER_UNIVERSITY
+
+# --- 設定常數 ---
+SCALES = [1, 10, 100]
+# False：放大學校數；True：學校數不變，放大每校的校系數 (檢查單一學校內的超線性)
+SCALE_DEPARTMENTS = False
+START_YEAR = 112
+END_YEAR = 115
+SEED = 0
+SYNTHETIC_DIR = 'datas/.synthetic'
+# True 時刪掉舊的合成資料重新產生 (改過 synthetic_data.py 之後)
+REGENERATE = False
+# 每個校系的時間超過最小倍數的這麼多倍就標示為超線性
+SUPERLINEAR_TOLERANCE = 1.5
+# 小倍數只要幾毫秒，單次計時誤差很大：重複執行到累計超過 MIN_MEASURE_SECONDS (最多 MAX_REPEAT 次)，取最短的一次
+MIN_MEASURE_SECONDS = 1.0
+MAX_REPEAT = 10
+# 量測各階段的峰值記憶體 (tracemalloc 會讓大倍數慢很多)
+TRACE_MEMORY = False
+
+
+def dataset_dir(scale: int) -> str:
+    suffix = "d" if SCALE_DEPARTMENTS else ""
+    return os.path.join(SYNTHETIC_DIR, f"x{scale}{suffix}-{START_YEAR}-{END_YEAR}-{SEED}")
+
+
+def generate(scale: int) -> str:
+    """產生 (或沿用) 放大 scale 倍的合成資料，返回資料目錄。"""
+    out_dir = dataset_dir(scale)
+    if os.path.exists(out_dir) and not REGENERATE:
+        return out_dir
+    shutil.rmtree(out_dir, ignore_errors=True)
+
+    if SCALE_DEPARTMENTS:
+        departments_per_university = tuple(count * scale for count in DEPARTMENTS_PER_UNIVERSITY)
+        dataset = SyntheticDataset(UNIVERSITIES, departments_per_university, START_YEAR, END_YEAR, SEED)
+    else:
+        dataset = SyntheticDataset(UNIVERSITIES * scale, DEPARTMENTS_PER_UNIVERSITY, START_YEAR, END_YEAR, SEED)
+    with contextlib.redirect_stdout(io.StringIO()):
+        dataset.write(out_dir)
+    return out_dir
+
+
+def best_time(func: Callable[[], Any]) -> Tuple[float, Any]:
+    """返回 (最短的一次秒數, 輸出)。"""
+    timings = []
+    while sum(timings) < MIN_MEASURE_SECONDS and len(timings) < MAX_REPEAT:
+        start = time.perf_counter()
+        output = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), output
+
+
+def measure(scale: int) -> Dict[str, Any]:
+    with instrumentation.stage(f"x{scale}"):
+        with instrumentation.stage("產生資料"):
+            data_dir = generate(scale)
+
+        # 這些函數每筆或每步都會印出訊息，量測時不需要
+        with contextlib.redirect_stdout(io.StringIO()):
+            with instrumentation.stage("整合"):
+                integrate_seconds, integrated = best_time(lambda: integrate_data(START_YEAR, END_YEAR, data_dir))
+            departments = sum(len(depts) for depts in integrated.values())
+
+            year_dir = os.path.join(data_dir, str(END_YEAR - 1))
+            dept_criteria = convert_division_exam_data(os.path.join(year_dir, 'dept_criteria.csv'))
+            score_table = ScoreTable.from_distribution(convert_score_distribution(os.path.join(year_dir, 'subjects_combinations.csv')))
+            # match_them 不會修改輸入，重複執行的結果相同
+            with instrumentation.stage("匹配"):
+                match_seconds, matched = best_time(lambda: match_them(dept_criteria, score_table))
+
+        with instrumentation.stage("前端資料編碼"):
+            content = dumps_minified(encode(department_record.to_plain(integrated))).encode('utf-8')
+            gzipped_bytes = len(gzip.compress(content, compresslevel=6, mtime=0))
+
+    return {
+        "scale": scale,
+        "universities": len(integrated),
+        "departments": departments,
+        "integrate_seconds": integrate_seconds,
+        "match_departments": sum(len(depts) for depts in matched.values()),
+        "match_seconds": match_seconds,
+        "payload_bytes": len(content),
+        "payload_gzip_bytes": gzipped_bytes,
+    }
+
+
+def print_results(results: List[Dict[str, Any]], tolerance: float = SUPERLINEAR_TOLERANCE) -> List[str]:
+    """印出每個校系的時間與資料量，返回超線性的項目。"""
+    base = results[0]
+    metrics = [
+        ("整合", "integrate_seconds", "departments", 1e6, "µs"),
+        ("匹配", "match_seconds", "match_departments", 1e6, "µs"),
+        ("前端資料", "payload_bytes", "departments", 1, "bytes"),
+        ("前端資料 gzip", "payload_gzip_bytes", "departments", 1, "bytes"),
+    ]
+    warnings = []
+    print(f"\n--- 放大倍數與每個校系的成本 (以 x{base['scale']} 為基準) ---")
+    for label, key, count_key, factor, unit in metrics:
+        base_per_item = base[key] / base[count_key]
+        cells = []
+        for result in results:
+            per_item = result[key] / result[count_key]
+            ratio = per_item / base_per_item if base_per_item else 0
+            cells.append(f"x{result['scale']}: {per_item * factor:.1f} {unit} ({ratio:.2f})")
+            if ratio > tolerance:
+                warnings.append(f"{label} 在 x{result['scale']} 每個校系是 x{base['scale']} 的 {ratio:.2f} 倍")
+        print(f"{label:<12} " + "，".join(cells))
+
+    if warnings:
+        print(f"\n⚠️ 可能有超線性的成長：")
+        for warning in warnings:
+            print(f"   {warning}")
+    else:
+        print("\n✅ 沒有發現超線性的成長")
+    return warnings
+
+
+# =======================================================
+# 執行腳本
+# =======================================================
+if __name__ == "__main__":
+    with instrumentation.run("scaling_test", trace_memory=TRACE_MEMORY) as report:
+        results = []
+        for scale in SCALES:
+            result = measure(scale)
+            results.append(result)
+            print(f"📏 x{scale}：{result['universities']} 所學校、{result['departments']} 個校系，"
+                  f"整合 {result['integrate_seconds']:.2f} 秒，匹配 {result['match_seconds']:.3f} 秒，"
+                  f"前端資料 {result['payload_bytes'] / 1024 / 1024:.1f} MiB (gzip {result['payload_gzip_bytes'] / 1024 / 1024:.1f} MiB)")
+
+        report.info.update(
+            scale_departments=SCALE_DEPARTMENTS, start_year=START_YEAR, end_year=END_YEAR, seed=SEED,
+            results=results, superlinear=print_results(results),
+        )
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 各腳本以 python/ 為根目錄匯入 tools.*
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
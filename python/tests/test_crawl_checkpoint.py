@@ -0,0 +1,48 @@
+import json
+import os
+
+import pytest
+
+from tools import get_all_details
+from tools.response_cache import ResponseCache
+
+DETAIL_PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark_fixtures', 'detail_page.html')
+EIDS = {"測試大學": {"測試學系": "E1"}}
+STALE = {"stale": True, "id": "E1"}
+
+
+@pytest.fixture
+def stale_checkpoint(tmp_path):
+    """檢查點中已經有舊解析程式的結果。"""
+    path = tmp_path / "crawl_checkpoint.jsonl"
+    path.write_text(json.dumps({"eid": "E1", "uni": "測試大學", "dept": "測試學系", "status": "ok", "data": STALE}, ensure_ascii=False) + "\n", encoding='utf-8')
+    return str(path)
+
+
+def _cache(tmp_path, offline):
+    with open(DETAIL_PAGE, 'r', encoding='utf-8') as f:
+        html = f.read()
+    with ResponseCache(115, str(tmp_path / "cache.sqlite3")) as cache:
+        cache.put("E1", html)
+    return ResponseCache(115, str(tmp_path / "cache.sqlite3"), offline=offline)
+
+
+@pytest.mark.parametrize("crawl", [get_all_details.get_department_html_responses, get_all_details.get_department_html_responses_async])
+def test_offline_reparse_ignores_checkpointed_results(tmp_path, stale_checkpoint, crawl):
+    with _cache(tmp_path, offline=True) as cache:
+        result = crawl(EIDS, cache=cache, checkpoint_path=stale_checkpoint)
+
+    dept = result["測試大學"]["測試學系"]
+    assert dept != STALE
+    assert dept["id"] == "E1"
+    # 新的結果也寫回檢查點，之後線上續爬不會拿到舊的結果
+    with open(stale_checkpoint, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [record["data"] for record in records] == [dept]
+
+
+def test_online_run_resumes_from_checkpoint(tmp_path, stale_checkpoint):
+    with _cache(tmp_path, offline=False) as cache:
+        result = get_all_details.get_department_html_responses(EIDS, cache=cache, checkpoint_path=stale_checkpoint)
+
+    assert result["測試大學"]["測試學系"] == STALE
@@ -0,0 +1,49 @@
+from tools.eligibility_engine import EligibilityEngine
+
+
+def _record(standard, weights):
+    return {
+        "科目倍數": weights,
+        "錄取人數": 10,
+        "一般考生錄取標準總分": standard * sum(weights.values()),
+        "一般考生錄取標準": standard,
+        "組別代號": "",
+        "達標比例": "",
+        "校系名稱": "",
+    }
+
+
+def _categories(result):
+    return {entry["科系"]: category for category, entries in result.items() for entry in entries}
+
+
+SCORES = {"國文": 50, "英文": 50}
+WEIGHTS = {"國文": 1.0, "英文": 1.0}
+
+
+def test_merged_department_uses_best_record_per_year():
+    # 114 年有兩個合併前的舊系 (差距 +2 / -6)，113 年差距 +2：每年取最好的一筆，平均 +2
+    engine = EligibilityEngine({"A大學": {"合併系": {
+        "115": {"科目倍數": WEIGHTS},
+        "114": [_record(48, WEIGHTS), _record(56, WEIGHTS)],
+        "113": [_record(48, WEIGHTS)],
+    }}})
+
+    [entry] = engine.query(SCORES)["safe"]
+    assert entry["差距"] == 2.0
+    assert entry["各年差距"] == {"114": 2.0, "113": 2.0}
+
+
+def test_department_requiring_missing_latest_subject_is_not_listed():
+    # 過去幾年只採計國英，今年 (115) 多採計物理，學生沒有考物理
+    history = {
+        "114": [_record(40, WEIGHTS)],
+        "113": [_record(40, WEIGHTS)],
+    }
+    engine = EligibilityEngine({"A大學": {
+        "加考物理系": {"115": {"科目倍數": {**WEIGHTS, "物理": 1.0}}, **history},
+        "不變系": {"115": {"科目倍數": WEIGHTS}, **history},
+    }})
+
+    assert _categories(engine.query(SCORES)) == {"不變系": "safe"}
+    assert _categories(engine.query({**SCORES, "物理": 50})) == {"加考物理系": "safe", "不變系": "safe"}
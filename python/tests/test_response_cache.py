@@ -0,0 +1,56 @@
+import os
+import sqlite3
+import zlib
+
+import pytest
+
+from tools import get_all_details
+from tools.response_cache import ResponseCache, body_hash
+
+DETAIL_PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark_fixtures', 'detail_page.html')
+EIDS = {"測試大學": {"測試學系": "E1"}}
+MAINTENANCE_PAGE = "<html><body>系統維護中</body></html>"
+
+
+def test_unparseable_page_is_kept_but_not_replayed_online(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    with ResponseCache(115, path) as cache:
+        with pytest.raises(get_all_details.PageNotParsedError):
+            get_all_details._parse_and_cache(cache, False, MAINTENANCE_PAGE, "測試大學", "測試學系", "E1")
+        # 連線時當作沒有快取，會重新取得
+        assert cache.get("E1") is None
+
+    # 離線重新解析時還讀得到原始內容
+    with ResponseCache(115, path, offline=True) as cache:
+        assert cache.get("E1") == MAINTENANCE_PAGE
+    with ResponseCache(115, path, read_only=True) as cache:
+        assert cache.get("E1") == MAINTENANCE_PAGE
+
+
+def test_offline_reparse_clears_parse_failure_flag(tmp_path):
+    """解析器修好之後離線重新解析成功，連線時就會直接使用這份快取。"""
+    path = str(tmp_path / "cache.sqlite3")
+    with open(DETAIL_PAGE, 'r', encoding='utf-8') as f:
+        html = f.read()
+    with ResponseCache(115, path) as cache:
+        cache.put("E1", html, parsed=False)
+
+    with ResponseCache(115, path, offline=True) as cache:
+        result = get_all_details.get_department_html_responses(EIDS, cache=cache, checkpoint_path=None)
+    assert result["測試大學"]["測試學系"]["id"] == "E1"
+
+    with ResponseCache(115, path) as cache:
+        assert cache.get("E1") == html
+
+
+def test_database_without_parsed_column_is_migrated(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE responses (year INTEGER NOT NULL, eid TEXT NOT NULL, body BLOB NOT NULL, body_hash TEXT NOT NULL, fetched_at REAL NOT NULL, PRIMARY KEY (year, eid))")
+    conn.execute("INSERT INTO responses VALUES (115, 'E1', ?, ?, 0)", (zlib.compress(b"<html></html>"), body_hash("<html></html>")))
+    conn.commit()
+    conn.close()
+
+    # 舊資料庫中的頁面都是解析成功才存的
+    with ResponseCache(115, path) as cache:
+        assert cache.get("E1") == "<html></html>"
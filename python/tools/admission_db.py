@@ -0,0 +1,286 @@
+"""
+所有年度資料的 SQLite 資料庫 (datas/admission.sqlite3)。
+
+把散落在各年資料夾的 result.json、dept_renamed.json、all_department_criteria.json
+匯入同一個正規化的資料庫：
+
+    universities      (id, name)
+    departments       (id, university_id, name)                  -- UNIQUE (university_id, name)
+    results           (department_id, year, 錄取人數、錄取標準等)   -- PRIMARY KEY (department_id, year)
+    result_weights    (department_id, year, subject, multiplier)  -- result.json 的科目倍數
+    criteria          (department_id, year, 校系代碼、核定人數)      -- PRIMARY KEY (department_id, year)
+    criteria_weights  (department_id, year, subject, multiplier)  -- 分則的科目倍數
+    criteria_standards(department_id, year, subject, standard)    -- 分則的學測標準
+    renames           (year, university_id, old_name, new_name)   -- dept_renamed.json
+
+(學校, 系名) 經由 departments 的唯一索引找到 department_id，再由 (department_id, year) 主鍵找到該年資料；
+results 另外以 (組別代號, 年度) 建索引，方便查同一個科目組合的所有校系。
+每張表都記錄原始檔案中的順序 (position)，讀回來的字典與原始 JSON 的順序相同。
+
+讀取函數返回與原始 JSON 相同的結構，data_integrator.py 可以直接拿來整合。
+"""
+import os
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DB_FILE = 'datas/admission.sqlite3'
+# 資料表結構改變時遞增，舊版本的資料庫會整個重建
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS universities (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS departments (
+    id            INTEGER PRIMARY KEY,
+    university_id INTEGER NOT NULL REFERENCES universities(id),
+    name          TEXT NOT NULL,
+    UNIQUE (university_id, name)
+);
+CREATE TABLE IF NOT EXISTS results (
+    department_id      INTEGER NOT NULL REFERENCES departments(id),
+    year               INTEGER NOT NULL,
+    position           INTEGER NOT NULL,
+    admitted           INTEGER,  -- 錄取人數
+    total_score        REAL,     -- 一般考生錄取標準總分
+    standard           REAL,     -- 一般考生錄取標準
+    indigenous_standard REAL,    -- 原住民考生錄取標準 (沒有這個欄位時為 NULL)
+    group_id           TEXT,     -- 組別代號 (科目組合)
+    pass_ratio         REAL,     -- 達標比例
+    PRIMARY KEY (department_id, year)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_results_group ON results (group_id, year);
+CREATE INDEX IF NOT EXISTS idx_results_year ON results (year, position);
+CREATE TABLE IF NOT EXISTS result_weights (
+    department_id INTEGER NOT NULL,
+    year          INTEGER NOT NULL,
+    position      INTEGER NOT NULL,
+    subject       TEXT NOT NULL,
+    multiplier    REAL NOT NULL,
+    PRIMARY KEY (department_id, year, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS criteria (
+    department_id INTEGER NOT NULL REFERENCES departments(id),
+    year          INTEGER NOT NULL,
+    position      INTEGER NOT NULL,
+    code          TEXT,     -- 校系代碼 (id)
+    quota         INTEGER,  -- 核定人數
+    PRIMARY KEY (department_id, year)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_criteria_year ON criteria (year, position);
+CREATE TABLE IF NOT EXISTS criteria_weights (
+    department_id INTEGER NOT NULL,
+    year          INTEGER NOT NULL,
+    position      INTEGER NOT NULL,
+    subject       TEXT NOT NULL,
+    multiplier    REAL NOT NULL,
+    PRIMARY KEY (department_id, year, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS criteria_standards (
+    department_id INTEGER NOT NULL,
+    year          INTEGER NOT NULL,
+    position      INTEGER NOT NULL,
+    subject       TEXT NOT NULL,
+    standard      TEXT NOT NULL,
+    PRIMARY KEY (department_id, year, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS renames (
+    year          INTEGER NOT NULL,
+    university_id INTEGER NOT NULL REFERENCES universities(id),
+    position      INTEGER NOT NULL,
+    old_name      TEXT NOT NULL,
+    new_name      TEXT NOT NULL,
+    PRIMARY KEY (year, university_id, position)
+) WITHOUT ROWID;
+"""
+
+
+def connect(path: str = DB_FILE) -> sqlite3.Connection:
+    """開啟 (必要時建立) 資料庫。結構版本不同時清空重建。"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path)
+    if conn.execute("PRAGMA user_version").fetchone()[0] not in (0, SCHEMA_VERSION):
+        conn.close()
+        os.remove(path)
+        conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+# ----------------------------------------------------
+# 匯入
+# ----------------------------------------------------
+
+def _university_id(conn: sqlite3.Connection, name: str) -> int:
+    conn.execute("INSERT OR IGNORE INTO universities (name) VALUES (?)", (name,))
+    return conn.execute("SELECT id FROM universities WHERE name = ?", (name,)).fetchone()[0]
+
+
+def _department_id(conn: sqlite3.Connection, university_id: int, name: str) -> int:
+    conn.execute("INSERT OR IGNORE INTO departments (university_id, name) VALUES (?, ?)", (university_id, name))
+    return conn.execute(
+        "SELECT id FROM departments WHERE university_id = ? AND name = ?", (university_id, name)
+    ).fetchone()[0]
+
+
+def _iter_departments(conn: sqlite3.Connection, data: Dict[str, Dict[str, Any]]) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """逐筆產生 (原始順序, department_id, 該系資料)。"""
+    position = 0
+    for uni, depts in data.items():
+        university_id = _university_id(conn, uni)
+        for dept, record in depts.items():
+            yield position, _department_id(conn, university_id, dept), record
+            position += 1
+
+
+def import_results(conn: sqlite3.Connection, year: int, results: Dict[str, Dict[str, Any]]) -> int:
+    """匯入 (取代) 某年度的 result.json，返回筆數。"""
+    conn.execute("DELETE FROM results WHERE year = ?", (year,))
+    conn.execute("DELETE FROM result_weights WHERE year = ?", (year,))
+    count = 0
+    for position, department_id, record in _iter_departments(conn, results):
+        conn.execute(
+            "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (department_id, year, position, record.get("錄取人數"), record.get("一般考生錄取標準總分"),
+             record.get("一般考生錄取標準"), record.get("原住民考生錄取標準"), record.get("組別代號"), record.get("達標比例"))
+        )
+        conn.executemany(
+            "INSERT INTO result_weights VALUES (?, ?, ?, ?, ?)",
+            [(department_id, year, i, subject, multiplier) for i, (subject, multiplier) in enumerate(record.get("科目倍數", {}).items())]
+        )
+        count += 1
+    return count
+
+
+def import_criteria(conn: sqlite3.Connection, year: int, criteria: Dict[str, Dict[str, Any]]) -> int:
+    """匯入 (取代) 某年度的 all_department_criteria.json，返回筆數。"""
+    for table in ("criteria", "criteria_weights", "criteria_standards"):
+        conn.execute(f"DELETE FROM {table} WHERE year = ?", (year,))
+    count = 0
+    for position, department_id, record in _iter_departments(conn, criteria):
+        conn.execute(
+            "INSERT INTO criteria VALUES (?, ?, ?, ?, ?)",
+            (department_id, year, position, record.get("id"), record.get("核定人數"))
+        )
+        conn.executemany(
+            "INSERT INTO criteria_weights VALUES (?, ?, ?, ?, ?)",
+            [(department_id, year, i, subject, multiplier) for i, (subject, multiplier) in enumerate(record.get("科目倍數", {}).items())]
+        )
+        conn.executemany(
+            "INSERT INTO criteria_standards VALUES (?, ?, ?, ?, ?)",
+            [(department_id, year, i, subject, standard) for i, (subject, standard) in enumerate(record.get("學測標準", {}).items())]
+        )
+        count += 1
+    return count
+
+
+def import_renames(conn: sqlite3.Connection, year: int, rename_map: Dict[str, Dict[str, List[str]]]) -> int:
+    """匯入 (取代) 某年度的 dept_renamed.json，返回 (舊名, 新名) 的對數。"""
+    conn.execute("DELETE FROM renames WHERE year = ?", (year,))
+    count = 0
+    for uni, renames_for_uni in rename_map.items():
+        university_id = _university_id(conn, uni)
+        rows = [(old_name, new_name) for old_name, new_names in renames_for_uni.items() for new_name in new_names]
+        conn.executemany(
+            "INSERT INTO renames VALUES (?, ?, ?, ?, ?)",
+            [(year, university_id, i, old_name, new_name) for i, (old_name, new_name) in enumerate(rows)]
+        )
+        count += len(rows)
+    return count
+
+
+# ----------------------------------------------------
+# 讀取 (返回與原始 JSON 相同的結構)
+# ----------------------------------------------------
+
+def _university_filter(uni: Optional[str]) -> Tuple[str, Tuple]:
+    return ("AND u.name = ?", (uni,)) if uni is not None else ("", ())
+
+
+def _subject_values(conn: sqlite3.Connection, table: str, column: str, year: int, uni: Optional[str]) -> Dict[int, Dict[str, Any]]:
+    """{ department_id: { 科目: 值 } }，科目依原始順序。"""
+    where, params = _university_filter(uni)
+    values: Dict[int, Dict[str, Any]] = {}
+    for department_id, subject, value in conn.execute(
+        f"SELECT t.department_id, t.subject, t.{column} FROM {table} t "
+        "JOIN departments d ON d.id = t.department_id JOIN universities u ON u.id = d.university_id "
+        f"WHERE t.year = ? {where} ORDER BY t.department_id, t.position",
+        (year, *params)
+    ):
+        values.setdefault(department_id, {})[subject] = value
+    return values
+
+
+def load_results(conn: sqlite3.Connection, year: int, uni: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """某年度的 result.json ({ 學校: { 系名: 紀錄 } })，給 uni 時只查那一所學校。"""
+    where, params = _university_filter(uni)
+    rows = conn.execute(
+        "SELECT u.name, d.name, r.department_id, r.admitted, r.total_score, r.standard, r.indigenous_standard, r.group_id, r.pass_ratio "
+        "FROM results r JOIN departments d ON d.id = r.department_id JOIN universities u ON u.id = d.university_id "
+        f"WHERE r.year = ? {where} ORDER BY r.position",
+        (year, *params)
+    ).fetchall()
+    weights = _subject_values(conn, "result_weights", "multiplier", year, uni)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for uni_name, dept, department_id, admitted, total_score, standard, indigenous_standard, group_id, pass_ratio in rows:
+        record: Dict[str, Any] = {
+            "科目倍數": weights.get(department_id, {}),
+            "錄取人數": admitted,
+            "一般考生錄取標準總分": total_score,
+            "一般考生錄取標準": standard,
+        }
+        if indigenous_standard is not None:
+            record["原住民考生錄取標準"] = indigenous_standard
+        record["組別代號"] = group_id
+        record["達標比例"] = pass_ratio
+        results.setdefault(uni_name, {})[dept] = record
+    return results
+
+
+def load_criteria(conn: sqlite3.Connection, year: int, uni: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """某年度的 all_department_criteria.json，給 uni 時只查那一所學校。"""
+    where, params = _university_filter(uni)
+    rows = conn.execute(
+        "SELECT u.name, d.name, c.department_id, c.code, c.quota "
+        "FROM criteria c JOIN departments d ON d.id = c.department_id JOIN universities u ON u.id = d.university_id "
+        f"WHERE c.year = ? {where} ORDER BY c.position",
+        (year, *params)
+    ).fetchall()
+    weights = _subject_values(conn, "criteria_weights", "multiplier", year, uni)
+    standards = _subject_values(conn, "criteria_standards", "standard", year, uni)
+
+    criteria: Dict[str, Dict[str, Any]] = {}
+    for uni_name, dept, department_id, code, quota in rows:
+        criteria.setdefault(uni_name, {})[dept] = {
+            "核定人數": quota,
+            "學測標準": standards.get(department_id, {}),
+            "科目倍數": weights.get(department_id, {}),
+            "id": code,
+        }
+    return criteria
+
+
+def load_rename_map(conn: sqlite3.Connection, year: int) -> Dict[str, Dict[str, List[str]]]:
+    """某年度的 dept_renamed.json ({ 學校: { 舊系名: [新系名列表] } })。"""
+    rename_map: Dict[str, Dict[str, List[str]]] = {}
+    for uni, old_name, new_name in conn.execute(
+        "SELECT u.name, r.old_name, r.new_name FROM renames r JOIN universities u ON u.id = r.university_id "
+        "WHERE r.year = ? ORDER BY u.id, r.position",
+        (year,)
+    ):
+        rename_map.setdefault(uni, {}).setdefault(old_name, []).append(new_name)
+    return rename_map
+
+
+def criteria_universities(conn: sqlite3.Connection, year: int) -> List[str]:
+    """某年度分則中的所有學校，依原始順序。"""
+    return [name for name, in conn.execute(
+        "SELECT u.name FROM criteria c JOIN departments d ON d.id = c.department_id JOIN universities u ON u.id = d.university_id "
+        "WHERE c.year = ? GROUP BY u.id ORDER BY MIN(c.position)",
+        (year,)
+    )]
@@ -0,0 +1,91 @@
+"""
+前端資料檔的精簡格式：鍵字典編碼 + 最小化 JSON。
+
+historical_result.json 裡像「一般考生錄取標準總分」、「科目倍數」這樣的鍵重複了上千次，
+這裡把出現兩次以上的鍵換成很短的代碼，代碼表放在檔案開頭：
+
+    {"format": 1, "keys": {"a": "科目倍數", ...}, "data": <原本的資料，鍵換成代碼>}
+
+代碼不會與任何原始鍵相同，所以解碼時只要把代碼表中的鍵換回來即可，
+結果與原始資料完全相同 (js_utils/data_loader.js 的 decodeKeys 做同樣的事)。
+"""
+import itertools
+import json
+import string
+from collections import Counter
+from typing import Any, Dict, Iterator
+
+COMPACT_FORMAT = 1
+# 代碼使用的字元，依序產生 a, b, ..., Z, aa, ab, ..., a9, ba, ...
+# 第一個字元一定是字母：全數字的鍵在 JavaScript 物件中會被排到最前面，解碼後的鍵順序就會跑掉
+CODE_FIRST_CHARS = string.ascii_lowercase + string.ascii_uppercase
+CODE_ALPHABET = CODE_FIRST_CHARS + string.digits
+
+
+def _count_keys(value: Any, counter: Counter) -> None:
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            counter.update(node.keys())
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+def _codes() -> Iterator[str]:
+    for length in itertools.count(1):
+        for first in CODE_FIRST_CHARS:
+            for rest in itertools.product(CODE_ALPHABET, repeat=length - 1):
+                yield first + "".join(rest)
+
+
+def build_key_table(data: Any, min_count: int = 2) -> Dict[str, str]:
+    """
+    返回 { 原始鍵: 代碼 }。出現越多次的鍵拿到越短的代碼，
+    只編碼出現至少 min_count 次、而且代碼確實比較短的鍵。
+    """
+    counter: Counter = Counter()
+    _count_keys(data, counter)
+
+    # 代碼跳過所有原始鍵，因此不會和沒被編碼、原樣留下的鍵撞名
+    codes = (code for code in _codes() if code not in counter)
+
+    table: Dict[str, str] = {}
+    for key, count in counter.most_common():
+        if count < min_count:
+            break
+        code = next(codes)
+        if len(code.encode('utf-8')) < len(key.encode('utf-8')):
+            table[key] = code
+    return table
+
+
+def _rename_keys(value: Any, mapping: Dict[str, str]) -> Any:
+    if isinstance(value, dict):
+        return {mapping.get(key, key): _rename_keys(item, mapping) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rename_keys(item, mapping) for item in value]
+    return value
+
+
+def encode(data: Any, min_count: int = 2) -> Dict[str, Any]:
+    """把資料編碼成 {"format", "keys", "data"} 結構。"""
+    table = build_key_table(data, min_count)
+    return {
+        "format": COMPACT_FORMAT,
+        "keys": {code: key for key, code in table.items()},
+        "data": _rename_keys(data, table),
+    }
+
+
+def decode(compact: Dict[str, Any]) -> Any:
+    """encode 的反向操作。"""
+    if compact.get("format") != COMPACT_FORMAT:
+        raise ValueError(f"不支援的精簡格式版本：{compact.get('format')}")
+    return _rename_keys(compact["data"], compact["keys"])
+
+
+def dumps_minified(value: Any) -> str:
+    """不含多餘空白的 JSON。"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
@@ -0,0 +1,107 @@
+import json
+import os
+from typing import Dict, Any, List, Tuple
+
+
+class CrawlCheckpoint:
+    """
+    爬蟲的 JSONL 預寫日誌 (write-ahead log)。
+
+    每處理完一個 EID 就追加一行：
+        {"eid": ..., "uni": ..., "dept": ..., "status": "ok", "data": {...}}
+        {"eid": ..., "uni": ..., "dept": ..., "status": "failed", "error": "..."}
+    同一個 EID 以最後一行為準。重新啟動時只需要爬 done_eids 以外的 EID，
+    爬完後用 compact() 依 EID 順序組回 { 學校: { 科系: {...} } }。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done_eids = set()
+        self.failed_eids = set()
+
+        for record in self._read_records():
+            if record["status"] == "ok":
+                self.done_eids.add(record["eid"])
+                self.failed_eids.discard(record["eid"])
+            else:
+                self.failed_eids.add(record["eid"])
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _read_records(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # 當機時最後一行可能只寫了一半，視為沒寫過
+                    print(f"警告：檢查點 {self.path} 第 {line_no} 行不完整，已忽略。")
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        # 每筆都 flush，程式中途被中斷時已完成的部分不會遺失
+        self._file.flush()
+
+    def record_ok(self, uni: str, dept: str, eid: str, data: Dict[str, Any]) -> None:
+        self._append({"eid": eid, "uni": uni, "dept": dept, "status": "ok", "data": data})
+        self.done_eids.add(eid)
+        self.failed_eids.discard(eid)
+
+    def record_failed(self, uni: str, dept: str, eid: str, error: str) -> None:
+        self._append({"eid": eid, "uni": uni, "dept": dept, "status": "failed", "error": error})
+        self.failed_eids.add(eid)
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def compact(self, eids_list: List[Tuple[str, str, str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        壓實日誌：每個 EID 只保留最後一筆紀錄並改寫檔案，
+        同時依 eids_list 的順序組出最終的 { 學校: { 科系: {...} } }。
+        """
+        self.close()
+
+        latest: Dict[str, Dict[str, Any]] = {}
+        for record in self._read_records():
+            latest[record["eid"]] = record
+
+        result: Dict[str, Dict[str, Any]] = {}
+        ordered_records = []
+        missing = []
+
+        for uni, dept, eid in eids_list:
+            result.setdefault(uni, {})
+            record = latest.pop(eid, None)
+            if record is None:
+                missing.append(eid)
+                continue
+            ordered_records.append(record)
+            if record["status"] == "ok":
+                result[uni][dept] = record["data"]
+
+        # 不在這次 EID 列表裡的舊紀錄也保留在日誌中，只是不輸出
+        ordered_records.extend(latest.values())
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in ordered_records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.path)
+
+        failed = [r["eid"] for r in ordered_records if r["status"] != "ok"]
+        print(f"檢查點壓實完成：共 {len(ordered_records)} 筆，失敗 {len(failed)} 筆，未處理 {len(missing)} 筆。")
+        if failed:
+            print(f"失敗的 EID：{', '.join(failed)}")
+        if missing:
+            print(f"未處理的 EID：{', '.join(missing)}")
+
+        return result
@@ -0,0 +1,78 @@
+import asyncio
+import random
+from typing import Dict, List, Tuple
+
+import requests
+
+# --- 重試策略設定 ---
+# 每種錯誤類型在同一輪中最多立即重試幾次 (不含第一次請求)
+RETRY_LIMITS: Dict[str, int] = {
+    "timeout": 3,        # 請求逾時
+    "connection": 3,     # 連線中斷、DNS、被伺服器重設
+    "server_error": 3,   # 5xx
+    "rate_limited": 5,   # 429，伺服器要我們慢一點
+    "client_error": 0,   # 其他 4xx，重試也不會成功
+    "parse_error": 0,    # 拿到頁面但解析失敗 (可能是維護頁面)
+}
+# 不放進重試佇列的錯誤類型
+NON_REQUEUEABLE = {"client_error"}
+
+# 指數退避：第 n 次重試最多等待 min(BACKOFF_MAX, BACKOFF_BASE * 2^n) 秒，實際等待時間在 0 到上限之間隨機 (full jitter)
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# 主爬取結束後，重試佇列最多再處理幾輪
+REQUEUE_ROUNDS = 2
+
+
+def classify_error(error: BaseException) -> str:
+    """將 requests / aiohttp / 解析時的例外歸類為 RETRY_LIMITS 中的錯誤類型。"""
+    # HTTP 狀態碼：aiohttp 放在 error.status，requests 放在 error.response.status_code
+    status = getattr(error, 'status', None)
+    if status is None and getattr(error, 'response', None) is not None:
+        status = getattr(error.response, 'status_code', None)
+
+    if isinstance(status, int):
+        if status == 429:
+            return "rate_limited"
+        if status >= 500:
+            return "server_error"
+        return "client_error"
+
+    # 逾時要先判斷，因為部分逾時例外同時也是連線錯誤的子類別
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, requests.exceptions.Timeout)):
+        return "timeout"
+
+    if isinstance(error, (ConnectionError, requests.exceptions.RequestException)):
+        return "connection"
+
+    try:
+        import aiohttp
+        if isinstance(error, aiohttp.ClientError):
+            return "connection"
+    except ImportError:
+        pass
+
+    return "parse_error"
+
+
+def should_retry(error_class: str, attempt: int) -> bool:
+    """attempt 為已經重試過的次數。"""
+    return attempt < RETRY_LIMITS.get(error_class, 0)
+
+
+def backoff_delay(attempt: int) -> float:
+    """第 attempt 次重試前要等待的秒數 (指數退避加上完整隨機抖動)。"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def print_failure_summary(failures: List[Tuple[str, str, str, str, BaseException]]) -> None:
+    """列出重試佇列清空後仍然失敗的 EID: [(學校, 科系, EID, 錯誤類型, 例外), ...]"""
+    if not failures:
+        print("✅ 所有 EID 都已成功取得。")
+        return
+
+    print(f"\n--- 永久失敗的 EID ({len(failures)} 個) ---")
+    for uni, dept, eid, error_class, error in failures:
+        print(f"EID {eid} ({uni} - {dept}) [{error_class}]：{error!r}")
+    print("-" * 20)
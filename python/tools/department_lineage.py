@@ -0,0 +1,68 @@
+"""
+校系改名的系譜圖。
+
+節點是 (年度, 學校, 系名)，邊來自各年度的 dept_renamed.json
+({ 學校: { 舊系名: [新系名列表] } }，定義前一年的舊名 -> 該年的新名)：
+拆分時一個舊名連到多個新名，合併時多個舊名連到同一個新名，
+沒有出現在改名表裡的系名視為沿用同一個名稱。
+
+每個節點的祖先只會計算一次並記住，之後查任何校系的完整歷史都只是一次查表。
+"""
+from typing import Dict, List, Tuple
+
+
+def _unique(names) -> List[str]:
+    """依第一次出現的順序去除重複的系名。"""
+    return list(dict.fromkeys(names))
+
+
+class DepartmentLineage:
+
+    def __init__(self, rename_maps: Dict[int, Dict[str, Dict[str, List[str]]]], start_year: int):
+        """
+        :param rename_maps: { 年度: 該年度的 dept_renamed.json 內容 }
+        :param start_year: 最早的年份，追溯到這一年為止
+        """
+        self.start_year = start_year
+
+        # 逆向的邊：{ 年度: { 學校: { 新系名: [前一年的舊系名列表] } } }
+        self._parents: Dict[int, Dict[str, Dict[str, List[str]]]] = {}
+        for year, forward_map in rename_maps.items():
+            reverse_map = self._parents.setdefault(year, {})
+            for uni, forward_map_for_uni in forward_map.items():
+                reverse_map_for_uni = reverse_map.setdefault(uni, {})
+                for old_dept_name, new_dept_names in forward_map_for_uni.items():
+                    for new_dept_name in new_dept_names:
+                        reverse_map_for_uni.setdefault(new_dept_name, []).append(old_dept_name)
+
+        self._ancestors: Dict[Tuple[int, str, str], Dict[int, List[str]]] = {}
+
+    def parents(self, year: int, uni: str, dept: str) -> List[str]:
+        """(year, uni, dept) 在 year - 1 年的系名；沒有改名紀錄時就是同一個名稱。"""
+        return self._parents.get(year, {}).get(uni, {}).get(dept, [dept])
+
+    def ancestors(self, year: int, uni: str, dept: str) -> Dict[int, List[str]]:
+        """
+        「這個校系是從哪裡來的」：返回 { 較早的年度: [該年度的系名列表] }，
+        年度由近到遠排列，每年的系名依第一次追溯到的順序排列且不重複。
+        """
+        key = (year, uni, dept)
+        cached = self._ancestors.get(key)
+        if cached is not None:
+            return cached
+
+        result: Dict[int, List[str]] = {}
+        if year > self.start_year:
+            parent_names = self.parents(year, uni, dept)
+            result[year - 1] = _unique(parent_names)
+
+            # 更早的年份由每個上一代的祖先 (已記住) 依序串接後去重
+            deeper: Dict[int, List[str]] = {}
+            for parent in result[year - 1]:
+                for earlier_year, names in self.ancestors(year - 1, uni, parent).items():
+                    deeper.setdefault(earlier_year, []).extend(names)
+            for earlier_year, names in deeper.items():
+                result[earlier_year] = _unique(names)
+
+        self._ancestors[key] = result
+        return result
@@ -0,0 +1,229 @@
+"""
+單一校系、單一年度的錄取紀錄 (result.json 與 historical_result.json 歷年列表中的每一筆)。
+
+原本每一筆都是一個 dict，鍵是「一般考生錄取標準總分」這類很長的中文字串，整合時還要 .copy() 一份。
+YearRecord 改用 __slots__ 存放各欄位：
+    - 科目名稱以 sys.intern 共用，同樣的科目組合共用同一個 tuple
+    - 科目倍數存成 array('d')，而不是每筆一個 {科目: 倍數} 字典
+    - 鍵的順序 (哪些欄位存在) 也是共用的 tuple，不存在的欄位 (例如沒有原住民錄取標準) 不會輸出
+
+to_dict() / to_json() 還原成與原本完全相同的 JSON (鍵的順序、整數與浮點數、None 都相同；
+科目倍數一律是浮點數，與 college_data_transform 產生的相同)，所以檔案格式沒有任何改變。
+寫檔時把 to_json 當成 json.dump 的 default 即可：
+
+    json.dump(data, f, ensure_ascii=False, indent=4, default=department_record.to_json)
+"""
+import sys
+from array import array
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+# (JSON 中的鍵, 屬性名稱)，依 result.json 中的順序
+FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("科目倍數", "multipliers"),
+    ("錄取人數", "admitted"),
+    ("一般考生錄取標準總分", "total"),
+    ("一般考生錄取標準", "standard"),
+    ("原住民考生錄取標準", "indigenous"),
+    ("組別代號", "group_id"),
+    ("達標比例", "percentile"),
+    ("校系名稱", "name"),
+)
+_ATTRIBUTES = dict(FIELDS)
+
+_subject_tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+_subject_sets: Dict[Tuple[str, ...], FrozenSet[str]] = {}
+_layouts: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+# 每種鍵順序的 ((鍵, 屬性名稱或 None), ...)，to_dict 依此輸出
+_plans: Dict[Tuple[str, ...], Tuple[Tuple[str, Optional[str]], ...]] = {}
+_EMPTY_WEIGHTS = array('d')
+
+
+def intern_subjects(subjects: Iterable[str]) -> Tuple[str, ...]:
+    """返回共用的科目 tuple，同樣的科目 (與順序) 永遠拿到同一個物件。"""
+    key = tuple(subjects)
+    cached = _subject_tuples.get(key)
+    if cached is None:
+        cached = _subject_tuples[key] = tuple(sys.intern(subject) for subject in key)
+    return cached
+
+
+def _layout(keys: Iterable[str]) -> Tuple[str, ...]:
+    key = tuple(keys)
+    cached = _layouts.get(key)
+    if cached is None:
+        cached = _layouts[key] = tuple(sys.intern(k) for k in key)
+        _plans[cached] = tuple((k, _ATTRIBUTES.get(k)) for k in cached)
+    return cached
+
+
+class YearRecord:
+
+    __slots__ = ("subjects", "weights", "admitted", "total", "standard", "indigenous", "group_id", "percentile", "name", "_keys", "_extra")
+
+    def __init__(self):
+        self.subjects: Tuple[str, ...] = ()
+        self.weights = array('d')
+        self.admitted: Optional[int] = None
+        self.total: Optional[float] = None
+        self.standard: Optional[float] = None
+        self.indigenous: Optional[float] = None
+        self.group_id: Optional[str] = None
+        self.percentile: Optional[float] = None
+        self.name: Optional[str] = None
+        # 這筆紀錄有哪些鍵 (依輸出順序)，與 FIELDS 以外的欄位
+        self._keys: Tuple[str, ...] = _layout(())
+        self._extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "YearRecord":
+        record = cls.__new__(cls)
+        # 整合時每年要轉換上千筆，常見的欄位直接指定，不逐鍵呼叫 _set
+        multipliers = data.get("科目倍數")
+        if multipliers:
+            record.subjects = intern_subjects(multipliers)
+            record.weights = array('d', multipliers.values())
+        else:
+            record.subjects = ()
+            record.weights = _EMPTY_WEIGHTS
+        record.admitted = data.get("錄取人數")
+        record.total = data.get("一般考生錄取標準總分")
+        record.standard = data.get("一般考生錄取標準")
+        record.indigenous = data.get("原住民考生錄取標準")
+        record.group_id = data.get("組別代號")
+        record.percentile = data.get("達標比例")
+        record.name = data.get("校系名稱")
+        record._keys = _layout(data)
+        record._extra = None
+        for key, attribute in _plans[record._keys]:
+            if attribute is None:
+                record._set(key, data[key])
+        return record
+
+    def _set(self, key: str, value: Any) -> None:
+        attribute = _ATTRIBUTES.get(key)
+        if attribute == "multipliers":
+            self.subjects = intern_subjects(value)
+            self.weights = array('d', value.values())
+        elif attribute is not None:
+            setattr(self, attribute, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        """與 dict 相同的寫法設定欄位，新的鍵加在最後面。"""
+        self._set(key, value)
+        if key not in self._keys:
+            self._keys = _layout(self._keys + (key,))
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+        attribute = _ATTRIBUTES.get(key)
+        if attribute == "multipliers":
+            return self.multipliers
+        if attribute is not None:
+            return getattr(self, attribute)
+        return self._extra[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self._keys else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._keys
+
+    @property
+    def multipliers(self) -> Dict[str, float]:
+        return dict(zip(self.subjects, self.weights))
+
+    @property
+    def subject_set(self) -> FrozenSet[str]:
+        """科目集合 (匹配組別用)，同樣的科目組合共用同一個 frozenset。"""
+        cached = _subject_sets.get(self.subjects)
+        if cached is None:
+            cached = _subject_sets[self.subjects] = frozenset(self.subjects)
+        return cached
+
+    def with_name(self, name: str) -> "YearRecord":
+        """複製一份並設定校系名稱 (整合時記錄當年的系名)，科目與倍數與原本的紀錄共用。"""
+        record = YearRecord.__new__(YearRecord)
+        record.subjects = self.subjects
+        record.weights = self.weights
+        record.admitted = self.admitted
+        record.total = self.total
+        record.standard = self.standard
+        record.indigenous = self.indigenous
+        record.group_id = self.group_id
+        record.percentile = self.percentile
+        record.name = name
+        record._keys = self._keys if "校系名稱" in self._keys else _layout(self._keys + ("校系名稱",))
+        record._extra = self._extra
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        for key, attribute in _plans[self._keys]:
+            if attribute == "multipliers":
+                result[key] = dict(zip(self.subjects, self.weights))
+            elif attribute is not None:
+                result[key] = getattr(self, attribute)
+            else:
+                result[key] = self._extra[key]
+        return result
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, YearRecord):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"YearRecord({self.to_dict()!r})"
+
+
+def to_json(value: Any) -> Any:
+    """json.dump 的 default：把 YearRecord 還原成原本的 dict。"""
+    if isinstance(value, YearRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def from_year_data(year_data: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, YearRecord]]:
+    """一年的 result.json ({ 學校: { 科系: 紀錄 } }) 轉成 YearRecord。已經是 YearRecord 的紀錄直接沿用。"""
+    return {
+        uni: {dept: record if isinstance(record, YearRecord) else YearRecord.from_dict(record) for dept, record in depts.items()}
+        for uni, depts in year_data.items()
+    }
+
+
+def from_historical(historical_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    historical_result.json 中各校系歷年的紀錄列表轉成 [YearRecord]。
+    最新一年 (校系分則，不是列表) 保持原樣。
+    """
+    return {
+        uni: {
+            dept: {
+                year: [YearRecord.from_dict(record) for record in records] if isinstance(records, list) else records
+                for year, records in years_data.items()
+            }
+            for dept, years_data in depts.items()
+        }
+        for uni, depts in historical_data.items()
+    }
+
+
+def to_plain(value: Any) -> Any:
+    """遞迴把所有 YearRecord 換回 dict (給需要純 JSON 結構的程式，例如 compact_json.encode)。"""
+    if isinstance(value, YearRecord):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_plain(item) for item in value]
+    return value
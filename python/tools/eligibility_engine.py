@@ -0,0 +1,186 @@
+"""
+「我的分數 → 可以上哪些校系」查詢引擎。
+
+把 historical_result.json 每一筆歷年錄取紀錄的科目倍數攤成一個矩陣
+(每一列是一筆紀錄，每一欄是一個科目)，查詢時只要一次矩陣乘法就能算出
+學生在每一筆紀錄的加權平均分數，再與該年的一般考生錄取標準相減得到差距，
+每個校系每年取最好的一筆 (合併的舊系名同一年可能有多筆)，再把各年的差距平均，
+分成 safe / match / reach 三個名單。學生沒有考最新一年 (校系分則) 科目倍數中任一科的校系不列出。
+歷年紀錄可以是 dict 或 YearRecord (department_record.from_historical 載入的)。
+"""
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tools.department_record import YearRecord, from_historical
+
+HISTORICAL_FILE = "datas/historical_result.json"
+
+# 各年平均差距 (學生加權平均 - 錄取標準) 的分類門檻，單位與一般考生錄取標準相同
+SAFE_MARGIN = 1.0      # 差距 >= 1.0：safe
+MATCH_MARGIN = -1.0    # -1.0 <= 差距 < 1.0：match
+REACH_MARGIN = -3.0    # -3.0 <= 差距 < -1.0：reach，更低的不列出
+
+CATEGORIES = ("safe", "match", "reach")
+
+
+class EligibilityEngine:
+
+    def __init__(self, historical_data: Dict[str, Any]):
+        subjects: Dict[str, int] = {}
+        departments: List[tuple] = []
+        record_depts: List[int] = []
+        record_years: List[str] = []
+        record_columns: List[List[int]] = []
+        record_weights: List[Sequence[float]] = []
+        record_standards: List[float] = []
+        # 同樣的科目組合 (共用的 tuple) 只換算一次欄位編號
+        columns_by_subjects: Dict[Tuple[str, ...], List[int]] = {}
+
+        # 各校系最新一年 (校系分則) 採計的科目
+        latest_subjects: List[List[int]] = []
+
+        for university, depts in historical_data.items():
+            for department, years_data in depts.items():
+                dept_index = len(departments)
+                departments.append((university, department))
+                latest_subjects.append([])
+
+                for year, records in years_data.items():
+                    # 最新一年還沒有錄取標準 (是 dict 而不是紀錄列表)，只記下要考哪些科目
+                    if not isinstance(records, list):
+                        weights = records.get("科目倍數") or {}
+                        latest_subjects[dept_index] = [
+                            subjects.setdefault(subject, len(subjects)) for subject, multiplier in weights.items() if multiplier > 0
+                        ]
+                        continue
+                    for record in records:
+                        if not isinstance(record, YearRecord):
+                            record = YearRecord.from_dict(record)
+                        standard = record.standard
+                        if not isinstance(standard, (int, float)) or sum(record.weights) <= 0:
+                            continue
+
+                        columns = columns_by_subjects.get(record.subjects)
+                        if columns is None:
+                            columns = columns_by_subjects[record.subjects] = [
+                                subjects.setdefault(subject, len(subjects)) for subject in record.subjects
+                            ]
+                        record_depts.append(dept_index)
+                        record_years.append(year)
+                        record_columns.append(columns)
+                        record_weights.append(record.weights)
+                        record_standards.append(standard)
+
+        self.subjects: List[str] = list(subjects)
+        self.subject_columns = subjects
+        self.departments = departments
+        self.years: List[str] = sorted(set(record_years), reverse=True)
+
+        year_columns = {year: column for column, year in enumerate(self.years)}
+
+        # (紀錄數, 科目數) 的倍數矩陣
+        self.weights = np.zeros((len(record_weights), len(self.subjects)))
+        for row, (columns, weights) in enumerate(zip(record_columns, record_weights)):
+            self.weights[row, columns] = weights
+        self.weight_sums = self.weights.sum(axis=1)
+        self.required = self.weights > 0
+        self.standards = np.array(record_standards, dtype=np.float64)
+        self.record_depts = np.array(record_depts, dtype=np.int64)
+        self.record_years = np.array([year_columns[year] for year in record_years], dtype=np.int64)
+        # (校系數, 科目數)：最新一年要考的科目
+        self.latest_required = np.zeros((len(departments), len(self.subjects)), dtype=bool)
+        for dept_index, columns in enumerate(latest_subjects):
+            self.latest_required[dept_index, columns] = True
+
+    @classmethod
+    def from_file(cls, path: str = HISTORICAL_FILE) -> "EligibilityEngine":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(from_historical(json.load(f)))
+
+    def _student_scores(self, scores: Dict[str, float]) -> np.ndarray:
+        """依科目欄位排好的學生分數，沒有提供的科目為 NaN。"""
+        student = np.full(len(self.subjects), np.nan)
+        for subject, score in scores.items():
+            column = self.subject_columns.get(subject)
+            if column is not None and score is not None:
+                student[column] = score
+        return student
+
+    def margins(self, scores: Dict[str, float], years: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        每一筆紀錄的差距 (學生加權平均 - 該年錄取標準)。
+        學生沒有提供某個必考科目的紀錄、或不在 years 之內的紀錄為 NaN。
+        """
+        student = self._student_scores(scores)
+        missing = np.isnan(student)
+        averages = (self.weights @ np.where(missing, 0.0, student)) / self.weight_sums
+        margins = averages - self.standards
+
+        eligible = ~(self.required & missing).any(axis=1)
+        if years is not None:
+            year_columns = [self.years.index(str(year)) for year in years if str(year) in self.years]
+            eligible &= np.isin(self.record_years, year_columns)
+
+        return np.where(eligible, margins, np.nan)
+
+    def query(self, scores: Dict[str, float], years: Optional[Sequence[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        依各年差距 (每年取最好的一筆) 的平均把校系分成 safe / match / reach，各名單依差距由大到小排序。
+        每一筆為 {"學校", "科系", "差距", "各年差距": {年度: 差距}}。
+        學生沒有考最新一年任一採計科目的校系今年不能報，即使過去幾年的差距夠也不列出。
+        """
+        margins = self.margins(scores, years)
+        valid = ~np.isnan(margins)
+
+        # 每個校系每年取最好的一筆 (合併的舊系名可能同一年有多筆)，每年只算一次
+        depts = self.record_depts[valid]
+        per_year = np.full((len(self.departments), len(self.years)), -np.inf)
+        np.maximum.at(per_year, (depts, self.record_years[valid]), margins[valid])
+
+        has_year = per_year != -np.inf
+        counts = has_year.sum(axis=1)
+        totals = np.where(has_year, per_year, 0.0).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_margins = totals / counts
+
+        # 缺最新一年採計科目的校系設為 NaN，不會落在任何分類
+        missing = np.isnan(self._student_scores(scores))
+        mean_margins[(self.latest_required & missing).any(axis=1)] = np.nan
+
+        categories = np.full(len(self.departments), -1)
+        categories[mean_margins >= REACH_MARGIN] = 2
+        categories[mean_margins >= MATCH_MARGIN] = 1
+        categories[mean_margins >= SAFE_MARGIN] = 0
+
+        result: Dict[str, List[Dict[str, Any]]] = {category: [] for category in CATEGORIES}
+        # 沒有任何可比較紀錄的校系平均差距是 NaN，不會落在任何分類
+        listed = np.flatnonzero(categories >= 0)
+        for dept_index in listed[np.argsort(-mean_margins[listed], kind='stable')]:
+            university, department = self.departments[dept_index]
+            result[CATEGORIES[categories[dept_index]]].append({
+                "學校": university,
+                "科系": department,
+                "差距": round(float(mean_margins[dept_index]), 2),
+                "各年差距": {
+                    year: round(float(per_year[dept_index, column]), 2)
+                    for column, year in enumerate(self.years)
+                    if per_year[dept_index, column] != -np.inf
+                },
+            })
+
+        return result
+
+
+# =======================================================
+# 執行腳本
+# =======================================================
+if __name__ == "__main__":
+    engine = EligibilityEngine.from_file()
+    sample_scores = {"國文": 45, "英文": 50, "數甲": 40, "物理": 42, "化學": 44, "生物": 38}
+    ranked = engine.query(sample_scores)
+    for category in CATEGORIES:
+        print(f"--- {category} ({len(ranked[category])} 個校系) ---")
+        for entry in ranked[category][:10]:
+            print(f"{entry['學校']} {entry['科系']}：差距 {entry['差距']} {entry['各年差距']}")
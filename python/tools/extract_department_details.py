@@ -1,7 +1,12 @@
 from bs4 import BeautifulSoup
 import json
 import re
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, Iterable
+try:
+    from tools.fast_table_parser import find_first_table
+except ImportError:
+    # 直接執行本檔 (python tools/extract_department_details.py) 時 tools 不在路徑上
+    from fast_table_parser import find_first_table
 
 # 假定 HTML 檔案路徑
 HTML_FILE = 'input_table.html'
@@ -18,6 +23,13 @@ SUBJECT_ABBR_MAP = {
     "地理": "地理", "公民與社會": "公民", "英聽": "英聽"
 }
 
+# 解析後端：
+#   "html.parser" - 原本的 BeautifulSoup 整頁建樹，學測標準欄位再解析一次
+#   "fast"        - tools.fast_table_parser，只建第一個 <table>，學測標準直接讀儲存格
+# 兩者輸出應完全相同，懷疑有差異時可以用 check_parser_backends.py 對快取頁面做比對
+PARSER_BACKEND = "fast"
+PARSER_BACKENDS = ("html.parser", "fast")
+
 # --- 輔助解析函數 ---
 
 def full_to_half_width(text: str) -> str:
@@ -55,16 +67,23 @@ def parse_criteria(criteria_html: str) -> Dict[str, str]:
     解析學測檢定標準，基於 <li> 標籤，並處理 "或" 邏輯，
     將所有參採的科目都展開，且標準值不移除尾部的 "級"。
     """
-    criteria: Dict[str, str] = {}
-    
     # 1. 解析 HTML 片段以找到所有列表項 (li)
     soup = BeautifulSoup(criteria_html, 'html.parser')
     # 為了能處理 <br> 換行，我們也將其視為列表項，但主要目標仍是 <li>
     list_items = soup.find_all(['li', 'div']) 
 
-    for item in list_items:
-        # 獲取單個 <li> 的文本內容
-        item_text_raw = item.get_text(strip=True)
+    # 獲取每個 <li> 的文本內容
+    return parse_criteria_items(item.get_text(strip=True) for item in list_items)
+
+
+def parse_criteria_items(item_texts: Iterable[str]) -> Dict[str, str]:
+    """
+    parse_criteria 的規則部分：輸入每個 <li>/<div> 的文字 (get_text(strip=True))，
+    讓兩種解析後端共用同一套 "或" 與 科目(標準) 的處理。
+    """
+    criteria: Dict[str, str] = {}
+
+    for item_text_raw in item_texts:
         
         # 2. 轉換和清理：僅針對 *整個文本塊* 進行半形和空格移除，確保解析成功
         item_text_cleaned = full_to_half_width(item_text_raw)
@@ -146,21 +165,37 @@ def extract_university_name(soup: BeautifulSoup) -> Tuple[str, str]:
     return "未知學校", target_div.get_text(strip=True) if target_div else "未知科系"
 
 
-def extract_table_data(html_content, uni_name, dept_name):
-    """主函數：提取 HTML 表格中的科系數據。"""
+def extract_table_data(html_content, uni_name, dept_name, backend=None):
+    """
+    主函數：提取 HTML 表格中的科系數據。
+    backend 未指定時使用 PARSER_BACKEND。
+    """
+    backend = backend or PARSER_BACKEND
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"未知的解析後端：{backend}，可用的有 {PARSER_BACKENDS}")
 
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
     # 1. 提取學校名稱
     print(f"解析到的校系：{uni_name} - {dept_name}")
     
     # 2. 找到主表格
-    table = soup.find('table')
+    if backend == "fast":
+        table = find_first_table(html_content)
+    else:
+        soup = BeautifulSoup(html_content, 'html.parser')
+        table = soup.find('table')
+
     if not table:
         print("錯誤：未找到表格。")
         return
-    # 最終輸出的數據結構
-    output_data = {uni_name: {}}
+
+    return _extract_from_table(table, backend)
+
+
+def _extract_from_table(table, backend):
+    """
+    從主表格提取科系數據。table 可以是 bs4 的 Tag，也可以是 fast_table_parser.Element，
+    兩者提供相同的 find_all / attrs / get / contents / get_text 介面。
+    """
     
     # 直接在 table 下查找所有 tr
     rows = table.find_all('tr')
@@ -187,8 +222,14 @@ def extract_table_data(html_content, uni_name, dept_name):
             criteria_cell = cells[5]
             
             # 提取並解析學測檢定標準
-            criteria_html = str(criteria_cell.contents)
-            parsed_criteria = parse_criteria(criteria_html)
+            if backend == "fast":
+                # 直接讀儲存格內的 <li>/<div>，與把 contents 轉成字串再解析一次的結果相同
+                parsed_criteria = parse_criteria_items(
+                    item.get_text(strip=True) for item in criteria_cell.find_all(['li', 'div'])
+                )
+            else:
+                criteria_html = str(criteria_cell.contents)
+                parsed_criteria = parse_criteria(criteria_html)
             current_dept_info = {
                 "核定人數": int(cells[2].contents[0]),
                 "學測標準": parsed_criteria,
@@ -0,0 +1,222 @@
+"""
+只建出頁面中第一個 <table> 的輕量解析器，供 extract_table_data 的 "fast" 後端使用。
+
+切分標籤、實體與字串的規則完全比照 BeautifulSoup(html, 'html.parser')：
+同一個標準函式庫 HTMLParser 分詞、標籤的開關依 html_tree_rules (不自動補關閉標籤，
+<li> 沒關就一路巢狀下去)、空元素立即關閉、實體用 bs4 的對照表轉換。
+差別只在 <table> 以外的節點不建立物件，而且表格一關閉就停止解析，
+所以輸出與 html.parser 後端相同，但省下整棵樹的建構與第二次解析。
+"""
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Union
+
+from bs4.dammit import EntitySubstitution, UnicodeDammit
+
+try:
+    from tools.html_tree_rules import EMPTY_ELEMENT_TAGS, STRING_CONTAINER_TAGS, OpenTagStack
+except ImportError:
+    from html_tree_rules import EMPTY_ELEMENT_TAGS, STRING_CONTAINER_TAGS, OpenTagStack
+
+_DECIMAL_REFERENCE = re.compile("^([0-9]+)(.*)")
+_HEX_REFERENCE = re.compile("^([0-9a-f]+)(.*)")
+
+
+class TextString(str):
+    """一般文字 (與 CDATA)，對應 get_text() 會收集的 NavigableString。"""
+
+
+class IgnoredString(str):
+    """註解、宣告、<script>/<style> 內容等，get_text() 不會收集。"""
+
+
+class Element:
+    """
+    表格內的元素節點，提供 extract_table_data 用到的那一小部分 bs4 Tag 介面：
+    attrs / get / contents / find_all / get_text。
+    """
+    __slots__ = ('name', 'attrs', 'contents')
+
+    def __init__(self, name: str, attrs: Dict[str, str]):
+        self.name = name
+        self.attrs = attrs
+        self.contents: List[Union["Element", str]] = []
+
+    def __len__(self) -> int:
+        # 與 bs4 的 Tag 一樣，沒有子節點的元素視為 False
+        return len(self.contents)
+
+    def get(self, key: str, default=None):
+        return self.attrs.get(key, default)
+
+    def find_all(self, name) -> List["Element"]:
+        """依文件順序返回所有符合標籤名稱的子孫元素 (不含自己)。"""
+        names = {name} if isinstance(name, str) else set(name)
+        found = []
+        stack = list(reversed(self.contents))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Element):
+                if node.name in names:
+                    found.append(node)
+                stack.extend(reversed(node.contents))
+        return found
+
+    def get_text(self, strip: bool = False) -> str:
+        pieces = []
+        stack = list(reversed(self.contents))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Element):
+                stack.extend(reversed(node.contents))
+            elif isinstance(node, TextString):
+                if strip:
+                    node = node.strip()
+                    if not node:
+                        continue
+                pieces.append(str(node))
+        return "".join(pieces)
+
+
+class _TableFinished(Exception):
+    """第一個表格已經關閉，後面的內容不需要再解析。"""
+
+
+class _FirstTableBuilder(HTMLParser):
+
+    def __init__(self):
+        # 與 bs4 相同：自己處理字元參照，才能得到一樣的文字切分
+        super().__init__(convert_charrefs=False)
+        self.table: Optional[Element] = None
+        # 所有開啟中的標籤 (表格外的只記名稱，元素為 None)
+        self._open_tags = OpenTagStack()
+        self._container_depth = 0
+        self._already_closed_empty_element: List[str] = []
+        self._data: List[str] = []
+
+    # --- 樹的維護 ---
+
+    def _current_element(self) -> Optional[Element]:
+        top = self._open_tags.top()
+        return top[1] if top else None
+
+    def _end_data(self, string_class=None) -> None:
+        if not self._data:
+            return
+        data = "".join(self._data)
+        self._data = []
+
+        parent = self._current_element()
+        if parent is None:
+            return
+
+        if string_class is None:
+            string_class = IgnoredString if self._container_depth else TextString
+        parent.contents.append(string_class(data))
+
+    def _push(self, name: str, attrs: Dict[str, str]) -> None:
+        parent = self._current_element()
+        element = None
+
+        if parent is not None:
+            element = Element(name, attrs)
+            parent.contents.append(element)
+        elif name == 'table' and self.table is None:
+            element = self.table = Element(name, attrs)
+
+        self._open_tags.push(name, element)
+        if name in STRING_CONTAINER_TAGS:
+            self._container_depth += 1
+
+    def _pop_to_tag(self, name: str) -> None:
+        for popped_name, element in self._open_tags.pop_to(name):
+            if popped_name in STRING_CONTAINER_TAGS:
+                self._container_depth -= 1
+            if element is not None and element is self.table:
+                raise _TableFinished
+
+    # --- HTMLParser 事件 ---
+
+    def handle_starttag(self, tag, attrs, handle_empty_element=True):
+        attr_dict: Dict[str, str] = {}
+        for key, value in attrs:
+            attr_dict[key] = "" if value is None else value
+
+        self._end_data()
+        self._push(tag, attr_dict)
+
+        if tag in EMPTY_ELEMENT_TAGS and handle_empty_element:
+            self.handle_endtag(tag, check_already_closed=False)
+            self._already_closed_empty_element.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_empty_element=False)
+        self.handle_endtag(tag, check_already_closed=False)
+
+    def handle_endtag(self, tag, check_already_closed=True):
+        if check_already_closed and tag in self._already_closed_empty_element:
+            self._already_closed_empty_element.remove(tag)
+        else:
+            self._end_data()
+            self._pop_to_tag(tag)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_charref(self, name):
+        base, reg = 10, _DECIMAL_REFERENCE
+        if name.startswith(('x', 'X')):
+            name = name[1:]
+            base, reg = 16, _HEX_REFERENCE
+
+        code_point = None
+        extra_data = ""
+        try:
+            code_point = int(name, base)
+        except ValueError:
+            match = reg.search(name)
+            if match is not None:
+                code_point = int(match.group(1), base)
+                extra_data = match.group(2)
+
+        if code_point is None:
+            self.handle_data(name)
+            return
+        self.handle_data(UnicodeDammit.numeric_character_reference(code_point)[0])
+        self.handle_data(extra_data)
+
+    def handle_entityref(self, name):
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else "&%s" % name)
+
+    def _handle_special_string(self, data: str, string_class) -> None:
+        self._end_data()
+        self._data.append(data)
+        self._end_data(string_class)
+
+    def handle_comment(self, data):
+        self._handle_special_string(data, IgnoredString)
+
+    def handle_decl(self, decl):
+        self._handle_special_string(decl, IgnoredString)
+
+    def unknown_decl(self, data):
+        if data.upper().startswith("CDATA["):
+            self._handle_special_string(data[len("CDATA["):], TextString)
+        else:
+            self._handle_special_string(data, IgnoredString)
+
+    def handle_pi(self, data):
+        self._handle_special_string(data, IgnoredString)
+
+
+def find_first_table(html_content: str) -> Optional[Element]:
+    """解析 HTML 並返回第一個 <table> (與 soup.find('table') 相同的子樹)，沒有表格則返回 None。"""
+    builder = _FirstTableBuilder()
+    try:
+        builder.feed(html_content)
+        builder.close()
+        builder._end_data()
+    except _TableFinished:
+        pass
+    return builder.table
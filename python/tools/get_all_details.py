@@ -1,69 +1,476 @@
+import asyncio
 import requests
 import json
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional, Iterable, Iterator
 import time
 from tools.extract_department_details import extract_table_data
+from tools import instrumentation
+from tools.response_cache import ResponseCache
+from tools.crawl_checkpoint import CrawlCheckpoint
+from tools.crawl_retry import (
+    REQUEUE_ROUNDS, NON_REQUEUEABLE,
+    classify_error, should_retry, backoff_delay, print_failure_summary
+)
 
 # --- 設定常數 ---
 POST_URL = 'https://uac2.ncku.edu.tw/cross_search/index.php?c=search&m=detail'
 
-def get_department_html_responses(eids_data) -> List[Tuple[str, str, str, str]]:
-    """
-    遍歷所有 EID，發送 POST 請求，並返回包含所有 HTML 響應的列表。
-    
-    返回: [ (學校名稱, 科系名稱, EID, HTML內容), ... ]
-    """
-    # 展開 EID 列表，以 university/department 為單位
+# Headers 模擬瀏覽器
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Content-Type': 'application/x-www-form-urlencoded',
+}
+REQUEST_TIMEOUT = 10
+# 同步版每個請求之後的延遲，避免被伺服器封鎖 (建議 0.5 到 1 秒)
+REQUEST_DELAY = 0.5
+
+# --- 非同步爬取設定 ---
+# 爬的是考分會 (UAC) 的公開查詢系統，一年只跑一次，不值得為了快幾分鐘被封鎖或拖慢別人查詢，
+# 所以總請求速率刻意維持在同步版的水準 (每個請求後 sleep(0.5) → 每秒最多 2 個請求)。
+# 全部重新爬取的時間幾乎只由 REQUESTS_PER_SECOND 決定：約 1,900 個校系 / 每秒 2 個 ≈ 16 分鐘
+# (同步版還要再加上每個請求的回應時間)；快取命中與檢查點中已完成的 EID 不算在內。
+#
+# 調整方式：想更快就調高 REQUESTS_PER_SECOND (例如 5 → 約 6.5 分鐘)，MAX_CONCURRENCY 要跟著至少
+# 達到 REQUESTS_PER_SECOND × 平均回應秒數，不然 worker 都在等回應，用不完速率預算；
+# 反過來 MAX_CONCURRENCY 調得再高也不會超過 REQUESTS_PER_SECOND。失敗摘要開始出現 rate_limited (HTTP 429) 或連線錯誤就調回來。
+
+# 同時進行中的請求數上限 (worker 數量)，預設可以容納每個回應 4 秒還跑滿每秒 2 個請求
+MAX_CONCURRENCY = 8
+# 所有 worker 共用的每秒請求數預算
+REQUESTS_PER_SECOND = 2.0
+# 權杖桶容量：允許瞬間連發的請求數，設為 1 代表請求之間嚴格間隔 1 / REQUESTS_PER_SECOND 秒
+RATE_LIMIT_BURST = 1
+
+
+def flatten_eids(eids_data) -> List[Tuple[str, str, str]]:
+    """將 {學校: {科系: EID}} 展開為 [(學校, 科系, EID), ...]。"""
     eids_list = []
     for uni, depts in eids_data.items():
         for dept, eid in depts.items():
             eids_list.append((uni, dept, eid))
+    return eids_list
+
+
+def iter_eids(eids_data) -> Iterator[Tuple[str, str, str]]:
+    """
+    逐筆讀取 (學校, 科系, EID)。eids_data 可以是 {學校: {科系: EID}}，
+    也可以是任何產生 (學校, 科系, EID) 的可迭代物件 (例如 iter_department_eids 的串流)。
+    """
+    if isinstance(eids_data, dict):
+        return iter(flatten_eids(eids_data))
+    return iter(eids_data)
+
+
+def _open_checkpoint(
+    checkpoint_path: Optional[str],
+    cache: Optional[ResponseCache]
+) -> Tuple[Optional[CrawlCheckpoint], Optional[CrawlCheckpoint]]:
+    """
+    返回 (寫入結果用的檢查點, 用來略過已完成 EID 的檢查點)。
+    離線模式是為了用新的解析程式重新解析快取，檢查點中已完成的 EID 是舊程式解析的，
+    所以不略過任何 EID，新的結果照樣寫進檢查點並蓋過舊的紀錄 (同一個 EID 以最後一行為準)；
+    不在快取中的 EID 則保留檢查點中原本的結果。
+    """
+    if not checkpoint_path:
+        return None, None
+    checkpoint = CrawlCheckpoint(checkpoint_path)
+    if cache and cache.offline:
+        print(f"離線重新解析：不略過檢查點中已完成的 {len(checkpoint.done_eids)} 個 EID，全部用目前的解析程式重新解析。")
+        return checkpoint, None
+    print(f"從檢查點恢復：已完成 {len(checkpoint.done_eids)} 個 EID，略過不再請求。")
+    return checkpoint, checkpoint
+
+
+def _count_pending(eids_data, checkpoint: Optional[CrawlCheckpoint]) -> Optional[int]:
+    """事先可以知道數量時返回待處理的 EID 數，串流輸入則返回 None (邊讀邊爬，總數未知)。"""
+    if isinstance(eids_data, dict):
+        items = flatten_eids(eids_data)
+    elif hasattr(eids_data, '__len__'):
+        items = eids_data
+    else:
+        return None
+    return sum(1 for item in items if not checkpoint or item[2] not in checkpoint.done_eids)
+
+
+def _pending_eids(
+    eids_data,
+    checkpoint: Optional[CrawlCheckpoint],
+    seen: List[Tuple[str, str, str]]
+) -> Iterator[Tuple[int, Tuple[str, str, str]]]:
+    """
+    逐筆產生 (索引, (學校, 科系, EID))，略過檢查點中已成功的 EID。
+    讀到的每一筆都依序記在 seen，爬完後用來依原始順序組回結果。
+    """
+    for item in iter_eids(eids_data):
+        index = len(seen)
+        seen.append(item)
+        if checkpoint and item[2] in checkpoint.done_eids:
+            continue
+        yield index, item
+
+
+class PageNotParsedError(Exception):
+    """取得了頁面，但 extract_table_data 找不到校系表格。"""
+
+
+def _parse_page(html_content: str, expected_uni: str, expected_dept: str, eid: str) -> Dict[str, Any]:
+    with instrumentation.stage("解析頁面", unit="頁", track_memory=False) as stage:
+        dept_info = extract_table_data(html_content, expected_uni, expected_dept)
+        stage.add()
+    if dept_info is None:
+        raise PageNotParsedError(f"EID {eid} 的頁面中找不到校系表格")
+    dept_info["id"] = eid
+    return dept_info
+
 
-    total_eids = len(eids_list)
-    print(f"總共找到 {total_eids} 個 EID 準備發送請求。")
+def _parse_and_cache(cache: Optional[ResponseCache], from_cache: bool, html_content: str, expected_uni: str, expected_dept: str, eid: str) -> Dict[str, Any]:
+    """
+    解析頁面並把結果記到快取：剛取得的頁面不論能否解析都存起來 (附上是否解析成功)，
+    修好解析器後還能用快取離線重新解析；快取中的頁面則更新它的解析狀態。
+    解析失敗的頁面 (例如維護頁面) 連線時不會再從快取讀到，重試或放回重試佇列時會重新向伺服器取得。
+    """
+    try:
+        dept_info = _parse_page(html_content, expected_uni, expected_dept, eid)
+    except Exception:
+        if cache:
+            if from_cache:
+                cache.set_parsed(eid, False)
+            else:
+                cache.put(eid, html_content, parsed=False)
+        raise
+
+    if cache:
+        if from_cache:
+            cache.set_parsed(eid, True)
+        else:
+            cache.put(eid, html_content)
+    return dept_info
+
+
+def _fetch_and_parse(session, cache: Optional[ResponseCache], expected_uni: str, expected_dept: str, eid: str) -> Tuple[Dict[str, Any], bool]:
+    """取得並解析單一 EID，返回 (解析結果, 是否來自快取)。失敗時直接拋出例外。"""
+    html_content = cache.get(eid) if cache else None
+    from_cache = html_content is not None
+
+    if not from_cache:
+        try:
+            with instrumentation.stage("網路請求", unit="頁", track_memory=False) as stage:
+                # 執行 POST 請求
+                response = session.post(POST_URL, data={'dep_id': eid}, headers=REQUEST_HEADERS, timeout=REQUEST_TIMEOUT)
+                response.raise_for_status() # 對 HTTP 錯誤碼拋出異常
+                # 設置正確的編碼，確保中文不亂碼
+                response.encoding = 'utf-8'
+                html_content = response.text
+                stage.add()
+        finally:
+            # 不論成功與否都已經打過伺服器一次，設置延遲以避免被封鎖
+            with instrumentation.stage("限速等待", track_memory=False):
+                time.sleep(REQUEST_DELAY)
+
+    dept_info = _parse_and_cache(cache, from_cache, html_content, expected_uni, expected_dept, eid)
+    return dept_info, from_cache
+
+
+def _crawl_one(session, cache: Optional[ResponseCache], expected_uni: str, expected_dept: str, eid: str):
+    """
+    依重試策略處理單一 EID。
+    返回 (解析結果, 是否來自快取, None) 或 (None, False, (錯誤類型, 例外))。
+    """
+    attempt = 0
+    while True:
+        try:
+            dept_info, from_cache = _fetch_and_parse(session, cache, expected_uni, expected_dept, eid)
+            return dept_info, from_cache, None
+        except Exception as e:
+            error_class = classify_error(e)
+            if not should_retry(error_class, attempt):
+                return None, False, (error_class, e)
+
+            delay = backoff_delay(attempt)
+            attempt += 1
+            print(f"重試：EID {eid} ({expected_uni} - {expected_dept}) 發生 {error_class}，{delay:.1f} 秒後第 {attempt} 次重試：{e!r}")
+            time.sleep(delay)
+
+
+def get_department_html_responses(
+    eids_data,
+    cache: Optional[ResponseCache] = None,
+    checkpoint_path: Optional[str] = None
+) -> List[Tuple[str, str, str, str]]:
+    """
+    遍歷所有 EID，發送 POST 請求，並返回包含所有 HTML 響應的列表。
+    有提供 cache 時先讀快取，只有快取未命中才發送請求 (離線模式則直接略過)。
+    有提供 checkpoint_path 時每個 EID 處理完就寫入 JSONL 檢查點，不在記憶體中累積結果，
+    重新執行時只處理尚未成功的 EID，最後由檢查點壓實出完整結果。
+
+    失敗的請求依 tools.crawl_retry 的策略以指數退避立即重試，仍失敗的放進重試佇列，
+    在主爬取結束後再處理 REQUEUE_ROUNDS 輪，最後列出永久失敗的 EID。
+    
+    返回: [ (學校名稱, 科系名稱, EID, HTML內容), ... ]
+    """
+    checkpoint, resume_from = _open_checkpoint(checkpoint_path, cache)
+    total_eids = _count_pending(eids_data, resume_from)
+    total_label = total_eids if total_eids is not None else "?"
+    print(f"總共找到 {total_label} 個 EID 準備發送請求。")
     
     # 設定會話以重用連線
     session = requests.Session()
-    
-    # Headers 模擬瀏覽器
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Content-Type': 'application/x-www-form-urlencoded',
-    }
 
     result = {}
+    # 所有讀到的 EID (包含檢查點已完成的)，依讀取順序排列
+    all_eids_list: List[Tuple[str, str, str]] = []
+
+    finished = 0
+    # 第一輪直接消化 EID 串流，不必等全部讀完才開始請求
+    pending: Iterable[Tuple[int, Tuple[str, str, str]]] = _pending_eids(eids_data, resume_from, all_eids_list)
+    failures = []
+
+    for round_no in range(REQUEUE_ROUNDS + 1):
+        if round_no > 0:
+            if not pending:
+                break
+            print(f"\n--- 處理重試佇列 (第 {round_no} 輪，共 {len(pending)} 個 EID) ---")
+
+        requeue = []
+        for index, (expected_uni, expected_dept, eid) in pending:
+            result.setdefault(expected_uni, {})
 
-    for index, (expected_uni, expected_dept, eid) in enumerate(eids_list):
-        
-        post_data = {
-            'dep_id': eid
-        }
+            if cache and cache.offline and cache.get(eid) is None:
+                print(f"略過：EID {eid} 不在快取中，離線模式不發送請求 ({expected_uni} - {expected_dept})")
+                continue
 
-        if(result.get(expected_uni, None) == None):
-            result[expected_uni] = {}
-        
+            dept_info, from_cache, error = _crawl_one(session, cache, expected_uni, expected_dept, eid)
+
+            if error is None:
+                if checkpoint:
+                    checkpoint.record_ok(expected_uni, expected_dept, eid, dept_info)
+                else:
+                    result[expected_uni][expected_dept] = dept_info
+
+                finished += 1
+                source = "快取" if from_cache else "伺服器"
+                print(f"進度：({finished}/{total_label}) 成功獲取 EID {eid} ({expected_uni} - {expected_dept}) [{source}]")
+                continue
+
+            error_class, e = error
+            print(f"錯誤：EID {eid} 處理失敗 ({expected_uni} - {expected_dept}) [{error_class}]：{e}")
+            if error_class in NON_REQUEUEABLE or round_no == REQUEUE_ROUNDS:
+                failures.append((expected_uni, expected_dept, eid, error_class, e))
+            else:
+                requeue.append((index, (expected_uni, expected_dept, eid)))
+
+        pending = requeue
+
+    for expected_uni, expected_dept, eid, error_class, e in failures:
+        if checkpoint:
+            checkpoint.record_failed(expected_uni, expected_dept, eid, f"{error_class}: {e!r}")
+
+    print(f"\n✅ 完成所有 {len(all_eids_list)} 個 EID，成功 {finished} 個。")
+    print_failure_summary(failures)
+
+    if checkpoint:
+        return checkpoint.compact(all_eids_list)
+
+    return result
+
+
+# =======================================================
+# 非同步版本
+# =======================================================
+
+class TokenBucket:
+    """
+    權杖桶限流器，由所有 worker 共用。
+    每秒補充 rate 個權杖，最多累積 capacity 個；每個請求發出前須先取得一個權杖。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # 用鎖讓等待中的 worker 依序取得權杖，避免同時醒來後一起超發
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def _fetch_and_parse_async(session, bucket: TokenBucket, cache: Optional[ResponseCache], expected_uni: str, expected_dept: str, eid: str) -> Tuple[Dict[str, Any], bool]:
+    """_fetch_and_parse 的非同步版本，只有真的要連線時才消耗權杖。"""
+    html_content = cache.get(eid) if cache else None
+    from_cache = html_content is not None
+
+    if not from_cache:
+        with instrumentation.stage("限速等待", track_memory=False):
+            await bucket.acquire()
+        with instrumentation.stage("網路請求", unit="頁", track_memory=False) as stage:
+            async with session.post(POST_URL, data={'dep_id': eid}) as response:
+                response.raise_for_status() # 對 HTTP 錯誤碼拋出異常
+                # 指定編碼，確保中文不亂碼
+                html_content = await response.text(encoding='utf-8')
+            stage.add()
+    dept_info = _parse_and_cache(cache, from_cache, html_content, expected_uni, expected_dept, eid)
+    return dept_info, from_cache
+
+
+async def _crawl_one_async(session, bucket: TokenBucket, cache: Optional[ResponseCache], expected_uni: str, expected_dept: str, eid: str):
+    """_crawl_one 的非同步版本，退避等待時不佔用權杖，其他 worker 可以繼續工作。"""
+    attempt = 0
+    while True:
         try:
-            # 執行 POST 請求
-            response = session.post(POST_URL, data=post_data, headers=headers, timeout=10)
-            response.raise_for_status() # 對 HTTP 錯誤碼拋出異常
-            
-            # 設置正確的編碼，確保中文不亂碼
-            response.encoding = 'utf-8' 
-            html_content = response.text
-            result[expected_uni][expected_dept] = extract_table_data(html_content, expected_uni, expected_dept)
-            result[expected_uni][expected_dept]["id"] = eid
-
-            print(f"進度：({index + 1}/{total_eids}) 成功獲取 EID {eid} ({expected_uni} - {expected_dept}) ")
-            
-        except requests.exceptions.RequestException as e:
-            print(f"錯誤：EID {eid} 請求失敗 ({expected_uni} - {expected_dept})：{e}")
+            dept_info, from_cache = await _fetch_and_parse_async(session, bucket, cache, expected_uni, expected_dept, eid)
+            return dept_info, from_cache, None
         except Exception as e:
-            print(f"一般錯誤：EID {eid} 處理失敗 ({expected_uni} - {expected_dept})：{e}")
-            
-        # 設置延遲以避免被伺服器封鎖 (建議 0.5 到 1 秒)
-        time.sleep(0.5) 
+            error_class = classify_error(e)
+            if not should_retry(error_class, attempt):
+                return None, False, (error_class, e)
 
-    print(f"\n✅ 完成所有 {total_eids} 個請求。")
+            delay = backoff_delay(attempt)
+            attempt += 1
+            print(f"重試：EID {eid} ({expected_uni} - {expected_dept}) 發生 {error_class}，{delay:.1f} 秒後第 {attempt} 次重試：{e!r}")
+            await asyncio.sleep(delay)
+
+
+async def _crawl_async(
+    pending: Iterable[Tuple[int, Tuple[str, str, str]]],
+    total_label,
+    max_concurrency: int,
+    requests_per_second: float,
+    cache: Optional[ResponseCache],
+    checkpoint: Optional[CrawlCheckpoint]
+) -> Tuple[Dict[int, Dict[str, Any]], List[Tuple[str, str, str, str, BaseException]], int]:
+    """
+    以固定數量的 worker 消化佇列中的 EID，返回 ({ 原始索引: 解析結果 }, 永久失敗列表, 成功數)。
+    pending 可以是還在讀取中的 EID 串流：由一個生產者逐筆放進有上限的佇列，
+    worker 拿到第一筆就開始請求，不必等全部 EID 讀完。
+    有檢查點時結果直接寫入檢查點，返回的字典是空的。
+    主佇列清空後，重試佇列再交給同一組 worker 處理 REQUEUE_ROUNDS 輪。
+    """
+    import aiohttp
+
+    bucket = TokenBucket(requests_per_second, RATE_LIMIT_BURST)
+
+    parsed: Dict[int, Dict[str, Any]] = {}
+    failures = []
+    finished = 0
+
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    # 連線數上限與 worker 數一致，會話內重用連線
+    connector = aiohttp.TCPConnector(limit=max_concurrency)
+
+    async with aiohttp.ClientSession(headers=REQUEST_HEADERS, timeout=timeout, connector=connector) as session:
+
+        async def run_round(items, round_no: int):
+            nonlocal finished
+            # 佇列有上限，生產者讀得比 worker 消化得快時會在這裡等，不會把整個串流讀進記憶體
+            queue: asyncio.Queue = asyncio.Queue(maxsize=max_concurrency * 2)
+            requeue = []
+
+            async def producer() -> None:
+                for item in items:
+                    await queue.put(item)
+                    # 讓出控制權，worker 可以在讀取下一筆之前先發出請求
+                    await asyncio.sleep(0)
+                # 每個 worker 一個結束訊號
+                for _ in range(max_concurrency):
+                    await queue.put(None)
+
+            async def worker() -> None:
+                nonlocal finished
+                while True:
+                    entry = await queue.get()
+                    if entry is None:
+                        return
+                    index, (expected_uni, expected_dept, eid) = entry
+
+                    if cache and cache.offline and cache.get(eid) is None:
+                        print(f"略過：EID {eid} 不在快取中，離線模式不發送請求 ({expected_uni} - {expected_dept})")
+                        continue
+
+                    dept_info, from_cache, error = await _crawl_one_async(session, bucket, cache, expected_uni, expected_dept, eid)
+
+                    if error is None:
+                        if checkpoint:
+                            checkpoint.record_ok(expected_uni, expected_dept, eid, dept_info)
+                        else:
+                            parsed[index] = dept_info
+
+                        finished += 1
+                        source = "快取" if from_cache else "伺服器"
+                        print(f"進度：({finished}/{total_label}) 成功獲取 EID {eid} ({expected_uni} - {expected_dept}) [{source}]")
+                        continue
+
+                    error_class, e = error
+                    print(f"錯誤：EID {eid} 處理失敗 ({expected_uni} - {expected_dept}) [{error_class}]：{e!r}")
+                    if error_class in NON_REQUEUEABLE or round_no == REQUEUE_ROUNDS:
+                        failures.append((expected_uni, expected_dept, eid, error_class, e))
+                    else:
+                        requeue.append((index, (expected_uni, expected_dept, eid)))
+
+            await asyncio.gather(producer(), *(worker() for _ in range(max_concurrency)))
+            return requeue
+
+        for round_no in range(REQUEUE_ROUNDS + 1):
+            if round_no > 0:
+                if not pending:
+                    break
+                print(f"\n--- 處理重試佇列 (第 {round_no} 輪，共 {len(pending)} 個 EID) ---")
+            pending = await run_round(pending, round_no)
+
+    return parsed, failures, finished
+
+
+def get_department_html_responses_async(
+    eids_data,
+    max_concurrency: int = MAX_CONCURRENCY,
+    requests_per_second: float = REQUESTS_PER_SECOND,
+    cache: Optional[ResponseCache] = None,
+    checkpoint_path: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    get_department_html_responses 的 asyncio 版本。
+    最多 max_concurrency 個請求同時進行，所有 worker 共用一個每秒 requests_per_second 的權杖桶，
+    返回與同步版相同的 { 學校: { 科系: {...} } } 結構，且順序依照 eids_data。
+    快取命中的頁面不消耗權杖；檢查點與重試佇列的用法與同步版相同。
+    """
+    checkpoint, resume_from = _open_checkpoint(checkpoint_path, cache)
+    total_eids = _count_pending(eids_data, resume_from)
+    total_label = total_eids if total_eids is not None else "?"
+    print(f"總共找到 {total_label} 個 EID 準備發送請求 (並行上限 {max_concurrency}，每秒 {requests_per_second} 個請求)。")
+
+    # 所有讀到的 EID (包含檢查點已完成的)，依讀取順序排列
+    all_eids_list: List[Tuple[str, str, str]] = []
+    pending = _pending_eids(eids_data, resume_from, all_eids_list)
+
+    parsed, failures, finished = asyncio.run(_crawl_async(pending, total_label, max_concurrency, requests_per_second, cache, checkpoint))
+
+    for expected_uni, expected_dept, eid, error_class, e in failures:
+        if checkpoint:
+            checkpoint.record_failed(expected_uni, expected_dept, eid, f"{error_class}: {e!r}")
+
+    print(f"\n✅ 完成所有 {len(all_eids_list)} 個 EID，成功 {finished} 個。")
+    print_failure_summary(failures)
+
+    if checkpoint:
+        return checkpoint.compact(all_eids_list)
+
+    # 依原始順序組回結果，讓輸出與同步版一致 (完成順序是亂的)
+    result = {}
+    for index, (expected_uni, expected_dept, eid) in enumerate(all_eids_list):
+        result.setdefault(expected_uni, {})
+        if index in parsed:
+            result[expected_uni][expected_dept] = parsed[index]
 
     return result
 
@@ -72,4 +479,4 @@ def get_department_html_responses(eids_data) -> List[Tuple[str, str, str, str]]:
 # =======================================================
 # if __name__ == "__main__":
     # 執行爬取
-    # get_department_html_responses()
\ No newline at end of file
+    # get_department_html_responses()
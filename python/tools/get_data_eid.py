@@ -1,13 +1,149 @@
-from bs4 import BeautifulSoup
 import json
 from collections import defaultdict
+from html.parser import HTMLParser
+from typing import Iterator, List, Tuple
 import re
 
+try:
+    from tools.html_tree_rules import EMPTY_ELEMENT_TAGS, OpenTagStack
+except ImportError:
+    from html_tree_rules import EMPTY_ELEMENT_TAGS, OpenTagStack
+
 # 假設您的 HTML 檔案名為 'input_page.html'
 HTML_FILE = '115_AST_school.html'
 # 輸出 JSON 檔案名
 OUTPUT_JSON_FILE = 'department_eids.json'
 
+# 串流讀取時每次餵給解析器的字元數
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class _DetailButtonParser(HTMLParser):
+    """
+    以事件驅動的方式找出 class 含 btn-detail 的 <button>，每個按鈕關閉時
+    把 (學校, 科系, EID) 放進 self.ready，不保留整棵 DOM 樹。
+
+    標籤的開關依 html_tree_rules，與 BeautifulSoup 的 html.parser 相同：結束標籤只會關到最近一個
+    同名的開啟標籤，找不到同名標籤就忽略，因此巢狀結構的判斷與原本的 find_all 一致。
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.ready: List[Tuple[str, str, str]] = []
+        # 開啟中的標籤，附帶對應的按鈕或 span 紀錄 (沒有則為 None)
+        self._open_tags = OpenTagStack()
+        # 依開始順序排列、尚未輸出的按鈕，確保輸出順序與 find_all 相同
+        self._buttons: List[dict] = []
+        self._open_buttons: List[dict] = []
+        self._open_spans: List[dict] = []
+
+    def handle_starttag(self, tag, attrs):
+        attr_dict = {key: (value if value is not None else "") for key, value in attrs}
+        classes = attr_dict.get('class', '').split()
+        record = None
+
+        if tag == 'button' and 'btn-detail' in classes:
+            record = {"kind": "button", "eid": attr_dict.get('data-eid'), "spans": [], "strings": [], "closed": False}
+            self._buttons.append(record)
+            self._open_buttons.append(record)
+        elif tag == 'span' and 'span-search' in classes and self._open_buttons:
+            record = {"kind": "span", "text": []}
+            # 巢狀按鈕時，外層按鈕也會找到內層的 span
+            for button in self._open_buttons:
+                button["spans"].append(record)
+            self._open_spans.append(record)
+
+        # 空元素不會有結束標籤，不放進開啟中的標籤
+        if tag in EMPTY_ELEMENT_TAGS:
+            return
+        self._open_tags.push(tag, record)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in EMPTY_ELEMENT_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        popped = self._open_tags.pop_to(tag)
+        if not popped:
+            return
+        for _, record in popped:
+            if record is not None:
+                if record["kind"] == "button":
+                    record["closed"] = True
+                    self._open_buttons.remove(record)
+                else:
+                    self._open_spans.remove(record)
+        self._flush_closed_buttons()
+
+    def handle_data(self, data):
+        if not self._open_buttons:
+            return
+        for span in self._open_spans:
+            span["text"].append(data)
+        stripped = data.strip()
+        if stripped:
+            for button in self._open_buttons:
+                button["strings"].append(stripped)
+
+    def _flush_closed_buttons(self) -> None:
+        while self._buttons and self._buttons[0]["closed"]:
+            self._emit(self._buttons.pop(0))
+
+    def finish(self) -> None:
+        """檔案讀完後，還沒關閉的按鈕視為到檔尾結束 (與 html.parser 相同)。"""
+        self.close()
+        for button in self._buttons:
+            self._emit(button)
+        self._buttons = []
+
+    def _emit(self, button: dict) -> None:
+        eid = button["eid"]
+
+        # 確保 data-eid 存在
+        if not eid:
+            return
+
+        # 方式 1: 查找 span 標籤，假設第一個 span 是學校，第二個是科系
+        spans = button["spans"]
+        if len(spans) >= 2:
+            university = "".join(spans[0]["text"]).strip()
+            department = "".join(spans[1]["text"]).strip()
+
+        # 方式 2: 如果沒有 span-search，直接按順序從 button 的文字中提取
+        elif len(button["strings"]) >= 2:
+            university = button["strings"][0]
+            department = button["strings"][1]
+
+        else:
+            # 無法解析的情況，跳過
+            print(f"警告：無法解析 data-eid={eid} 的校系名稱。跳過。")
+            return
+
+        self.ready.append((university, department, eid))
+
+
+def iter_department_eids(html_filepath: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Tuple[str, str, str]]:
+    """
+    串流版本：分段讀取 HTML 檔案，每讀完一個校系按鈕就產生一筆 (學校, 科系, EID)。
+    記憶體用量與檔案大小無關，可以直接交給爬蟲，邊讀邊開始送請求。
+    """
+    parser = _DetailButtonParser()
+
+    with open(html_filepath, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            yield from parser.ready
+            parser.ready.clear()
+
+    parser.finish()
+    yield from parser.ready
+    parser.ready.clear()
+
+
 def extract_department_eids(html_filepath: str):
     """
     從 HTML 檔案中提取所有校系名稱和對應的 data-eid，並保存為 JSON 格式。
@@ -16,9 +152,18 @@ def extract_department_eids(html_filepath: str):
         html_filepath (str): 輸入 HTML 檔案的路徑。
         json_filepath (str): 輸出 JSON 檔案的路徑。
     """
+    # 最終儲存結果的字典結構：{學校: {科系: data-eid}}
+    # 使用 defaultdict 以便於自動創建內層字典
+    output_data = defaultdict(dict)
+    
+    processed_count = 0
+
     try:
-        with open(html_filepath, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+        for university, department, eid in iter_department_eids(html_filepath):
+            # 儲存數據
+            # 由於 data-eid 在 HTML 屬性中通常是字串，我們保留它為字串格式
+            output_data[university][department] = eid
+            processed_count += 1
     except FileNotFoundError:
         print(f"錯誤：找不到檔案 {html_filepath}。請檢查檔案路徑。")
         return
@@ -26,58 +171,6 @@ def extract_department_eids(html_filepath: str):
         print(f"讀取檔案發生錯誤: {e}")
         return
 
-    # 使用 BeautifulSoup 解析 HTML
-    soup = BeautifulSoup(html_content, 'html.parser')
-
-    # 最終儲存結果的字典結構：{學校: {科系: data-eid}}
-    # 使用 defaultdict 以便於自動創建內層字典
-    output_data = defaultdict(dict)
-    
-    # 查找所有 class 包含 'btn-detail' 的 <button> 標籤
-    buttons = soup.find_all('button', class_='btn-detail')
-    
-    processed_count = 0
-    
-    for button in buttons:
-        eid = button.get('data-eid')
-        
-        # 確保 data-eid 存在
-        if not eid:
-            continue
-        
-        # 提取學校名稱和科系名稱
-        # 由於您提供的 HTML 片段中，名稱位於 <span class="span-search"> 內，
-        # 但結構可能因為格式化而有所不同，我們考慮兩種常見的提取方式：
-        
-        # 方式 1: 查找 span 標籤
-        spans = button.find_all('span', class_='span-search')
-        
-        if len(spans) >= 2:
-            # 假設第一個 span 是學校，第二個是科系
-            university = spans[0].text.strip()
-            department = spans[1].text.strip()
-            
-        else:
-            # 方式 2: 如果沒有 span-search (例如您的第二個片段)，直接從 button 文本中提取
-            # 這需要更複雜的解析，因為數據是分行且可能被 <br> 分隔
-            
-            # 使用 button.get_text() 獲取所有文本內容，並用換行或 <br> 分割
-            text_parts = [p.strip() for p in button.stripped_strings if p.strip()]
-            
-            if len(text_parts) >= 2:
-                 # 假設按順序是學校和科系
-                university = text_parts[0]
-                department = text_parts[1]
-            else:
-                # 無法解析的情況，跳過
-                print(f"警告：無法解析 data-eid={eid} 的校系名稱。跳過。")
-                continue
-        
-        # 儲存數據
-        # 由於 data-eid 在 HTML 屬性中通常是字串，我們保留它為字串格式
-        output_data[university][department] = eid
-        processed_count += 1
-
     # 將 defaultdict 轉換為標準 dict
     final_output = dict(output_data)
 
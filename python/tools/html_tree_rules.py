@@ -0,0 +1,49 @@
+"""
+手寫的 HTMLParser 解析器 (fast_table_parser.py、get_data_eid.py) 共用的建樹規則，
+與 BeautifulSoup(html, 'html.parser') 一致：
+
+    - 哪些是空元素 (沒有結束標籤)、哪些標籤的內容不算文字 (<script>、<style> 等)，
+      直接取自 bs4 html.parser 建樹器的設定，bs4 改版時兩個解析器會一起跟著改
+    - 不自動補關閉標籤；結束標籤只會關到最近一個同名的開啟標籤，沒有同名的開啟標籤就忽略
+"""
+from collections import Counter
+from typing import Any, List, Optional, Tuple
+
+from bs4.builder import HTMLTreeBuilder
+
+EMPTY_ELEMENT_TAGS = frozenset(HTMLTreeBuilder.DEFAULT_EMPTY_ELEMENT_TAGS)
+STRING_CONTAINER_TAGS = frozenset(HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS)
+
+
+class OpenTagStack:
+    """開啟中的標籤，每個標籤可以附帶一個解析器自己的物件 (沒有則為 None)。"""
+
+    def __init__(self):
+        self._stack: List[Tuple[str, Any]] = []
+        self._open_counter: Counter = Counter()
+
+    def __bool__(self) -> bool:
+        return bool(self._stack)
+
+    def push(self, name: str, payload: Any = None) -> None:
+        self._stack.append((name, payload))
+        self._open_counter[name] += 1
+
+    def top(self) -> Optional[Tuple[str, Any]]:
+        return self._stack[-1] if self._stack else None
+
+    def pop_to(self, name: str) -> List[Tuple[str, Any]]:
+        """
+        處理 name 的結束標籤：關閉到最近一個同名的開啟標籤 (包含)，依關閉順序返回被關閉的 (名稱, 物件)。
+        沒有同名的開啟標籤時什麼都不做，返回空列表。
+        """
+        if not self._open_counter[name]:
+            return []
+        popped = []
+        while self._stack:
+            popped_name, payload = self._stack.pop()
+            self._open_counter[popped_name] -= 1
+            popped.append((popped_name, payload))
+            if popped_name == name:
+                break
+        return popped
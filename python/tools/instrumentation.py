@@ -0,0 +1,235 @@
+"""
+各腳本共用的計時、記憶體與計數工具，每次執行寫出一份 JSON 報告。
+
+    with instrumentation.run("data_integrator") as report:      # 開始一次執行，結束時寫出報告
+        with instrumentation.stage("載入來源"):                   # 一個階段：時間與峰值記憶體
+            ...
+        with instrumentation.stage("寫入", unit="所學校") as s:
+            for ...:
+                s.add()                                           # 計數，報告中換算成每秒幾筆
+
+    @instrumentation.timed("解析頁面", unit="頁")                  # 每次呼叫都累計進同一個項目
+    def extract(...): ...
+
+同名的項目會合併 (次數、總時間、總筆數)；在 stage 之內開的項目名稱會加上外層的名稱，例如 "爬取/網路請求"。
+timed 也可以用在 async 函數，量到的是整個 await 的時間 (包含等待網路)，
+並行的協程各自累計，所以總時間可能大於實際經過的時間。
+
+沒有呼叫 run() 時 (例如在其他程式中匯入這些函數) 所有計時都不做任何事。
+峰值記憶體用 tracemalloc 量測，會讓配置記憶體多的程式變慢，只在 TRACE_MEMORY 為 True 時開啟；
+另外一律記錄整個行程的最大常駐記憶體 (RSS)。
+"""
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import os
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RUN_REPORT_DIR = 'datas/.runs'
+TRACE_MEMORY = False
+RUN_REPORT_FORMAT = 1
+
+_current_run: contextvars.ContextVar = contextvars.ContextVar("current_run", default=None)
+# 目前所在的 stage (名稱路徑, 記錄)，協程之間互不影響
+_current_stage: contextvars.ContextVar = contextvars.ContextVar("current_stage", default=None)
+
+
+def _max_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 的單位是 KiB，macOS 是 bytes
+    return rss if os.uname().sysname == "Darwin" else rss * 1024
+
+
+class StageRecord:
+
+    def __init__(self, name: str, unit: Optional[str] = None):
+        self.name = name
+        self.unit = unit
+        self.calls = 0
+        self.seconds = 0.0
+        self.items = 0
+        self.peak_memory_bytes: Optional[int] = None
+        # 子 stage 的峰值 (子 stage 開始時會重設 tracemalloc 的峰值)
+        self._child_peak = 0
+
+    def add(self, n: int = 1) -> None:
+        self.items += n
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"name": self.name, "calls": self.calls, "seconds": round(self.seconds, 6)}
+        if self.items or self.unit:
+            result["items"] = self.items
+            result["unit"] = self.unit
+            result["per_second"] = round(self.items / self.seconds, 2) if self.seconds > 0 else None
+        if self.peak_memory_bytes is not None:
+            result["peak_memory_bytes"] = self.peak_memory_bytes
+        return result
+
+
+class _NullRecord:
+    """沒有進行中的 run 時 stage() 產生的記錄，什麼都不做。"""
+
+    def add(self, n: int = 1) -> None:
+        pass
+
+
+class RunReport:
+
+    def __init__(self, script: str, trace_memory: Optional[bool] = None):
+        self.script = script
+        self.trace_memory = TRACE_MEMORY if trace_memory is None else trace_memory
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.stages: Dict[str, StageRecord] = {}
+        self.info: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.total_seconds = 0.0
+        self._start = time.perf_counter()
+
+    def record(self, path: str, unit: Optional[str] = None) -> StageRecord:
+        if path not in self.stages:
+            self.stages[path] = StageRecord(path, unit)
+        return self.stages[path]
+
+    def to_dict(self) -> Dict[str, Any]:
+        report: Dict[str, Any] = {
+            "format": RUN_REPORT_FORMAT,
+            "script": self.script,
+            "started_at": self.started_at,
+            "total_seconds": round(self.total_seconds, 6),
+            "max_rss_bytes": _max_rss_bytes(),
+            "info": self.info,
+            "stages": [stage.to_dict() for stage in self.stages.values()],
+        }
+        if self.error:
+            report["error"] = self.error
+        return report
+
+    def save(self, directory: Optional[str] = None) -> str:
+        directory = directory or RUN_REPORT_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.script}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=4)
+        return path
+
+    def print_summary(self) -> None:
+        print(f"\n⏱️  {self.script} 各階段耗時 (共 {self.total_seconds:.2f} 秒)：")
+        for stage in self.stages.values():
+            line = f"   {stage.name}：{stage.seconds:.3f} 秒"
+            if stage.calls > 1:
+                line += f" ({stage.calls} 次)"
+            if stage.items and stage.seconds > 0:
+                line += f"，{stage.items} {stage.unit or '筆'}，每秒 {stage.items / stage.seconds:.1f} {stage.unit or '筆'}"
+            if stage.peak_memory_bytes is not None:
+                line += f"，峰值記憶體 {stage.peak_memory_bytes / 1024 / 1024:.1f} MiB"
+            print(line)
+
+
+def current_run() -> Optional[RunReport]:
+    return _current_run.get()
+
+
+@contextlib.contextmanager
+def run(script: str, trace_memory: Optional[bool] = None, save: bool = True) -> Iterator[RunReport]:
+    """
+    開始一次執行；結束 (包含發生例外) 時印出摘要並寫出報告。
+    :param trace_memory: 是否用 tracemalloc 量測各階段的峰值記憶體，None 時依 TRACE_MEMORY
+    """
+    report = RunReport(script, trace_memory)
+    run_token = _current_run.set(report)
+    stage_token = _current_stage.set(None)
+    started_tracing = report.trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        yield report
+    except BaseException as e:
+        report.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        report.total_seconds = time.perf_counter() - report._start
+        if started_tracing:
+            tracemalloc.stop()
+        _current_stage.reset(stage_token)
+        _current_run.reset(run_token)
+        report.print_summary()
+        if save:
+            print(f"📄 執行報告已儲存至 {report.save()}")
+
+
+@contextlib.contextmanager
+def stage(name: str, unit: Optional[str] = None, track_memory: bool = True) -> Iterator[Any]:
+    """量測一個階段的時間與峰值記憶體，yield 的記錄可以用 add() 計數。"""
+    report = _current_run.get()
+    if report is None:
+        yield _NullRecord()
+        return
+
+    parent = _current_stage.get()
+    path = f"{parent[0]}/{name}" if parent else name
+    record = report.record(path, unit)
+    token = _current_stage.set((path, record))
+
+    tracing = track_memory and report.trace_memory and tracemalloc.is_tracing()
+    if tracing:
+        if parent:
+            # 外層到目前為止的峰值先記下來，再重設給這個階段量
+            parent[1]._child_peak = max(parent[1]._child_peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        record._child_peak = 0
+
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds += time.perf_counter() - start
+        record.calls += 1
+        _current_stage.reset(token)
+        if tracing:
+            peak = max(tracemalloc.get_traced_memory()[1], record._child_peak)
+            record.peak_memory_bytes = max(record.peak_memory_bytes or 0, peak)
+            if parent:
+                parent[1]._child_peak = max(parent[1]._child_peak, peak)
+
+
+def timed(name: str, unit: Optional[str] = None, items: Optional[Callable[[Any], int]] = None):
+    """
+    裝飾器：每次呼叫都累計進 name 這個項目 (不量記憶體，適合每頁、每筆都會呼叫的函數)。
+    :param items: 由返回值算出處理了幾筆，沒給時每次呼叫算一筆 (unit 有給時)
+    """
+    def decorator(func):
+        def count(record, result):
+            if items is not None:
+                record.add(items(result))
+            elif unit is not None:
+                record.add()
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name, unit, track_memory=False) as record:
+                    result = await func(*args, **kwargs)
+                    count(record, result)
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name, unit, track_memory=False) as record:
+                result = func(*args, **kwargs)
+                count(record, result)
+                return result
+        return wrapper
+
+    return decorator
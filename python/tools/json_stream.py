@@ -0,0 +1,61 @@
+"""
+逐筆寫出最外層 JSON 物件的串流寫入器。
+
+輸出與 json.dump(dict(items), f, ensure_ascii=False, indent=indent) 逐位元組相同，
+但一次只需要在記憶體中保留一個鍵的值 (例如一所學校的整合結果)。
+"""
+import json
+from typing import Any, Callable, Iterable, Optional, TextIO, Tuple
+
+
+class JsonObjectWriter:
+    """
+    推送式的寫入器：每次 write(鍵, 值) 就寫出一個鍵，close() 時補上結尾的大括號。
+    可以同時開好幾個 (例如每個區域一個分片檔)，各自逐筆寫入。
+    indent 為 None 時輸出不含空白的最小化 JSON，與 json.dump(..., separators=(',', ':')) 相同。
+    default 與 json.dump 的 default 相同 (例如 department_record.to_json)。
+    """
+
+    def __init__(self, f: TextIO, indent: Optional[int] = 4, default: Optional[Callable[[Any], Any]] = None):
+        self.f = f
+        self.indent = indent
+        self.default = default
+        self.count = 0
+        self._padding = "\n" + " " * indent if indent is not None else ""
+
+    def write(self, key: str, value: Any) -> None:
+        self.f.write("{" if self.count == 0 else ",")
+        self.f.write(self._padding)
+        self.f.write(json.dumps(key, ensure_ascii=False))
+        if self.indent is None:
+            self.f.write(":")
+            self.f.write(json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=self.default))
+        else:
+            self.f.write(": ")
+            # JSON 字串中的換行一定會被跳脫，所以只有結構上的換行需要加縮排
+            self.f.write(json.dumps(value, ensure_ascii=False, indent=self.indent, default=self.default).replace("\n", self._padding))
+        self.count += 1
+
+    def close(self) -> int:
+        """寫出結尾，返回寫出的鍵數。"""
+        if self.count:
+            self.f.write("\n}" if self.indent is not None else "}")
+        else:
+            self.f.write("{}")
+        return self.count
+
+
+def dump_object_stream(
+    items: Iterable[Tuple[str, Any]],
+    f: TextIO,
+    indent: Optional[int] = 4,
+    default: Optional[Callable[[Any], Any]] = None
+) -> int:
+    """
+    把 (鍵, 值) 依序寫成一個 JSON 物件，返回寫出的鍵數。
+    每個值先用 json.dumps 縮排好，再整體往內縮一層，與 json.dump 的巢狀縮排一致。
+    """
+    writer = JsonObjectWriter(f, indent, default)
+    for key, value in items:
+        writer.write(key, value)
+    return writer.close()
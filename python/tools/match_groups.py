@@ -1,6 +1,15 @@
 import json
 import math
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
+
+import numpy as np
+
+try:
+    from tools import department_record
+    from tools.score_table import ScoreTable
+except ImportError:
+    import department_record
+    from score_table import ScoreTable
 
 # --- 檔案路徑設定 ---
 DIVISION_EXAM_FILE = 'division_exam_data.json'
@@ -86,22 +95,32 @@ def get_percentile_from_score(
 def process_and_match_data(
     exam_data: Dict[str, Any], 
     subject_map: Dict[frozenset, str], 
-    score_distribution_data: Dict[str, Any]
+    score_distribution_data: Union[Dict[str, Any], ScoreTable]
 ) -> Dict[str, Any]:
     """
     處理分科測驗數據，匹配組別代號並計算達標比例。
+    score_distribution_data 可以是 convert_score_distribution 的字典或已建好的 ScoreTable，
+    達標比例先收集所有匹配到組別的校系，再用 ScoreTable 一次向量化查出。
+    返回的每個校系都是新的 YearRecord (寫檔時用 department_record.to_json)，不會修改 exam_data。
     """
+    if isinstance(score_distribution_data, ScoreTable):
+        score_table = score_distribution_data
+    else:
+        score_table = ScoreTable.from_distribution(score_distribution_data)
+
     matched_count = 0
     percentile_calculated_count = 0
     
-    updated_exam_data = exam_data.copy()
+    updated_exam_data = department_record.from_year_data(exam_data)
+
+    # 要查達標比例的校系：(科系數據, 組別代號, 加權平均分數, 科目數量)
+    pending_depts = []
 
     for university, departments in updated_exam_data.items():
         for department, dept_data in departments.items():
             
-            # 1. 提取科目集合進行匹配
-            multipliers = dept_data.get("科目倍數", {})
-            required_subjects = frozenset(multipliers.keys())
+            # 1. 提取科目集合進行匹配 (同樣的科目組合共用同一個 frozenset)
+            required_subjects = dept_data.subject_set
             
             # 2. 查找匹配的組別代號
             group_id = subject_map.get(required_subjects)
@@ -111,19 +130,27 @@ def process_and_match_data(
 
             if group_id:
                 matched_count += 1
-                
-                # 3. 計算達標比例
-                
-                percentile = get_percentile_from_score(
-                    dept_data=dept_data, 
-                    group_id=group_id, 
-                    score_data=score_distribution_data
-                )
-                    
-                if percentile is not None:
-                    # 將百分比保留小數點後兩位
-                    dept_data["達標比例"] = round(percentile, 2)
-                    percentile_calculated_count += 1
+
+                # 分數無效或沒有科目的校系不計算 (與 get_percentile_from_score 相同)
+                score_average = dept_data.standard
+                num_subjects = len(dept_data.subjects)
+                if isinstance(score_average, (int, float)) and num_subjects > 0 and group_id in score_table.group_rows:
+                    pending_depts.append((dept_data, group_id, score_average, num_subjects))
+
+    # 3. 一次算出所有校系的達標比例
+    if pending_depts:
+        percentiles = score_table.percentiles_for(
+            [group_id for _, group_id, _, _ in pending_depts],
+            [score_average for _, _, score_average, _ in pending_depts],
+            [num_subjects for _, _, _, num_subjects in pending_depts],
+        )
+        for (dept_data, _, _, _), percentile in zip(pending_depts, percentiles.tolist()):
+            # 沒有資料的分數與原本 .get(score_key, 0) 一樣視為 0
+            if np.isnan(percentile):
+                percentile = 0
+            # 將百分比保留小數點後兩位
+            dept_data["達標比例"] = round(percentile, 2)
+            percentile_calculated_count += 1
 
     print(f"\n--- 匹配結果摘要 ---")
     print(f"✅ 成功匹配到組別的校系數量: {matched_count}")
@@ -142,8 +169,11 @@ def match_them(division_exam_data, score_distribution_data):
         # with open(SCORE_DISTRIBUTION_FILE, 'r', encoding='utf-8') as f:
         #     score_distribution_data = json.load(f)
 
-        # 2. 創建科目組合到組別代號的映射表
-        subject_group_map = create_subject_group_map(score_distribution_data)
+        # 2. 創建科目組合到組別代號的映射表 (也可以直接傳入 ScoreTable)
+        if isinstance(score_distribution_data, ScoreTable):
+            subject_group_map = score_distribution_data.subject_group_map()
+        else:
+            subject_group_map = create_subject_group_map(score_distribution_data)
 
         # 3. 處理並匹配分科測驗數據，計算達標比例
         updated_data = process_and_match_data(division_exam_data, subject_group_map, score_distribution_data)
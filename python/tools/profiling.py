@@ -0,0 +1,130 @@
+"""
+各腳本共用的效能剖析開關：執行時加上 --profile (或設環境變數 PROFILE=1) 就會剖析整支腳本，
+不必再手動改 __main__。
+
+    if __name__ == "__main__":
+        profiling.run_main("data_integrator", main)
+
+    python python/data_integrator.py --profile
+
+輸出寫到 PROFILE_DIR：
+    - <名稱>-<時間>.prof：cProfile 的原始資料，可以用 snakeviz / tuna 看，或用 flameprof 轉成火焰圖
+    - <名稱>-<時間>.txt：最耗時的 TOP_N 個函數 (依自身時間與累計時間各列一次)，同時印在終端機
+    - PROFILER 設為 "pyinstrument" 且有安裝時，改用 pyinstrument (取樣式，開銷較小)，
+      另外輸出可以直接開的 .html 與 speedscope 火焰圖用的 .speedscope.json
+
+cProfile 只量得到目前的行程，用 ProcessPoolExecutor 的部分 (例如 reparse_cached_pages.py、多年度模式)
+要改成在主行程執行才量得到，各腳本在剖析模式下會自動這麼做。
+"""
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+PROFILE_DIR = 'datas/.profiles'
+# "cprofile" 或 "pyinstrument"
+PROFILER = "cprofile"
+TOP_N = 25
+PROFILE_FLAG = "--profile"
+
+
+def enabled() -> bool:
+    """這次執行是否要剖析：命令列有 --profile，或環境變數 PROFILE 不是空的。"""
+    return PROFILE_FLAG in sys.argv[1:] or bool(os.environ.get("PROFILE"))
+
+
+def _short_path(filename: str) -> str:
+    """repo 內的檔案只留相對路徑，標準函式庫與套件只留最後兩層。"""
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if filename.startswith(here):
+        return os.path.relpath(filename, here)
+    parts = filename.replace('\\', '/').split('/')
+    return '/'.join(parts[-2:])
+
+
+def hot_functions(stats: pstats.Stats, sort: str = "tottime", top_n: int = TOP_N) -> List[Tuple[str, int, float, float]]:
+    """返回 [(函數, 呼叫次數, 自身時間, 累計時間)]，依 sort ("tottime" 或 "cumtime") 排序。"""
+    rows = []
+    for (filename, line, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        location = func if filename == '~' else f"{_short_path(filename)}:{line}({func})"
+        rows.append((location, ncalls, tottime, cumtime))
+    key = 2 if sort == "tottime" else 3
+    rows.sort(key=lambda row: row[key], reverse=True)
+    return rows[:top_n]
+
+
+def format_summary(stats: pstats.Stats, top_n: int = TOP_N) -> str:
+    lines = [f"總共 {stats.total_calls} 次呼叫，{stats.total_tt:.3f} 秒"]
+    for sort, label in (("tottime", "自身時間"), ("cumtime", "累計時間")):
+        lines.append(f"\n--- 依{label}排序的前 {top_n} 個函數 ---")
+        lines.append(f"{'自身(秒)':>10} {'累計(秒)':>10} {'次數':>10}  函數")
+        for location, ncalls, tottime, cumtime in hot_functions(stats, sort, top_n):
+            lines.append(f"{tottime:>10.3f} {cumtime:>10.3f} {ncalls:>10}  {location}")
+    return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def _cprofile(base_path: str, top_n: int) -> Iterator[None]:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(base_path + ".prof")
+        summary = format_summary(pstats.Stats(profiler, stream=io.StringIO()), top_n)
+        with open(base_path + ".txt", 'w', encoding='utf-8') as f:
+            f.write(summary + "\n")
+        print(f"\n🔬 效能剖析結果：\n{summary}")
+        print(f"\n📄 已儲存 {base_path}.prof (可用 snakeviz / flameprof 查看) 與 {base_path}.txt")
+
+
+@contextlib.contextmanager
+def _pyinstrument(base_path: str) -> Iterator[None]:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+
+    profiler = Profiler()
+    profiler.start()
+    try:
+        yield
+    finally:
+        session = profiler.stop()
+        with open(base_path + ".html", 'w', encoding='utf-8') as f:
+            f.write(profiler.output_html())
+        with open(base_path + ".speedscope.json", 'w', encoding='utf-8') as f:
+            f.write(SpeedscopeRenderer().render(session))
+        print(f"\n🔬 效能剖析結果：")
+        print(profiler.output_text(unicode=True, color=False))
+        print(f"📄 已儲存 {base_path}.html 與 {base_path}.speedscope.json (可拖進 https://www.speedscope.app 看火焰圖)")
+
+
+@contextlib.contextmanager
+def profile(name: str, profiler: Optional[str] = None, top_n: int = TOP_N) -> Iterator[None]:
+    """剖析 with 區塊內的程式，結束 (包含發生例外) 時輸出結果。"""
+    profiler = profiler or PROFILER
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base_path = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+
+    if profiler == "pyinstrument":
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError:
+            print("⚠️ 沒有安裝 pyinstrument (pip install pyinstrument)，改用 cProfile")
+            profiler = "cprofile"
+
+    context = _pyinstrument(base_path) if profiler == "pyinstrument" else _cprofile(base_path, top_n)
+    with context:
+        yield
+
+
+def run_main(name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """腳本的進入點：有 --profile 時剖析 func，否則直接執行。"""
+    if not enabled():
+        return func(*args, **kwargs)
+    with profile(name):
+        return func(*args, **kwargs)
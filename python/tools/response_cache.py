@@ -0,0 +1,179 @@
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+from urllib.request import pathname2url
+from typing import Dict, Iterator, Optional, Tuple
+
+# --- 設定常數 ---
+# 所有年份共用一個快取資料庫，以 (year, eid) 區分
+DEFAULT_CACHE_PATH = 'datas/.cache/detail_responses.sqlite3'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    year       INTEGER NOT NULL,
+    eid        TEXT    NOT NULL,
+    body       BLOB    NOT NULL, -- zlib 壓縮後的原始 HTML
+    body_hash  TEXT    NOT NULL, -- 未壓縮 HTML 的 sha256
+    fetched_at REAL    NOT NULL, -- 最後一次向伺服器取得的時間 (epoch 秒)
+    parsed     INTEGER NOT NULL DEFAULT 1, -- 0 = 上次解析失敗 (例如維護頁面)，連線時不使用、會重新取得
+    PRIMARY KEY (year, eid)
+);
+CREATE INDEX IF NOT EXISTS idx_responses_fetched_at ON responses (year, fetched_at);
+"""
+
+
+def body_hash(html_content: str) -> str:
+    """計算 HTML 內容的 sha256，用來判斷頁面是否真的有變動。"""
+    return hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    校系分則頁面的磁碟快取 (SQLite)。
+
+    每個實例綁定一個年份，以 (year, eid) 為鍵存放壓縮後的原始 HTML、取得時間、內容雜湊與是否解析成功。
+    解析失敗的頁面也會存起來 (修好解析器後還能離線重新解析)，但連線模式的 get() 不會返回它們，而是重新取得。
+    ttl_seconds 為 None 時快取永不過期；offline 為 True 時爬蟲只會讀快取、不會連線。
+    read_only 為 True 時以唯讀模式開啟已存在的資料庫 (只重新解析、不寫入時用，多個行程同時開也不會搶寫入鎖)，
+    read_only 一定是離線的。
+    """
+
+    def __init__(self, year: int, path: str = DEFAULT_CACHE_PATH,
+                 ttl_seconds: Optional[float] = None, offline: bool = False, read_only: bool = False):
+        self.year = year
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.offline = offline or read_only
+        self.read_only = read_only
+
+        if read_only:
+            # 資料庫不存在時直接報錯，不會建立空的資料庫
+            self._conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+            return
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+        # 舊版本建立的資料庫沒有 parsed 欄位，裡面的頁面都是解析成功才存的
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if "parsed" not in columns:
+            self._conn.execute("ALTER TABLE responses ADD COLUMN parsed INTEGER NOT NULL DEFAULT 1")
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _is_fresh(self, fetched_at: float) -> bool:
+        # 離線重播時即使過期也照樣使用，否則就沒有資料可以解析了
+        if self.ttl_seconds is None or self.offline:
+            return True
+        return time.time() - fetched_at <= self.ttl_seconds
+
+    def get(self, eid: str) -> Optional[str]:
+        """
+        取得快取的 HTML；沒有資料或已過期則返回 None。
+        上次解析失敗的頁面只有離線時才會返回 (重新解析用)，連線時當作沒有快取。
+        """
+        if self.offline:
+            query = "SELECT body, fetched_at FROM responses WHERE year = ? AND eid = ?"
+        else:
+            query = "SELECT body, fetched_at FROM responses WHERE year = ? AND eid = ? AND parsed = 1"
+        row = self._conn.execute(query, (self.year, eid)).fetchone()
+
+        if row is None or not self._is_fresh(row[1]):
+            return None
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def put(self, eid: str, html_content: str, parsed: bool = True) -> bool:
+        """
+        寫入剛從伺服器取得的 HTML 以及它是否解析成功。
+        返回頁面內容是否與快取中的版本不同 (新頁面也視為不同)。
+        """
+        new_hash = body_hash(html_content)
+        row = self._conn.execute(
+            "SELECT body_hash FROM responses WHERE year = ? AND eid = ?",
+            (self.year, eid)
+        ).fetchone()
+
+        if row is not None and row[0] == new_hash:
+            # 內容沒變，只更新取得時間，不必重寫壓縮內容
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ?, parsed = ? WHERE year = ? AND eid = ?",
+                (time.time(), int(parsed), self.year, eid)
+            )
+            self._conn.commit()
+            return False
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (year, eid, body, body_hash, fetched_at, parsed) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.year, eid, zlib.compress(html_content.encode('utf-8'), 6), new_hash, time.time(), int(parsed))
+        )
+        self._conn.commit()
+        return True
+
+    def set_parsed(self, eid: str, parsed: bool) -> None:
+        """更新快取中頁面的解析狀態 (重新解析快取頁面的結果改變時)，不改動取得時間。"""
+        cursor = self._conn.execute(
+            "UPDATE responses SET parsed = ? WHERE year = ? AND eid = ? AND parsed != ?",
+            (int(parsed), self.year, eid, int(parsed))
+        )
+        if cursor.rowcount:
+            self._conn.commit()
+
+    def iter_pages(self) -> Iterator[Tuple[str, str]]:
+        """依 EID 順序遍歷這個年份所有快取的頁面: (eid, html)。"""
+        cursor = self._conn.execute(
+            "SELECT eid, body FROM responses WHERE year = ? ORDER BY eid",
+            (self.year,)
+        )
+        for eid, body in cursor:
+            yield eid, zlib.decompress(body).decode('utf-8')
+
+    def evict(self, max_age_seconds: Optional[float] = None, max_entries: Optional[int] = None) -> int:
+        """
+        淘汰這個年份的快取資料，返回刪除的筆數。
+
+        :param max_age_seconds: 刪除取得時間超過此秒數的頁面
+        :param max_entries: 只保留最近取得的 max_entries 筆
+        """
+        removed = 0
+
+        if max_age_seconds is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE year = ? AND fetched_at < ?",
+                (self.year, time.time() - max_age_seconds)
+            )
+            removed += cursor.rowcount
+
+        if max_entries is not None:
+            cursor = self._conn.execute(
+                """
+                DELETE FROM responses WHERE year = ? AND eid NOT IN (
+                    SELECT eid FROM responses WHERE year = ? ORDER BY fetched_at DESC LIMIT ?
+                )
+                """,
+                (self.year, self.year, max_entries)
+            )
+            removed += cursor.rowcount
+
+        self._conn.commit()
+        return removed
+
+    def stats(self) -> Dict[str, float]:
+        """快取統計：筆數、壓縮後總大小、最舊與最新的取得時間。"""
+        count, size, oldest, newest = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0), MIN(fetched_at), MAX(fetched_at) FROM responses WHERE year = ?",
+            (self.year,)
+        ).fetchone()
+        return {"pages": count, "compressed_bytes": size, "oldest": oldest, "newest": newest}
@@ -0,0 +1,167 @@
+"""
+分數分布的 NumPy 密集表。
+
+convert_score_distribution 的輸出是 {組別代號: {"科目組合": [...], "累積百分比": {"分數": 百分比}}}，
+每查一次都要把分數轉成字串再查字典。ScoreTable 把它攤平成一個二維陣列：
+每一列是一個組別代號，每一欄是一個整數分數 (min_score 起算)，
+原本沒有資料的格子存 NaN，查詢時與 .get(score_key, 0) 一樣當作 0。
+
+每年的表可以存成 datas/{年度}/score_table.npy (float64 陣列) 加上 score_table.json
+(組別代號、科目組合、起始分數的小索引)，之後用 np.load(mmap_mode='r') 直接映射，
+不必重新解析 CSV，多個行程開同一個檔案也共用作業系統的頁面快取。
+"""
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+# 表格檔案的主檔名，實際檔案為 <主檔名>.npy 與 <主檔名>.json
+SCORE_TABLE_NAME = "score_table"
+# 索引檔格式版本，格式改變時遞增，舊檔案會被拒絕載入
+SCORE_TABLE_FORMAT = 1
+
+
+def score_table_path(year: int, data_dir: str = "datas") -> str:
+    """返回某年度表格的檔案路徑 (不含副檔名)。"""
+    return os.path.join(data_dir, str(year), SCORE_TABLE_NAME)
+
+
+class ScoreTable:
+
+    def __init__(self, group_ids: Sequence[str], subjects: Sequence[Sequence[str]], min_score: int, percentiles: np.ndarray):
+        self.group_ids: List[str] = list(group_ids)
+        self.subjects: List[List[str]] = [list(s) for s in subjects]
+        self.min_score = int(min_score)
+        # shape = (組別數, 分數欄數)，dtype float64
+        self.percentiles = percentiles
+
+        self.group_rows: Dict[str, int] = {group_id: row for row, group_id in enumerate(self.group_ids)}
+        # 與 create_subject_group_map 相同：同一個科目組合出現多次時以最後一個組別為準
+        self.subject_rows: Dict[frozenset, int] = {}
+        for row, subjects_of_group in enumerate(self.subjects):
+            self.subject_rows[frozenset(subjects_of_group)] = row
+
+    @classmethod
+    def from_distribution(cls, score_data: Dict[str, Any]) -> "ScoreTable":
+        """由 convert_score_distribution 的輸出建立密集表。"""
+        group_ids = list(score_data)
+
+        # 先把所有 (列, 分數, 百分比) 攤平，再一次填進陣列
+        rows: List[int] = []
+        score_keys: List[str] = []
+        values: List[float] = []
+        for row, group_id in enumerate(group_ids):
+            percentages: Dict[str, float] = score_data[group_id].get("累積百分比", {})
+            rows.extend([row] * len(percentages))
+            score_keys.extend(percentages)
+            values.extend(percentages.values())
+
+        scores = np.array(list(map(int, score_keys)), dtype=np.int64)
+        min_score = int(scores.min()) if len(scores) else 0
+        max_score = int(scores.max()) if len(scores) else min_score - 1
+
+        matrix = np.full((len(group_ids), max_score - min_score + 1), np.nan)
+        matrix[np.array(rows, dtype=np.int64), scores - min_score] = np.array(values, dtype=np.float64)
+
+        subjects = [score_data[group_id].get("科目組合", []) for group_id in group_ids]
+        return cls(group_ids, subjects, min_score, matrix)
+
+    def subject_group_map(self) -> Dict[frozenset, str]:
+        """與 create_subject_group_map 相同的 {科目組合: 組別代號} 映射表。"""
+        return {subjects: self.group_ids[row] for subjects, row in self.subject_rows.items()}
+
+    def save(self, path: str) -> None:
+        """存成 path.npy 與 path.json。先寫暫存檔再取代，讀取端不會讀到寫到一半的檔案。"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(path + '.npy.tmp', 'wb') as f:
+            np.save(f, np.ascontiguousarray(self.percentiles, dtype=np.float64))
+
+        header = {
+            "format": SCORE_TABLE_FORMAT,
+            "min_score": self.min_score,
+            "shape": list(self.percentiles.shape),
+            "group_ids": self.group_ids,
+            "subjects": self.subjects,
+        }
+        with open(path + '.json.tmp', 'w', encoding='utf-8') as f:
+            json.dump(header, f, ensure_ascii=False)
+
+        os.replace(path + '.npy.tmp', path + '.npy')
+        os.replace(path + '.json.tmp', path + '.json')
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "ScoreTable":
+        """
+        載入 save() 寫出的表格。mmap=True 時陣列以唯讀方式映射到記憶體，
+        開檔幾乎不花時間，實際用到的部分才會從磁碟讀進來。
+        """
+        with open(path + '.json', 'r', encoding='utf-8') as f:
+            header = json.load(f)
+        if header.get("format") != SCORE_TABLE_FORMAT:
+            raise ValueError(f"{path}.json 的格式版本 {header.get('format')} 不支援 (需要 {SCORE_TABLE_FORMAT})")
+
+        percentiles = np.load(path + '.npy', mmap_mode='r' if mmap else None)
+        if list(percentiles.shape) != header["shape"] or percentiles.dtype != np.float64:
+            raise ValueError(f"{path}.npy 與索引檔不一致：{percentiles.shape} {percentiles.dtype}，索引記錄 {header['shape']}")
+
+        return cls(header["group_ids"], header["subjects"], header["min_score"], percentiles)
+
+    @property
+    def max_score(self) -> int:
+        return self.min_score + self.percentiles.shape[1] - 1
+
+    def lookup(self, rows, score_keys) -> np.ndarray:
+        """
+        向量化查詢：rows (列索引) 與 score_keys (整數分數) 為等長陣列，
+        返回對應的累積百分比；超出範圍或原本沒有資料的格子為 NaN。
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(score_keys, dtype=np.int64) - self.min_score
+
+        values = np.full(rows.shape, np.nan)
+        inside = (cols >= 0) & (cols < self.percentiles.shape[1])
+        values[inside] = self.percentiles[rows[inside], cols[inside]]
+        return values
+
+    def percentiles_for(self, group_ids: Sequence[str], score_averages, num_subjects) -> np.ndarray:
+        """
+        一次算出多個校系的達標比例，規則與 get_percentile_from_score 相同：
+        (加權平均分數 * 科目數量) 向上取整後 +1 當作分數鍵。查不到的為 NaN。
+        """
+        rows = np.fromiter((self.group_rows[group_id] for group_id in group_ids), dtype=np.int64, count=len(group_ids))
+        raw_total_scores = np.asarray(score_averages, dtype=np.float64) * np.asarray(num_subjects, dtype=np.int64)
+        score_keys = np.ceil(raw_total_scores).astype(np.int64) + 1
+        return self.lookup(rows, score_keys)
+
+    def percentile(self, subjects: Sequence[str], total_score: float) -> Optional[Union[float, int]]:
+        """
+        互動查詢：科目組合 subjects 考到總分 total_score 時的累積百分比 (>= 該分數的考生比例)。
+        分數鍵的算法與 get_percentile_from_score 相同；沒有這個科目組合則返回 None。
+        """
+        row = self.subject_rows.get(frozenset(subjects))
+        if row is None:
+            return None
+
+        col = math.ceil(total_score) + 1 - self.min_score
+        if 0 <= col < self.percentiles.shape[1]:
+            value = self.percentiles[row, col]
+            if not np.isnan(value):
+                return float(value)
+        return 0
+
+
+def load_score_tables(years: Sequence[int], data_dir: str = "datas", mmap: bool = True) -> Dict[int, ScoreTable]:
+    """一次開啟多個年度的表格，還沒產生表格檔的年度會被略過。"""
+    tables = {}
+    for year in years:
+        path = score_table_path(year, data_dir)
+        if not os.path.exists(path + '.npy'):
+            print(f"警告：找不到 {year} 年的分數分布表 {path}.npy，略過。")
+            continue
+        tables[year] = ScoreTable.load(path, mmap=mmap)
+    return tables
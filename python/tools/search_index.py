@@ -0,0 +1,220 @@
+"""
+前端搜尋用的預建索引 (datas/search_index.json)。
+
+js_utils/search_engine.js 原本每次載入頁面都要把所有校系攤平，再對每個關鍵字掃過每一筆校系。
+這裡事先建好：
+
+    {
+        "format": 1,
+        "universities": [學校, ...],
+        "shards": ["uni/xxxx.json", ...],            # 與 universities 對應，沒有分片時為 null
+        "departments": [系名, ...],                  # 不重複的系名
+        "records": [[學校編號, 系名編號], ...],        # 與原本攤平的順序相同
+        "grams": {"universities": {相鄰兩字: [學校編號]}, "departments": {...: [系名編號]}},
+        "aliases": {"universities": {別名: [學校編號]}, "departments": {別名: [系名編號]}},
+        "postings": {"universities": [[校系編號], ...], "departments": [[校系編號], ...]}
+    }
+
+關鍵字先用 grams 的交集找出候選名稱 (再確認確實包含關鍵字；只有一個字的關鍵字直接比對名稱清單)，
+別名已經事先展開成名稱編號，最後由 postings 把名稱對回校系計分。
+比對規則 (台→臺、大小寫、別名) 與 search_engine.js 相同。
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+SEARCH_INDEX_FORMAT = 1
+
+# 與 js_utils/search_engine.js 的別名表相同，修改時兩邊要一起改
+SCHOOL_ALIASES: Dict[str, List[str]] = {
+    "台大": ["國立臺灣大學"], "臺大": ["國立臺灣大學"], "ntu": ["國立臺灣大學"],
+    "成大": ["國立成功大學"], "ncku": ["國立成功大學"],
+    "清大": ["國立清華大學"], "nthu": ["國立清華大學"],
+    "交大": ["國立陽明交通大學"], "陽明交大": ["國立陽明交通大學"], "陽明": ["國立陽明交通大學"], "nycu": ["國立陽明交通大學"],
+    "政大": ["國立政治大學"], "nccu": ["國立政治大學"],
+    "中大": ["國立中央大學"], "中央": ["國立中央大學"], "ncu": ["國立中央大學"],
+    "中山": ["國立中山大學"], "nsysu": ["國立中山大學"],
+    "中興": ["國立中興大學"], "興大": ["國立中興大學"], "nchu": ["國立中興大學"],
+    "中正": ["國立中正大學"], "ccu": ["國立中正大學"],
+    "台師大": ["國立臺灣師範大學"], "臺師大": ["國立臺灣師範大學"], "師大": ["國立臺灣師範大學"], "ntnu": ["國立臺灣師範大學"],
+    "北大": ["國立臺北大學"],
+    "海大": ["國立臺灣海洋大學"], "台海大": ["國立臺灣海洋大學"], "臺海大": ["國立臺灣海洋大學"],
+    "彰師大": ["國立彰化師範大學"], "彰師": ["國立彰化師範大學"],
+    "高師大": ["國立高雄師範大學"], "高師": ["國立高雄師範大學"],
+    "頂大": ["國立臺灣大學", "國立陽明交通大學", "國立清華大學", "國立成功大學", "國立政治大學"],
+    "四大": ["國立臺灣大學", "國立陽明交通大學", "國立清華大學", "國立成功大學"],
+    "四中": ["國立中央大學", "國立中山大學", "國立中興大學", "國立中正大學"],
+    "中字輩": ["國立中央大學", "國立中山大學", "國立中興大學", "國立中正大學"],
+    "中字": ["國立中央大學", "國立中山大學", "國立中興大學", "國立中正大學"],
+    "師北海": ["國立臺灣師範大學", "國立臺北大學", "國立臺灣海洋大學"],
+    "公館": ["國立臺灣大學", "國立臺灣師範大學"],
+    "指南山": ["國立政治大學"],
+    "鳳梨": ["國立中正大學"],
+    "西子灣": ["國立中山大學"],
+    "摩天輪": ["義守大學"],
+    "觀音山": ["義守大學"],
+}
+
+DEPT_ALIASES: Dict[str, List[str]] = {
+    "資工": ["資訊工程", "資訊科學"],
+    "化工": ["化學工程"],
+    "電資": ["電機工程", "資訊工程", "資電", "電機資訊"],
+    "資管": ["資訊管理"],
+    "企管": ["企業管理"],
+    "中文": ["中國文學"],
+    "外文": ["外國語文"],
+    "財金": ["財務金融"],
+    "法律": ["法律"],
+    "物治": ["物理治療"],
+    "職治": ["職能治療"],
+    "應數": ["應用數學"],
+    "應化": ["應用化學"],
+    "地科": ["地球科學"],
+    "材工": ["材料"],
+    "工科": ["工程科學", "工程與系統科學"],
+}
+
+
+def normalize(text: str) -> str:
+    """與 search_engine.js 相同：台 → 臺、轉小寫。"""
+    return text.replace("台", "臺").lower()
+
+
+def grams(text: str) -> Iterable[str]:
+    """名稱中所有相鄰的兩個字 (不重複，保持出現順序讓輸出檔案固定)。"""
+    return dict.fromkeys(text[i:i + 2] for i in range(len(text) - 1))
+
+
+def _gram_postings(names: List[str]) -> Dict[str, List[int]]:
+    postings: Dict[str, List[int]] = {}
+    for name_id, name in enumerate(names):
+        for gram in grams(normalize(name)):
+            postings.setdefault(gram, []).append(name_id)
+    return postings
+
+
+def _school_alias_postings(universities: List[str]) -> Dict[str, List[int]]:
+    # 別名對到的是完整校名
+    ids = {normalize(uni): uni_id for uni_id, uni in enumerate(universities)}
+    postings: Dict[str, List[int]] = {}
+    for alias, targets in SCHOOL_ALIASES.items():
+        matched = {ids[normalize(target)] for target in targets if normalize(target) in ids}
+        if matched:
+            key = normalize(alias)
+            postings[key] = sorted(matched | set(postings.get(key, [])))
+    return postings
+
+
+def _dept_alias_postings(departments: List[str]) -> Dict[str, List[int]]:
+    # 系名包含任一個別名對應的字串就算符合
+    normalized = [normalize(dept) for dept in departments]
+    postings: Dict[str, List[int]] = {}
+    for alias, targets in DEPT_ALIASES.items():
+        matched = {dept_id for dept_id, dept in enumerate(normalized) if any(target in dept for target in targets)}
+        if matched:
+            key = normalize(alias)
+            postings[key] = sorted(matched | set(postings.get(key, [])))
+    return postings
+
+
+def build_search_index(departments_by_uni: Dict[str, List[str]], shards: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    :param departments_by_uni: { 學校: [系名, ...] }，順序就是搜尋結果同分時的順序
+    :param shards: { 學校: 分片路徑 } (shard_writer 的 index 中的 shard)，可省略
+    """
+    universities = list(departments_by_uni.keys())
+    departments: List[str] = []
+    dept_ids: Dict[str, int] = {}
+    records: List[List[int]] = []
+    uni_postings: List[List[int]] = []
+    dept_postings: List[List[int]] = []
+
+    for uni_id, uni in enumerate(universities):
+        uni_postings.append([])
+        for dept in departments_by_uni[uni]:
+            if dept not in dept_ids:
+                dept_ids[dept] = len(departments)
+                departments.append(dept)
+                dept_postings.append([])
+            record_id = len(records)
+            records.append([uni_id, dept_ids[dept]])
+            uni_postings[uni_id].append(record_id)
+            dept_postings[dept_ids[dept]].append(record_id)
+
+    return {
+        "format": SEARCH_INDEX_FORMAT,
+        "universities": universities,
+        "shards": [shards.get(uni) if shards else None for uni in universities],
+        "departments": departments,
+        "records": records,
+        "grams": {
+            "universities": _gram_postings(universities),
+            "departments": _gram_postings(departments),
+        },
+        "aliases": {
+            "universities": _school_alias_postings(universities),
+            "departments": _dept_alias_postings(departments),
+        },
+        "postings": {
+            "universities": uni_postings,
+            "departments": dept_postings,
+        },
+    }
+
+
+class SearchIndex:
+    """
+    build_search_index 輸出的查詢端，與 search_engine.js 的 searchWithIndex 相同：
+    關鍵字命中校名加 67 分、命中系名加 2 分，依分數由高到低，同分依原本的校系順序。
+    """
+
+    def __init__(self, index: Dict[str, Any]):
+        if index.get("format") != SEARCH_INDEX_FORMAT:
+            raise ValueError(f"不支援的搜尋索引版本：{index.get('format')}")
+        self.index = index
+        self.normalized = {kind: [normalize(name) for name in index[kind]] for kind in ("universities", "departments")}
+
+    @classmethod
+    def from_data(cls, historical_data: Dict[str, Dict[str, Any]]) -> "SearchIndex":
+        return cls(build_search_index({uni: list(depts) for uni, depts in historical_data.items()}))
+
+    def match_names(self, kind: str, keyword: str) -> Set[int]:
+        """名稱包含關鍵字或符合別名的編號 (kind 為 "universities" 或 "departments")。"""
+        names = self.normalized[kind]
+        matched = set(self.index["aliases"][kind].get(keyword, []))
+
+        if len(keyword) < 2:
+            matched.update(name_id for name_id, name in enumerate(names) if keyword in name)
+            return matched
+
+        postings = []
+        for gram in grams(keyword):
+            posting = self.index["grams"][kind].get(gram)
+            if posting is None:
+                return matched
+            postings.append(posting)
+        postings.sort(key=len)
+        others = [set(posting) for posting in postings[1:]]
+        matched.update(
+            name_id for name_id in postings[0]
+            if all(name_id in other for other in others) and keyword in names[name_id]
+        )
+        return matched
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """返回 [{"學校", "科系", "分數"}]。"""
+        keywords = normalize(query).split()
+        scores: Dict[int, int] = {}
+        for keyword in keywords:
+            for kind, score in (("universities", 67), ("departments", 2)):
+                for name_id in self.match_names(kind, keyword):
+                    for record_id in self.index["postings"][kind][name_id]:
+                        scores[record_id] = scores.get(record_id, 0) + score
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+
+        results = []
+        for record_id, score in ranked:
+            uni_id, dept_id = self.index["records"][record_id]
+            results.append({"學校": self.index["universities"][uni_id], "科系": self.index["departments"][dept_id], "分數": score})
+        return results
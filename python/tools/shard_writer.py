@@ -0,0 +1,114 @@
+"""
+historical_result 的分片輸出。
+
+每所學校一個分片、每個區域一個分片，另外寫一個很小的 index.json：
+
+    {
+        "format": 1,
+        "universities": { 學校: {"region": 區域, "shard": "uni/xxxx.json", "hash": ..., "departments": [系名, ...]} },
+        "regions": { 區域: {"shard": "region/xxxx.json", "universities": [學校, ...], "hash": ...} }
+    }
+
+前端只要先載入索引就能列出所有校系，使用者打開哪所學校才下載那所學校的分片。
+分片檔名取自名稱的雜湊，同一所學校每次輸出的路徑都相同；
+hash 是分片內容的雜湊，前端拿來當版本參數，內容改變時不會讀到快取中的舊檔。
+"""
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Dict, Optional, TextIO, Tuple
+
+from tools import department_record
+from tools.json_stream import JsonObjectWriter
+
+SHARD_FORMAT = 1
+# 與 script.js 的 defaultRegion 相同
+DEFAULT_REGION = "其他/未分類"
+
+
+def shard_name(name: str) -> str:
+    """由學校或區域名稱產生固定的分片檔名。"""
+    return hashlib.sha1(name.encode('utf-8')).hexdigest()[:12] + '.json'
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()[:12]
+
+
+def university_shard_content(integrated_uni: Dict[str, Any]) -> bytes:
+    """一所學校分片的內容 (最小化 JSON)。"""
+    return json.dumps(integrated_uni, ensure_ascii=False, separators=(',', ':'), default=department_record.to_json).encode('utf-8')
+
+
+def read_university_shard(shard_dir: str, uni: str) -> Optional[bytes]:
+    """讀取上次輸出的學校分片，沒有這個分片時返回 None。"""
+    try:
+        with open(os.path.join(shard_dir, 'uni', shard_name(uni)), 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+class ShardWriter:
+    """
+    逐校加入整合結果 (add)，學校分片立即寫出，區域分片以串流方式持續追加，
+    close() 時補完區域分片並寫出 index.json。
+    所有檔案先寫在暫存資料夾，完成後才取代舊的分片資料夾，不會留下已刪除學校的舊分片。
+    """
+
+    def __init__(self, shard_dir: str, regions: Dict[str, str]):
+        self.shard_dir = shard_dir
+        self.regions = regions
+        self._tmp_dir = shard_dir.rstrip('/\\') + '.tmp'
+
+        if os.path.exists(self._tmp_dir):
+            shutil.rmtree(self._tmp_dir)
+        os.makedirs(os.path.join(self._tmp_dir, 'uni'))
+        os.makedirs(os.path.join(self._tmp_dir, 'region'))
+
+        self._region_writers: Dict[str, Tuple[TextIO, JsonObjectWriter]] = {}
+        self.index: Dict[str, Any] = {"format": SHARD_FORMAT, "universities": {}, "regions": {}}
+
+    def add(self, uni: str, integrated_uni: Dict[str, Any]) -> None:
+        region = self.regions.get(uni) or DEFAULT_REGION
+        uni_shard = 'uni/' + shard_name(uni)
+
+        content = university_shard_content(integrated_uni)
+        with open(os.path.join(self._tmp_dir, uni_shard), 'wb') as f:
+            f.write(content)
+
+        if region not in self._region_writers:
+            region_shard = 'region/' + shard_name(region)
+            f = open(os.path.join(self._tmp_dir, region_shard), 'w', encoding='utf-8')
+            self._region_writers[region] = (f, JsonObjectWriter(f, indent=None, default=department_record.to_json))
+            self.index["regions"][region] = {"shard": region_shard, "universities": []}
+        self._region_writers[region][1].write(uni, integrated_uni)
+        self.index["regions"][region]["universities"].append(uni)
+
+        self.index["universities"][uni] = {
+            "region": region,
+            "shard": uni_shard,
+            "hash": content_hash(content),
+            "departments": list(integrated_uni.keys()),
+        }
+
+    def close(self) -> Dict[str, Any]:
+        """完成所有分片並寫出索引，返回索引內容。"""
+        for f, writer in self._region_writers.values():
+            writer.close()
+            f.close()
+        self._region_writers = {}
+
+        # 區域分片是邊寫邊追加的，寫完後再讀回來計算雜湊
+        for region_entry in self.index["regions"].values():
+            with open(os.path.join(self._tmp_dir, region_entry["shard"]), 'rb') as f:
+                region_entry["hash"] = content_hash(f.read())
+
+        with open(os.path.join(self._tmp_dir, 'index.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, separators=(',', ':'))
+
+        if os.path.exists(self.shard_dir):
+            shutil.rmtree(self.shard_dir)
+        os.replace(self._tmp_dir, self.shard_dir)
+        return self.index
@@ -0,0 +1,282 @@
+"""
+產生擬真的合成資料，用來測試整合、匹配與前端資料量在資料變多 (更多學校、校系、年度) 時的表現。
+
+輸出的目錄結構與 datas/ 相同，可以直接把 data_dir 指到這裡跑 integrate_data 等：
+    {年度}/dept_criteria.csv           分科測驗錄取分數 (與甄選委員會公告的 CSV 相同格式)，start_year ~ end_year - 1
+    {年度}/subjects_combinations.csv   各科目組合的分數分布，同上
+    {年度}/result.json                 由上面兩個檔案經 convert + match_them 產生，與 get_single_year_results.py 相同
+    {年度}/dept_renamed.json           該年度的改名 { 學校: { 舊系名: [新系名] } }，start_year + 1 ~ end_year
+    {end_year}/all_department_criteria.json
+
+每年有一部分校系改名、拆分 (一個舊系名對應多個新系名) 或合併 (多個舊系名對應同一個新系名)，
+改過名的校系之後還可能再改，所以會形成跨多年的改名鏈；另外也有停招與新設 (沒有歷史資料) 的校系。
+同樣的參數與 seed 每次產生的檔案完全相同。
+"""
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from tools import department_record
+from tools.college_data_transform import convert_division_exam_data
+from tools.match_groups import match_them
+from tools.score_distribution_csv_2_json import convert_score_distribution
+from tools.score_table import ScoreTable
+
+# --- 規模設定 (真實資料約 60 所學校、1,800 個校系) ---
+UNIVERSITIES = 60
+# 每校校系數的 (最少, 最多, 最常見)，依三角分布抽樣 (真實資料平均約 30 個，多數學校在 15 ~ 45 個之間)
+DEPARTMENTS_PER_UNIVERSITY = (3, 70, 15)
+# 每個校系每年改名、拆分、合併的機率
+RENAME_RATE = 0.02
+SPLIT_RATE = 0.015
+MERGE_RATE = 0.01
+# 每個校系每年停招的機率，以及每年新設校系的數量 (相對於現有校系數)
+CLOSE_RATE = 0.01
+NEW_DEPARTMENT_RATE = 0.015
+# 不同科目組合的數量 (真實資料約 170 組)，不隨規模增加
+SUBJECT_COMBINATIONS = 170
+
+# 錄取分數 CSV 中的科目簡稱
+SUBJECT_ABBRS = ["國", "英", "數甲", "數乙", "數A", "數B", "物", "化", "生", "歷", "地", "公"]
+MULTIPLIERS = [1.0, 1.0, 1.0, 1.25, 1.25, 1.5, 2.0]
+# 學測檢定的科目與標準，大約一成的校系有
+TEST_STANDARD_SUBJECTS = ["國文", "英文", "數A", "數B", "自然", "社會"]
+TEST_STANDARD_LEVELS = ["頂標", "前標", "均標", "後標", "底標"]
+TEST_STANDARD_RATE = 0.12
+
+DEPARTMENT_BASE_NAMES = [
+    "中國文學系", "外國語文學系", "歷史學系", "哲學系", "人類學系", "圖書資訊學系", "日本語文學系",
+    "數學系", "物理學系", "化學系", "地質科學系", "心理學系", "地理環境資源學系", "大氣科學系",
+    "政治學系", "經濟學系", "社會學系", "社會工作學系", "醫學系", "牙醫學系", "藥學系", "護理學系",
+    "土木工程學系", "機械工程學系", "化學工程學系", "材料科學與工程學系", "電機工程學系",
+    "資訊工程學系", "工商管理學系", "會計學系", "財務金融學系", "國際企業學系", "資訊管理學系",
+    "法律學系", "生命科學系", "農藝學系", "園藝暨景觀學系", "獸醫學系", "森林環境暨資源學系",
+    "教育學系", "特殊教育學系", "體育學系", "音樂學系", "美術學系", "設計學系", "建築學系",
+    "傳播學系", "新聞學系", "廣告學系", "觀光事業學系", "東南亞語文學系", "統計學系",
+]
+GROUP_SUFFIXES = ["", "", "", "A組", "B組", "甲組", "乙組"]
+RENAME_PREFIXES = ["智慧", "應用", "國際", "數位", "創新"]
+SPLIT_SUFFIXES = [("A組", "B組"), ("甲組", "乙組"), ("一般組", "產業組")]
+
+
+class _Department:
+    """一個校系在產生過程中的狀態，改名時沿用科目倍數與分數水準。"""
+
+    __slots__ = ("name", "multipliers", "level", "quota")
+
+    def __init__(self, name: str, multipliers: Dict[str, float], level: float, quota: int):
+        self.name = name
+        self.multipliers = multipliers
+        self.level = level
+        self.quota = quota
+
+    def renamed(self, name: str) -> "_Department":
+        return _Department(name, self.multipliers, self.level, self.quota)
+
+
+class SyntheticDataset:
+
+    def __init__(
+        self,
+        universities: int = UNIVERSITIES,
+        departments_per_university: Tuple[int, int, int] = DEPARTMENTS_PER_UNIVERSITY,
+        start_year: int = 112,
+        end_year: int = 115,
+        seed: int = 0
+    ):
+        self.rng = random.Random(seed)
+        self.start_year = start_year
+        self.end_year = end_year
+        self.combinations = self._subject_combinations()
+
+        # { 年度: { 學校: [校系] } } 與 { 年度: dept_renamed.json 的內容 }
+        self.departments: Dict[int, Dict[str, List[_Department]]] = {start_year: {}}
+        self.renames: Dict[int, Dict[str, Dict[str, List[str]]]] = {}
+
+        for index in range(1, universities + 1):
+            uni = f"合成大學{index:05d}"
+            low, high, mode = departments_per_university
+            count = round(self.rng.triangular(low, high, mode))
+            used: set = set()
+            self.departments[start_year][uni] = [self._new_department(used) for _ in range(count)]
+
+        for year in range(start_year + 1, end_year + 1):
+            self.departments[year] = {}
+            self.renames[year] = {}
+            for uni, depts in self.departments[year - 1].items():
+                new_depts, rename_map = self._evolve(depts)
+                self.departments[year][uni] = new_depts
+                if rename_map:
+                    self.renames[year][uni] = rename_map
+
+    # ----------------------------------------------------
+    # 產生校系與改名
+    # ----------------------------------------------------
+
+    def _subject_combinations(self) -> List[Dict[str, float]]:
+        combinations: List[Dict[str, float]] = []
+        seen = set()
+        while len(combinations) < SUBJECT_COMBINATIONS:
+            # 真實資料以 3 科最多，其次是 4、5 科；英文幾乎都有採計
+            count = self.rng.choices([3, 4, 5], weights=[6, 2.5, 1.5])[0]
+            others = [abbr for abbr in SUBJECT_ABBRS if abbr != "英"]
+            subjects = ["英"] + self.rng.sample(others, count - 1) if self.rng.random() < 0.85 else self.rng.sample(SUBJECT_ABBRS, count)
+            if frozenset(subjects) in seen:
+                continue
+            seen.add(frozenset(subjects))
+            combinations.append({abbr: self.rng.choice(MULTIPLIERS) for abbr in subjects})
+        return combinations
+
+    def _unique_name(self, candidate: str, used: set) -> str:
+        name = candidate
+        serial = 2
+        while name in used:
+            name = f"{candidate}{serial}班"
+            serial += 1
+        used.add(name)
+        return name
+
+    def _new_department(self, used: set) -> _Department:
+        name = self._unique_name(self.rng.choice(DEPARTMENT_BASE_NAMES) + self.rng.choice(GROUP_SUFFIXES), used)
+        return _Department(name, self.rng.choice(self.combinations), self.rng.uniform(30, 56), self.rng.randint(5, 60))
+
+    def _evolve(self, depts: List[_Department]) -> Tuple[List[_Department], Dict[str, List[str]]]:
+        """由前一年的校系產生下一年的校系，返回 (校系列表, { 舊系名: [新系名] })。"""
+        used = {dept.name for dept in depts}
+        new_depts: List[_Department] = []
+        rename_map: Dict[str, List[str]] = {}
+
+        index = 0
+        while index < len(depts):
+            dept = depts[index]
+            roll = self.rng.random()
+            if roll < RENAME_RATE:
+                new_dept = dept.renamed(self._unique_name(self.rng.choice(RENAME_PREFIXES) + dept.name, used))
+                rename_map[dept.name] = [new_dept.name]
+                new_depts.append(new_dept)
+            elif roll < RENAME_RATE + SPLIT_RATE:
+                suffixes = self.rng.choice(SPLIT_SUFFIXES)
+                parts = [dept.renamed(self._unique_name(dept.name + suffix, used)) for suffix in suffixes]
+                rename_map[dept.name] = [part.name for part in parts]
+                new_depts.extend(parts)
+            elif roll < RENAME_RATE + SPLIT_RATE + MERGE_RATE and index + 1 < len(depts):
+                # 與下一個校系合併成一個新系，沿用第一個的科目倍數
+                merged = dept.renamed(self._unique_name(self.rng.choice(RENAME_PREFIXES) + self.rng.choice(DEPARTMENT_BASE_NAMES), used))
+                rename_map[dept.name] = [merged.name]
+                rename_map[depts[index + 1].name] = [merged.name]
+                new_depts.append(merged)
+                index += 1
+            elif RENAME_RATE + SPLIT_RATE + MERGE_RATE <= roll < RENAME_RATE + SPLIT_RATE + MERGE_RATE + CLOSE_RATE:
+                # 停招：下一年沒有這個校系，也沒有改名紀錄
+                pass
+            else:
+                new_depts.append(dept)
+            index += 1
+
+        for _ in depts:
+            if self.rng.random() < NEW_DEPARTMENT_RATE:
+                new_depts.append(self._new_department(used))
+
+        return new_depts, rename_map
+
+    # ----------------------------------------------------
+    # 輸出
+    # ----------------------------------------------------
+
+    def _year_scores(self, dept: _Department) -> Tuple[float, Optional[float]]:
+        """某一年的錄取平均分數 (每年隨機浮動) 與原住民平均分數。"""
+        average = min(59.5, max(20.0, dept.level + self.rng.gauss(0, 1.5)))
+        indigenous = average * self.rng.uniform(0.85, 1.0) if self.rng.random() < 0.3 else None
+        return average, indigenous
+
+    def write_dept_criteria_csv(self, year: int, path: str) -> None:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write('"系組\n代碼",校名,系組名,採計及加權,"錄取人數\n(含外加)","普通生\n錄取分數","原住民\n錄取分數"\n')
+            code = 0
+            for uni, depts in self.departments[year].items():
+                for dept in depts:
+                    code += 1
+                    average, indigenous = self._year_scores(dept)
+                    criteria = " ".join(f"{abbr}x{multiplier:.2f}" for abbr, multiplier in dept.multipliers.items())
+                    weights_total = sum(dept.multipliers.values())
+                    # CSV 中是加權總分；原住民外加 35%，寫成加分後的總分
+                    indigenous_text = f"{indigenous * weights_total * 1.35:.2f}" if indigenous is not None else "-----"
+                    f.write(f"{code:04d},{uni},{dept.name},{criteria},{dept.quota},{average * weights_total:.2f},{indigenous_text}\n")
+
+    def all_department_criteria(self) -> Dict[str, Dict[str, Any]]:
+        full_names = {"國": "國文", "英": "英文", "物": "物理", "化": "化學", "生": "生物", "歷": "歷史", "地": "地理", "公": "公民"}
+        result: Dict[str, Dict[str, Any]] = {}
+        eid = 0
+        for uni, depts in self.departments[self.end_year].items():
+            result[uni] = {}
+            for dept in depts:
+                eid += 1
+                standards = {}
+                if self.rng.random() < TEST_STANDARD_RATE:
+                    for subject in self.rng.sample(TEST_STANDARD_SUBJECTS, self.rng.randint(1, 2)):
+                        standards[subject] = self.rng.choice(TEST_STANDARD_LEVELS)
+                result[uni][dept.name] = {
+                    "核定人數": dept.quota,
+                    "學測標準": standards,
+                    "科目倍數": {full_names.get(abbr, abbr): multiplier for abbr, multiplier in dept.multipliers.items()},
+                    "id": f"{eid:05d}",
+                }
+        return result
+
+    def department_count(self, year: int) -> int:
+        return sum(len(depts) for depts in self.departments[year].values())
+
+    def write(self, out_dir: str) -> None:
+        """把所有年度的資料寫進 out_dir (結構與 datas/ 相同)。"""
+        for year in range(self.start_year, self.end_year):
+            year_dir = os.path.join(out_dir, str(year))
+            os.makedirs(year_dir, exist_ok=True)
+            criteria_csv = os.path.join(year_dir, 'dept_criteria.csv')
+            distribution_csv = os.path.join(year_dir, 'subjects_combinations.csv')
+            self.write_dept_criteria_csv(year, criteria_csv)
+
+            # 與 get_single_year_results.py 相同的流程產生 result.json
+            dept_criteria = convert_division_exam_data(criteria_csv)
+            write_synthetic_score_distribution(dept_criteria, distribution_csv)
+            score_table = ScoreTable.from_distribution(convert_score_distribution(distribution_csv))
+            _write_json(os.path.join(year_dir, 'result.json'), match_them(dept_criteria, score_table))
+
+        for year, rename_map in self.renames.items():
+            os.makedirs(os.path.join(out_dir, str(year)), exist_ok=True)
+            _write_json(os.path.join(out_dir, str(year), 'dept_renamed.json'), rename_map)
+
+        _write_json(os.path.join(out_dir, str(self.end_year), 'all_department_criteria.json'), self.all_department_criteria())
+
+
+def _write_json(path: str, data: Any) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=4, default=department_record.to_json)
+
+
+# 合成分數分布用的科目全名 (convert_score_distribution 會再換回簡稱)
+_FULL_SUBJECT_NAMES = {"公民": "公民與社會", "數A": "數學A", "數B": "數學B", "數甲": "數學甲", "數乙": "數學乙"}
+
+
+def write_synthetic_score_distribution(dept_criteria: Dict[str, Any], csv_path: str) -> None:
+    """
+    依錄取分數中出現的每種科目組合產生一個組別，分數每 1 分一列，累積百分比隨分數平滑遞增。
+    內容只由 dept_criteria 決定，每次產生的檔案都相同。
+    """
+    combinations: List[tuple] = []
+    seen = set()
+    for depts in dept_criteria.values():
+        for dept_data in depts.values():
+            subjects = tuple(dept_data.get("科目倍數", {}).keys())
+            if subjects and frozenset(subjects) not in seen:
+                seen.add(frozenset(subjects))
+                combinations.append(subjects)
+
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        for index, subjects in enumerate(combinations, start=1):
+            names = "、".join(_FULL_SUBJECT_NAMES.get(subject, subject) for subject in subjects)
+            max_score = 60 * len(subjects)
+            for score in range(max_score, 0, -1):
+                percentage = round(100 * (1 - score / max_score) ** 2, 2)
+                f.write(f"{index:03d},{names},{score - 1}.01-{score},{percentage}\n")
@@ -2,6 +2,11 @@
 let schoolData = {};
 let regionData = {};
 let searchEngine;
+let dataLoader;
+// 分片索引：有的話 schoolData 一開始只有校系名稱，打開學校時才下載該校的分片
+let shardIndex = null;
+const loadedUniversities = new Set();
+const SHARD_DIR = 'datas/shards';
 const universitySelect = document.getElementById('university-select');
 const departmentSelect = document.getElementById('department-select');
 const resultsDisplay = document.getElementById('results-display');
@@ -13,20 +18,24 @@ const resultsDiv = document.querySelector('.results');
 
 async function loadData() {
     try {
-        // 載入 data.json 檔案
-        const response = await fetch('datas/historical_result.json');
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
+        dataLoader = await import("./js_utils/data_loader.js");
+
+        // 有分片時只載入索引 (幾十 KB)，選單與搜尋只需要校系名稱
+        shardIndex = await dataLoader.loadShardIndex(SHARD_DIR);
+        if (shardIndex) {
+            schoolData = {};
+            regionData = {};
+            for (const [uni, entry] of Object.entries(shardIndex.universities)) {
+                schoolData[uni] = Object.fromEntries(entry.departments.map(dept => [dept, null]));
+                regionData[uni] = entry.region;
+            }
+        } else {
+            // 載入 data.json 檔案 (有發布精簡版時優先載入精簡版)
+            schoolData = await dataLoader.loadPublishedJson('datas', 'historical_result.json');
+            regionData = await dataLoader.loadPublishedJson('datas', 'schools_by_region.json'); // 🚨 請確認路徑是否正確
         }
-        schoolData = await response.json();
         console.log(schoolData);
         
-        const response1 = await fetch('datas/schools_by_region.json'); // 🚨 請確認路徑是否正確
-        if (!response1.ok) {
-            throw new Error(`HTTP error! status: ${response1.status}`);
-        }
-        regionData = await response1.json();
-        
         // 初始化大學選單
         populateUniversities();
         // 綁定事件監聽器
@@ -34,8 +43,10 @@ async function loadData() {
 
         searchEngine = await import("./js_utils/search_engine.js");
 
-        // 搜尋預備
-        searchEngine.flattenData(schoolData)
+        // 搜尋預備：有預建索引就不必扁平化整份資料
+        if (!(await searchEngine.loadSearchIndex('datas/search_index.json'))) {
+            searchEngine.flattenData(schoolData);
+        }
         
     } catch (error) {
         resultsDiv.innerHTML = `<p class="error-message">載入資料失敗：${error.message}</p>`;
@@ -43,6 +54,15 @@ async function loadData() {
     }
 }
 
+// 下載一所學校的分片並放進 schoolData
+async function ensureUniversityLoaded(uni) {
+    if (!shardIndex || loadedUniversities.has(uni) || !shardIndex.universities[uni]) {
+        return;
+    }
+    schoolData[uni] = await dataLoader.loadShard(SHARD_DIR, shardIndex.universities[uni]);
+    loadedUniversities.add(uni);
+}
+
 // -----------------------------------------------------
 // 2. 填充選單
 // -----------------------------------------------------
@@ -160,7 +180,7 @@ function populateDepartments(selectedUniversity) {
         
         // 🌟 自動選擇第一個科系並顯示結果 (這是您要保留的行為)
         if (departments.length > 0) {
-            departmentSelect.value = (dept_param && schoolData[selectedUniversity][dept_param]) ? dept_param : departments[0];
+            departmentSelect.value = (dept_param && schoolData[selectedUniversity][dept_param] !== undefined) ? dept_param : departments[0];
             // 🌟 立即觸發結果顯示
             displayResults();
         } else {
@@ -216,6 +236,16 @@ function displayResults() {
     const uni = universitySelect.value;
     const dept = departmentSelect.value;
 
+    // 分片模式下這所學校還沒下載，下載完再重新顯示
+    if (uni && shardIndex && !loadedUniversities.has(uni)) {
+        ensureUniversityLoaded(uni)
+            .then(displayResults)
+            .catch(error => {
+                resultsDiv.innerHTML = `<p class="error-message">載入資料失敗：${error.message}</p>`;
+                console.error("載入分片時發生錯誤:", error);
+            });
+        return;
+    }
 
     const url = new URL(window.location);
     url.searchParams.set("school", uni);